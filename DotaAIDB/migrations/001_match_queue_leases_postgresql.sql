@@ -0,0 +1,7 @@
+-- Lease-based claiming of match_queue items
+-- Rows assigned before the migration have no lease and get reclaimed by the first agent that asks for work
+
+ALTER TABLE match_queue ADD COLUMN IF NOT EXISTS claimed_at TIMESTAMP;
+ALTER TABLE match_queue ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP;
+
+CREATE INDEX IF NOT EXISTS match_queue_unprocessed_id_idx ON match_queue (id) WHERE is_processed = FALSE;
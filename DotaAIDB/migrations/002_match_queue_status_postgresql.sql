@@ -0,0 +1,42 @@
+-- Replaces the is_assigned/is_processed pair of match_queue with a single status
+-- and adds partial indexes for each of the queue access paths
+
+BEGIN;
+
+CREATE TYPE match_queue_status AS ENUM ('pending', 'claimed', 'processed');
+
+ALTER TABLE match_queue ADD COLUMN status match_queue_status;
+
+UPDATE match_queue SET status = CASE
+  WHEN is_processed THEN 'processed'::match_queue_status
+  WHEN is_assigned THEN 'claimed'::match_queue_status
+  ELSE 'pending'::match_queue_status
+END;
+
+ALTER TABLE match_queue ALTER COLUMN status SET NOT NULL;
+ALTER TABLE match_queue ALTER COLUMN status SET DEFAULT 'pending';
+
+-- Rows claimed before leases existed are due for reclaiming right away, afterwards every claimed row has a lease
+UPDATE match_queue SET lease_expires_at = NOW() WHERE status = 'claimed' AND lease_expires_at IS NULL;
+
+ALTER TABLE match_queue ADD CONSTRAINT match_queue_claimed_lease_check
+  CHECK (status <> 'claimed' OR lease_expires_at IS NOT NULL);
+
+DROP INDEX IF EXISTS match_queue_unprocessed_id_idx;
+
+ALTER TABLE match_queue DROP COLUMN is_assigned;
+ALTER TABLE match_queue DROP COLUMN is_processed;
+
+-- New work, claimed in id order
+CREATE INDEX IF NOT EXISTS match_queue_pending_id_idx ON match_queue (id) WHERE status = 'pending';
+-- Items an agent holds (leftovers of its previous run, lease renewals)
+CREATE INDEX IF NOT EXISTS match_queue_claimed_agent_idx ON match_queue (agent, id) WHERE status = 'claimed';
+-- Items of silent agents whose lease ran out
+CREATE INDEX IF NOT EXISTS match_queue_claimed_lease_idx ON match_queue (lease_expires_at, id) WHERE status = 'claimed';
+
+-- Queue filling scans the matches by rank and start time and only needs their match_id
+CREATE INDEX IF NOT EXISTS public_matches_rank_start_time_idx ON public_matches (avg_rank_tier, start_time) INCLUDE (match_id);
+
+COMMIT;
+
+ANALYZE match_queue;
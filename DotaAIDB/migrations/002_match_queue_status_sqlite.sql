@@ -0,0 +1,43 @@
+-- Replaces the is_assigned/is_processed pair of match_queue with a single status
+-- and adds partial indexes for each of the queue access paths.
+-- SQLite cannot drop or retype columns in place, hence the table rebuild.
+-- The lease columns of the Postgres variant (001) are brought in as well.
+
+PRAGMA foreign_keys = OFF;
+
+BEGIN TRANSACTION;
+
+CREATE TABLE match_queue_new (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  match_id INTEGER NOT NULL UNIQUE,
+  status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'claimed', 'processed')),
+  agent TEXT,
+  claimed_at DATETIME,
+  lease_expires_at DATETIME,
+  CHECK (status <> 'claimed' OR lease_expires_at IS NOT NULL)
+);
+
+-- Rows claimed before leases existed are due for reclaiming right away
+INSERT INTO match_queue_new (id, match_id, status, agent, lease_expires_at)
+SELECT id, match_id,
+  CASE WHEN is_processed THEN 'processed' WHEN is_assigned THEN 'claimed' ELSE 'pending' END,
+  agent,
+  CASE WHEN is_assigned AND NOT is_processed THEN datetime('now') END
+FROM match_queue;
+
+DROP TABLE match_queue;
+
+ALTER TABLE match_queue_new RENAME TO match_queue;
+
+CREATE INDEX IF NOT EXISTS match_queue_pending_id_idx ON match_queue (id) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS match_queue_claimed_agent_idx ON match_queue (agent, id) WHERE status = 'claimed';
+CREATE INDEX IF NOT EXISTS match_queue_claimed_lease_idx ON match_queue (lease_expires_at, id) WHERE status = 'claimed';
+
+CREATE INDEX IF NOT EXISTS public_matches_rank_start_time_idx ON public_matches (avg_rank_tier, start_time, match_id);
+
+-- Without statistics the planner walks the primary key for the expired leases instead of using their index
+ANALYZE match_queue;
+
+COMMIT;
+
+PRAGMA foreign_keys = ON;
@@ -20,11 +20,17 @@ CREATE TABLE IF NOT EXISTS matches (
 CREATE TABLE IF NOT EXISTS match_queue (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
   match_id INTEGER NOT NULL UNIQUE,
-  is_assigned BOOLEAN NOT NULL,
+  status TEXT NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'claimed', 'processed')),
   agent TEXT,
-  is_processed BOOLEAN NOT NULL
+  claimed_at DATETIME,
+  lease_expires_at DATETIME,
+  CHECK (status <> 'claimed' OR lease_expires_at IS NOT NULL)
 );
 
+CREATE INDEX IF NOT EXISTS match_queue_pending_id_idx ON match_queue (id) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS match_queue_claimed_agent_idx ON match_queue (agent, id) WHERE status = 'claimed';
+CREATE INDEX IF NOT EXISTS match_queue_claimed_lease_idx ON match_queue (lease_expires_at, id) WHERE status = 'claimed';
+
 CREATE TABLE IF NOT EXISTS players (
   id TEXT NOT NULL PRIMARY KEY,
   UNIQUE (id)
@@ -61,6 +67,8 @@ CREATE TABLE IF NOT EXISTS public_matches (
   UNIQUE (match_id)
 );
 
+CREATE INDEX IF NOT EXISTS public_matches_rank_start_time_idx ON public_matches (avg_rank_tier, start_time, match_id);
+
 CREATE TABLE IF NOT EXISTS match_stats (
   match_id TEXT NOT NULL,
   player_id TEXT NOT NULL,
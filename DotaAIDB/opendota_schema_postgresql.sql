@@ -12,14 +12,26 @@ CREATE TABLE IF NOT EXISTS matches (
 );
 
 -- Create the "match_queue" table
+DO $$ BEGIN
+  CREATE TYPE match_queue_status AS ENUM ('pending', 'claimed', 'processed');
+EXCEPTION
+  WHEN duplicate_object THEN NULL;
+END $$;
+
 CREATE TABLE IF NOT EXISTS match_queue (
   id SERIAL PRIMARY KEY,
   match_id TEXT NOT NULL UNIQUE,
-  is_assigned BOOLEAN NOT NULL,
+  status match_queue_status NOT NULL DEFAULT 'pending',
   agent TEXT,
-  is_processed BOOLEAN NOT NULL
+  claimed_at TIMESTAMP,
+  lease_expires_at TIMESTAMP,
+  CONSTRAINT match_queue_claimed_lease_check CHECK (status <> 'claimed' OR lease_expires_at IS NOT NULL)
 );
 
+CREATE INDEX IF NOT EXISTS match_queue_pending_id_idx ON match_queue (id) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS match_queue_claimed_agent_idx ON match_queue (agent, id) WHERE status = 'claimed';
+CREATE INDEX IF NOT EXISTS match_queue_claimed_lease_idx ON match_queue (lease_expires_at, id) WHERE status = 'claimed';
+
 -- Create the "players" table
 CREATE TABLE IF NOT EXISTS players (
   id TEXT PRIMARY KEY,
@@ -59,6 +71,8 @@ CREATE TABLE IF NOT EXISTS public_matches (
   CONSTRAINT public_matches_match_id_unique UNIQUE (match_id)
 );
 
+CREATE INDEX IF NOT EXISTS public_matches_rank_start_time_idx ON public_matches (avg_rank_tier, start_time) INCLUDE (match_id);
+
 -- Create the "match_stats" table
 CREATE TABLE IF NOT EXISTS match_stats (
   match_id TEXT NOT NULL,
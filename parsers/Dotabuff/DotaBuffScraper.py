@@ -1,7 +1,8 @@
+import hashlib
+import os
 import random
 import sys
 
-import requests
 from bs4 import BeautifulSoup
 import time
 import re
@@ -19,8 +20,16 @@ from dataclasses import dataclass
 from colorama import Fore, Style
 import sqlite3
 import socket
+import threading
 from collections import deque
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
 from fake_useragent import UserAgent
+from utils.http_session import get_shared_http_session
+from page_extractors import (parse_page, extract_match_fields, extract_match_player_row,
+                             extract_player_main_page_fields, extract_player_match_rows,
+                             extract_player_scenarios_fields, extract_player_hero_columns,
+                             extract_player_activity_days, extract_heroes_meta_rows)
 
 
 @dataclass
@@ -30,6 +39,13 @@ class DayActivityStats:
     matches_lost: int
 
 
+@dataclass
+class HeroMetaStats:
+    pickrate_overall: float
+    winrate_overall: float
+    rank_groups: dict  # rank group index -> (pickrate, winrate)
+
+
 class MatchQueue:
     def __init__(self, q_id, match_link, is_assigned, agent):
         self.id = q_id
@@ -41,12 +57,10 @@ class MatchQueue:
 def get_gaming_activity_as_day_activity_stats_list(year_activity_days):
     year_activity_days_parsed = []
 
-    for day_el in year_activity_days:
-        activity_matches_results_list = day_el.find_all('span')
-
-        activity_date = datetime.strptime(day_el.find('h3').text, '%Y-%m-%d')
-        activity_matches_won = int(activity_matches_results_list[0].text)
-        activity_matches_lost = int(activity_matches_results_list[-1].text)
+    for activity_date_text, activity_matches_won_text, activity_matches_lost_text in year_activity_days:
+        activity_date = datetime.strptime(activity_date_text, '%Y-%m-%d')
+        activity_matches_won = int(activity_matches_won_text)
+        activity_matches_lost = int(activity_matches_lost_text)
 
         year_activity_days_parsed.append(
             DayActivityStats(activity_date, activity_matches_won, activity_matches_lost))
@@ -54,10 +68,140 @@ def get_gaming_activity_as_day_activity_stats_list(year_activity_days):
     return year_activity_days_parsed
 
 
+class HeroesMetaTable:
+    rank_groups_number = 5
+
+    # Part of the cache key, to be bumped whenever the extraction of the stats from the page changes
+    cache_format_version = 1
+
+    def __init__(self, meta_page_path, cache_path):
+        # The meta page is reduced to the few numbers the players need once. Later runs load them from the cache for as
+        # long as the page file stays the same, so the page is not even parsed
+        self._cache_path = cache_path
+        self._hero_stats = {}
+
+        with open(meta_page_path, 'rb') as file:
+            meta_page_bytes = file.read()
+
+        source_hash = hashlib.sha256(f'{self.cache_format_version}:'.encode() + meta_page_bytes).hexdigest()
+
+        if not self.__try_load_cache(source_hash):
+            self.__parse_meta_page(meta_page_bytes.decode('utf-8'))
+            self.__store_cache(source_hash)
+
+    def __parse_meta_page(self, meta_page_html):
+        for hero_link, columns in extract_heroes_meta_rows(parse_page(meta_page_html)).items():
+            try:
+                self._hero_stats[hero_link] = self.__get_hero_stats_from_columns(columns)
+            except (TypeError, ValueError) as e:
+                print_warning(f'Skipping the malformed meta page row of {hero_link}: {e}')
+
+    def __get_hero_stats_from_columns(self, columns):
+        rank_groups = {}
+
+        for group_index in range(1, self.rank_groups_number + 1):
+            group_column_texts = [text for class_attribute, _, text in columns
+                                  if f'r-tab r-group-{group_index}' in ' '.join(class_attribute.split())]
+
+            if len(group_column_texts) >= 2:
+                # Only the integer part of the percentages is kept for the rank groups
+                rank_groups[group_index] = (float(re.search(r'\d+', group_column_texts[0]).group()),
+                                            float(re.search(r'\d+', group_column_texts[1]).group()))
+
+        if len(columns) < 2 + 2 * self.rank_groups_number:
+            raise ValueError('not enough columns')
+
+        # Pickrate and winrate columns of every rank group alternate after the hero icon and name
+        data_values = [float(data_value) for _, data_value, _ in columns[2:2 + 2 * self.rank_groups_number]]
+
+        return HeroMetaStats(sum(data_values[0::2]) / self.rank_groups_number,
+                             sum(data_values[1::2]) / self.rank_groups_number, rank_groups)
+
+    def __open_cache_connection(self):
+        connection = sqlite3.connect(self._cache_path)
+
+        connection.execute('CREATE TABLE IF NOT EXISTS cache_info (source_hash TEXT NOT NULL)')
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS heroes_meta (
+                hero_link TEXT PRIMARY KEY,
+                pickrate_overall REAL NOT NULL,
+                winrate_overall REAL NOT NULL
+            )""")
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS heroes_meta_rank_groups (
+                hero_link TEXT NOT NULL,
+                group_index INTEGER NOT NULL,
+                pickrate REAL NOT NULL,
+                winrate REAL NOT NULL,
+                PRIMARY KEY (hero_link, group_index)
+            )""")
+
+        return connection
+
+    def __try_load_cache(self, source_hash):
+        if not os.path.exists(self._cache_path):
+            return False
+
+        try:
+            connection = self.__open_cache_connection()
+
+            try:
+                row = connection.execute('SELECT source_hash FROM cache_info').fetchone()
+
+                if not row or row[0] != source_hash:
+                    return False
+
+                for hero_link, pickrate_overall, winrate_overall in connection.execute(
+                        'SELECT hero_link, pickrate_overall, winrate_overall FROM heroes_meta'):
+                    self._hero_stats[hero_link] = HeroMetaStats(pickrate_overall, winrate_overall, {})
+
+                for hero_link, group_index, pickrate, winrate in connection.execute(
+                        'SELECT hero_link, group_index, pickrate, winrate FROM heroes_meta_rank_groups'):
+                    self._hero_stats[hero_link].rank_groups[group_index] = (pickrate, winrate)
+            finally:
+                connection.close()
+        except sqlite3.DatabaseError as e:
+            print_warning(f'Failed loading the heroes meta cache, rebuilding it: {e}')
+            self._hero_stats = {}
+            return False
+
+        return True
+
+    def __store_cache(self, source_hash):
+        try:
+            connection = self.__open_cache_connection()
+
+            try:
+                with connection:
+                    connection.execute('DELETE FROM cache_info')
+                    connection.execute('DELETE FROM heroes_meta')
+                    connection.execute('DELETE FROM heroes_meta_rank_groups')
+
+                    connection.executemany(
+                        'INSERT INTO heroes_meta (hero_link, pickrate_overall, winrate_overall) VALUES (?, ?, ?)',
+                        [(hero_link, stats.pickrate_overall, stats.winrate_overall)
+                         for hero_link, stats in self._hero_stats.items()])
+                    connection.executemany(
+                        'INSERT INTO heroes_meta_rank_groups (hero_link, group_index, pickrate, winrate) '
+                        'VALUES (?, ?, ?, ?)',
+                        [(hero_link, group_index, pickrate, winrate)
+                         for hero_link, stats in self._hero_stats.items()
+                         for group_index, (pickrate, winrate) in stats.rank_groups.items()])
+                    connection.execute('INSERT INTO cache_info (source_hash) VALUES (?)', (source_hash,))
+            finally:
+                connection.close()
+        except sqlite3.DatabaseError as e:
+            # The table is still usable, the page is just parsed again on the next run
+            print_warning(f'Failed storing the heroes meta cache: {e}')
+
+    def get_hero_stats(self, hero_link):
+        return self._hero_stats[hero_link]
+
+
 class Player:
-    def __init__(self, player_link, player_id, main_match_page, main_match_datetime, main_match_id):
+    def __init__(self, player_link, player_id, main_match_player_row, main_match_datetime, main_match_id):
         # Main Match
-        self._main_match_page = main_match_page
+        self._main_match_player_row = main_match_player_row
         self._main_match_datetime = main_match_datetime
         self._main_match_id = main_match_id
 
@@ -132,13 +276,15 @@ class Player:
         self._month_activity_coef = None
 
         # Player pages
-        self._player_main_page_soup = None
-        self._player_matches_page_soup = None
-        self._player_stats_page_soup = None
+        self._player_main_page_fields = None
+        self._player_match_rows = None
+        self._player_stats_page_fields = None
         self._player_heroes_stats_page = None
 
         self._player_side = None
 
+        self._matches_to_queue = []
+
         self.__get_player_main_page()
 
         self.__set_player_status()
@@ -156,24 +302,14 @@ class Player:
             self.__parse_player_month_to_date_matches_stats_from_matches_page()
             self.__parse_player_gaming_activity_from_activity_page_performance_enhanced()
 
-            self.__update_db_queue()
-
-        self.__dump_all_data()
+            self._matches_to_queue = self.__parse_player_month_played_matches_to_update_the_agent_queues()
 
     @staticmethod
-    def __get_matches_table_and_object_list(player_matches_page_arg):
-        matches_list_table = player_matches_page_arg.find('div', class_='content-inner').find('table').find(
-            'tbody')
-        return matches_list_table, matches_list_table.find_all('tr', class_=False)
+    def __extract_match_datetime_value(match_row):
+        return convert_str_to_datetime(match_row['datetime'])
 
-    @staticmethod
-    def __extract_match_datetime_value(match_obj):
-        return convert_str_to_datetime(match_obj.find('time').get('datetime'))
-
-    def __get_last_available_match_datetime(self, player_matches_page_arg):
-        _, match_object_list_temp = self.__get_matches_table_and_object_list(player_matches_page_arg)
-
-        return self.__extract_match_datetime_value(match_object_list_temp[-1])
+    def __get_last_available_match_datetime(self, player_match_rows):
+        return self.__extract_match_datetime_value(player_match_rows[-1])
 
     def __parse_player_gaming_activity_from_activity_page_performance_enhanced(self):
         def get_processed_activity_data_by_activity_list(activity_data_list):
@@ -196,12 +332,7 @@ class Player:
 
             return total_games_played, total_games_won, winrate, num_days_with_games, activity_consistency_coef
 
-        player_activity_page = self.__get_player_activity_page_soup()
-
-        year_2024_to_date_activity_table = player_activity_page.find('div', class_='player-activity-wrapper') \
-            .find_all('div', class_='year-chart')[-1]
-
-        year_activity_days = year_2024_to_date_activity_table.find_all('div', class_='year-chart-tooltip')
+        year_activity_days = extract_player_activity_days(self.__get_player_activity_page())
 
         year_activity_days_parsed_list = get_gaming_activity_as_day_activity_stats_list(year_activity_days)
 
@@ -244,8 +375,8 @@ class Player:
 
         # obsolete
     def __parse_player_gaming_activity_from_activity_page(self):
-        player_activity_page, player_activity_page_selenium_driver = \
-            self.__get_player_activity_page_soup_and_selenium_driver()
+        player_activity_page, pooled_driver = self.__get_player_activity_page_soup_and_selenium_driver()
+        player_activity_page_selenium_driver = pooled_driver.driver
 
         year_2024_to_date_activity_table = player_activity_page.find('div', class_='player-activity-wrapper') \
                                                                 .find_all('div', class_='year-chart')[-1]
@@ -274,50 +405,41 @@ class Player:
         player_activity_by_day_elements = []
 
         for hp in data_hasqtip_values:
-            player_activity_by_day_elements.append(player_activity_page.find('div', id=f'ui-tooltip-{hp}-content'))
-
-        player_activity_stats_list = get_gaming_activity_as_day_activity_stats_list(player_activity_by_day_elements)
+            day_element = player_activity_page.find('div', id=f'ui-tooltip-{hp}-content')
+            day_results = day_element.find_all('span')
 
-        player_activity_page_selenium_driver.quit()
+            player_activity_by_day_elements.append((day_element.find('h3').text, day_results[0].text,
+                                                    day_results[-1].text))
 
-    def __update_db_queue(self):
-        matches_to_queue = self.__parse_player_month_played_matches_to_update_the_agent_queues()
+        player_activity_stats_list = get_gaming_activity_as_day_activity_stats_list(player_activity_by_day_elements)
 
-        if matches_to_queue:
-            _ = db_watcher_global.upload_queue_assignments(matches_to_queue)
+        request_manager_global.return_selenium_driver(pooled_driver)
 
     def __parse_player_month_played_matches_to_update_the_agent_queues(self):
         month_summary_end_date = self._main_match_datetime - relativedelta(weeks=2)
-        last_available_match_datetime = self.__get_last_available_match_datetime(self._player_matches_page_soup)
-        _, match_objs = self.__get_matches_table_and_object_list(self._player_matches_page_soup)
+        last_available_match_datetime = self.__get_last_available_match_datetime(self._player_match_rows)
+        match_rows = self._player_match_rows
 
         if last_available_match_datetime >= month_summary_end_date:  # just take all matches
-            return [get_root_link() + tr.find_all('td')[1]
-                 .find('a', href=lambda href: href and href.startswith('/matches/'))
-                 .get('href')
-                 for tr in match_objs][:10]  # taking first 10 results to decrease the number of GET requests in future
+            # taking first 10 results to decrease the number of GET requests in future
+            return [get_root_link() + match_row['match_href'] for match_row in match_rows][:10]
         else:
             match_queue_list = []
-            for match in match_objs:
-                if self.__extract_match_datetime_value(match) >= month_summary_end_date:
-                    match_queue_list.append(get_root_link() + match
-                                            .find('a', href=lambda href: href and href.startswith('/matches/'))
-                                            .get('href'))
+            for match_row in match_rows:
+                if self.__extract_match_datetime_value(match_row) >= month_summary_end_date:
+                    match_queue_list.append(get_root_link() + match_row['match_href'])
 
             return match_queue_list[:10]  # taking first 10 results to decrease the number of GET requests in future
 
     def __parse_player_month_to_date_matches_stats_from_matches_page(self):
-        def try_parse_player_q_mmr(init_index, match_object_list, month_summary_end_date):
-            for idx in range(init_index, len(match_object_list)):
-                current_match_to_parse = match_object_list[idx]
-                current_match_to_parse_elements = current_match_to_parse.find_all('td')
+        def try_parse_player_q_mmr(init_index, match_rows, month_summary_end_date):
+            for idx in range(init_index, len(match_rows)):
+                current_match_to_parse = match_rows[idx]
 
-                current_match_predicted_rank = current_match_to_parse_elements[1].find('div', class_='subtext').text
+                current_match_predicted_rank = current_match_to_parse['predicted_rank']
 
                 if current_match_predicted_rank in ranks_to_mmr_dict_global:  # if overall match_info is present
-                    current_match_summary_box = current_match_to_parse_elements[3]
-                    # current_match_outcome = current_match_summary_box.find('a').text[:-6]  # Won/Lost
-                    current_match_datetime = self.__extract_match_datetime_value(current_match_summary_box)
+                    current_match_datetime = convert_str_to_datetime(current_match_to_parse['summary_datetime'])
 
                     if current_match_datetime > month_summary_end_date:
                         if len(matches_predicted_mmrs_list) < global_mmr_coefficient:
@@ -329,43 +451,40 @@ class Player:
                     else:
                         break
 
-        player_matches_page = self._player_matches_page_soup
+        player_match_rows = self._player_match_rows
         curr_page_number = 1
 
         # No way
-        if self.__get_last_available_match_datetime(player_matches_page) > self._main_match_datetime:
-            player_matches_page, curr_page_number = self.__get_player_matches_next_page(curr_page_number)
+        if self.__get_last_available_match_datetime(player_match_rows) > self._main_match_datetime:
+            player_match_rows, curr_page_number = self.__get_player_matches_next_page(curr_page_number)
 
         # No way x2
-        if self.__get_last_available_match_datetime(player_matches_page) > self._main_match_datetime:
-            player_matches_page, curr_page_number = self.__get_player_matches_next_page(curr_page_number)
+        if self.__get_last_available_match_datetime(player_match_rows) > self._main_match_datetime:
+            player_match_rows, curr_page_number = self.__get_player_matches_next_page(curr_page_number)
 
         # No way x3
-        if self.__get_last_available_match_datetime(player_matches_page) > self._main_match_datetime:
-            player_matches_page, curr_page_number = self.__get_player_matches_next_page(curr_page_number)
+        if self.__get_last_available_match_datetime(player_match_rows) > self._main_match_datetime:
+            player_match_rows, curr_page_number = self.__get_player_matches_next_page(curr_page_number)
 
         # Might as well buy a lottery ticket or something
-        if self.__get_last_available_match_datetime(player_matches_page) > self._main_match_datetime:
+        if self.__get_last_available_match_datetime(player_match_rows) > self._main_match_datetime:
             raise Exception('The match requested was played during the Ancient Rome Era')
 
-        matches_table, match_object_list = self.__get_matches_table_and_object_list(player_matches_page)
-        target_start_match = matches_table.find('a', href=f'/matches/{self._main_match_id}').find_parent('tr')
-
-        init_index = match_object_list.index(target_start_match)
+        init_index = [match_row['match_href'] for match_row in player_match_rows].index(
+            f'/matches/{self._main_match_id}')
 
         # Here starts the parsing
 
         month_summary_end_date = self._main_match_datetime - relativedelta(months=1)
         matches_predicted_mmrs_list = []
 
-        try_parse_player_q_mmr(init_index=init_index, match_object_list=match_object_list,
+        try_parse_player_q_mmr(init_index=init_index, match_rows=player_match_rows,
                                month_summary_end_date=month_summary_end_date)
 
         if self._player_q_predicted_mmr is None:
-            player_matches_page, curr_page_number = self.__get_player_matches_next_page(curr_page_number)
-            matches_table, match_object_list = self.__get_matches_table_and_object_list(player_matches_page)
+            player_match_rows, curr_page_number = self.__get_player_matches_next_page(curr_page_number)
 
-            try_parse_player_q_mmr(init_index=0, match_object_list=match_object_list,
+            try_parse_player_q_mmr(init_index=0, match_rows=player_match_rows,
                                    month_summary_end_date=month_summary_end_date)
 
     def __get_player_matches_next_page(self, current_page_number):
@@ -373,7 +492,7 @@ class Player:
         next_page = request_manager_global.make_request_to_page_with_retries(
             self._player_link + f'/matches?enhance=overview&page={new_page_number}')
 
-        return BeautifulSoup(next_page, 'html.parser'), new_page_number
+        return extract_player_match_rows(parse_page(next_page)), new_page_number
 
     def __parse_player_hero_stats(self):
         self.__parse_player_hero_stats_from_heroes_page()
@@ -393,11 +512,7 @@ class Player:
             else:
                 return -1
 
-        player_heroes_meta_page = heroes_meta_page_soup_global
-
-        heroes_meta_table = player_heroes_meta_page.find('div', class_='content-inner').find('tbody')
-        player_hero_a_tag = heroes_meta_table.find('a', href=self._hero_link, class_='link-type-hero')
-        player_hero_box = player_hero_a_tag.find_parent('tr')
+        hero_meta_stats = heroes_meta_table_global.get_hero_stats(self._hero_link)
 
         if self._player_q_predicted_mmr:
             group_index = get_td_group_index(self._player_q_predicted_mmr)
@@ -407,115 +522,72 @@ class Player:
             group_index = -1
 
         if group_index != -1:
-            hero_winrate_pickrate_stats_list = player_hero_box.find_all('td',
-                                                        class_=lambda x: x and f'r-tab r-group-{group_index}' in x)
-
-            hero_pickrate_for_rank = re.search(r'\d+', hero_winrate_pickrate_stats_list[0].text).group()
-            hero_winrate_for_rank = re.search(r'\d+', hero_winrate_pickrate_stats_list[1].text).group()
+            self._hero_pickrate_for_rank, self._hero_winrate_for_rank = hero_meta_stats.rank_groups[group_index]
 
-            self._hero_pickrate_for_rank = float(hero_pickrate_for_rank)
-            self._hero_winrate_for_rank = float(hero_winrate_for_rank)
-
-        hero_winrate_pickrate_stats_list_all = player_hero_box.find_all('td')[2:]
-        hero_pickrate_overall, hero_winrate_overall = 0., 0.
-
-        pr_idxs = [0, 2, 4, 6, 8]
-        wr_idxs = [1, 3, 5, 7, 9]
-
-        for idx in pr_idxs:
-            hero_pickrate_overall += float(hero_winrate_pickrate_stats_list_all[idx].get('data-value'))
-
-        for idx in wr_idxs:
-            hero_winrate_overall += float(hero_winrate_pickrate_stats_list_all[idx].get('data-value'))
-
-        hero_pickrate_overall /= len(pr_idxs)
-        hero_winrate_overall /= len(wr_idxs)
-
-        self._hero_pickrate_overall = hero_pickrate_overall
-        self._hero_winrate_overall = hero_winrate_overall
+        self._hero_pickrate_overall = hero_meta_stats.pickrate_overall
+        self._hero_winrate_overall = hero_meta_stats.winrate_overall
 
     def __parse_player_hero_stats_from_heroes_page(self):
-        all_heroes_table = self._player_heroes_stats_page.find('table', class_='sortable').find('tbody')
-
-        player_hero_element = all_heroes_table.find('a', string=self._hero_name)
+        hero_stats_table_row_columns = extract_player_hero_columns(self._player_heroes_stats_page, self._hero_name)
 
-        hero_stats_table_row = player_hero_element.find_parent('tr')
-        hero_stats_table_row_columns = hero_stats_table_row.find_all('td')
-
-        self._player_hero_total_matches_played = int(hero_stats_table_row_columns[2].text)
-        self._player_hero_winrate_overall = float(hero_stats_table_row_columns[3].text[:-1])
-        self._player_hero_kda_ratio_overall = float(hero_stats_table_row_columns[4].text)
+        self._player_hero_total_matches_played = int(hero_stats_table_row_columns[2])
+        self._player_hero_winrate_overall = float(hero_stats_table_row_columns[3][:-1])
+        self._player_hero_kda_ratio_overall = float(hero_stats_table_row_columns[4])
 
     def __parse_player_stats_from_stats_page(self):
-        all_stats_table = self._player_stats_page_soup.find('div', class_='content-inner').find('table')
-
-        all_table_parts = all_stats_table.find_all('tbody')
-
-        lifetime_stats_table = all_table_parts[0]
-        all_matches_stats_row = lifetime_stats_table.find_all('tr')[0]
-
-        all_matches_stats_row_columns = all_matches_stats_row.find_all('td')
+        all_matches_stats_row_columns = self._player_stats_page_fields['all_matches']
 
-        self._all_matches_played_number = int(all_matches_stats_row_columns[1].text)
-        self._player_winrate_over_time_stats_page = float(all_matches_stats_row_columns[2].text[:-1])
-        self._player_time_played_all_matches = int(all_matches_stats_row_columns[3].text)
+        self._all_matches_played_number = int(all_matches_stats_row_columns[1])
+        self._player_winrate_over_time_stats_page = float(all_matches_stats_row_columns[2][:-1])
+        self._player_time_played_all_matches = int(all_matches_stats_row_columns[3])
 
         ###
-        lifetime_sides_stats_table = all_table_parts[3]
-        radiant_dire_rows = lifetime_sides_stats_table.find_all('tr')
+        radiant_row_columns = self._player_stats_page_fields['radiant']
 
-        radiant_row = radiant_dire_rows[0]
-        radiant_row_columns = radiant_row.find_all('td')
-
-        self._radiant_games_played_all_time = int(radiant_row_columns[1].text)
-        self._radiant_winrate_all_time = float(radiant_row_columns[2].text[:-1])
-        self._radiant_time_played = radiant_row_columns[3].text
+        self._radiant_games_played_all_time = int(radiant_row_columns[1])
+        self._radiant_winrate_all_time = float(radiant_row_columns[2][:-1])
+        self._radiant_time_played = radiant_row_columns[3]
 
         ###
-        dire_row = radiant_dire_rows[1]
-        dire_row_columns = dire_row.find_all('td')
+        dire_row_columns = self._player_stats_page_fields['dire']
 
-        self._dire_games_played_all_time = int(dire_row_columns[1].text)
-        self._dire_winrate_all_time = float(dire_row_columns[2].text[:-1])
-        self._dire_time_played = dire_row_columns[3].text
+        self._dire_games_played_all_time = int(dire_row_columns[1])
+        self._dire_winrate_all_time = float(dire_row_columns[2][:-1])
+        self._dire_time_played = dire_row_columns[3]
 
     def __get_player_activity_page_soup_and_selenium_driver(self):
-        options = webdriver.ChromeOptions()
-        options.add_argument('--headless')
-
-        driver = webdriver.Chrome(options=options)
-        driver.get(self._player_link + '/activity')
+        pooled_driver = request_manager_global.checkout_selenium_driver()
+        pooled_driver.driver.get(self._player_link + '/activity')
 
-        player_activity_page = BeautifulSoup(driver.page_source, 'html.parser')
-        player_activity_page_selenium_driver = driver
+        player_activity_page = BeautifulSoup(pooled_driver.driver.page_source, 'html.parser')
 
-        return player_activity_page, player_activity_page_selenium_driver
+        return player_activity_page, pooled_driver
 
-    def __get_player_activity_page_soup(self):
+    def __get_player_activity_page(self):
         player_activity_page = request_manager_global.make_request_to_page_with_retries(self._player_link + '/activity')
 
-        return BeautifulSoup(player_activity_page, 'html.parser')
+        return parse_page(player_activity_page)
 
     def __get_player_main_page(self):
         player_main_page = request_manager_global.make_request_to_page_with_retries(self._player_link)
 
-        self._player_main_page_soup = BeautifulSoup(player_main_page, 'html.parser')
+        self._player_main_page_fields = extract_player_main_page_fields(parse_page(player_main_page))
 
     def __get_player_matches_page(self):
         player_matches_page = request_manager_global.make_request_to_page_with_retries(self._player_link + '/matches')
-        self._player_matches_page_soup = BeautifulSoup(player_matches_page, 'html.parser')
+        self._player_match_rows = extract_player_match_rows(parse_page(player_matches_page))
 
     def __get_player_stats_page(self):
         player_stats_page = request_manager_global.make_request_to_page_with_retries(self._player_link + '/scenarios')
-        self._player_stats_page_soup = BeautifulSoup(player_stats_page, 'html.parser')
+        self._player_stats_page_fields = extract_player_scenarios_fields(parse_page(player_stats_page))
 
     def __get_player_heroes_stats_page(self):
         player_heroes_stats_page = request_manager_global.make_request_to_page_with_retries(
             self._player_link + '/heroes?game_mode=all_pick&metric=played')
-        self._player_heroes_stats_page = BeautifulSoup(player_heroes_stats_page, 'html.parser')
+        self._player_heroes_stats_page = parse_page(player_heroes_stats_page)
 
     def __set_player_status(self):
-        if self._player_main_page_soup.find('div', class_='page-show'):
+        if self._player_main_page_fields['is_hidden']:
             self._visibility_status = PlayerStatus.HIDDEN.name
         else:
             self._visibility_status = PlayerStatus.VISIBLE.name
@@ -523,149 +595,59 @@ class Player:
         print_notification(f'PLayer_VisibilityStatus: {self._visibility_status}')
 
     def __parse_player_stats_from_main_page(self):
-        player_nickname_box = (self._player_main_page_soup.find('div', class_='header-content-primary')
-                                                         .find('div', class_='header-content-title'))
-
-        self._player_nickname = player_nickname_box.find('h1').text
+        player_main_page_fields = self._player_main_page_fields
 
-        player_stats_row = self._player_main_page_soup.find('div', class_='header-content-secondary')
-
-        player_rank_element = player_stats_row.find('div', class_='rank-tier-wrapper')
-        self._player_rank_initial = player_rank_element.get('title')[len('Rank '):]
+        self._player_nickname = player_main_page_fields['nickname']
+        self._player_rank_initial = player_main_page_fields['rank_title'][len('Rank '):]
 
         if self._player_rank_initial[0] == ' ':
             self._player_rank_initial = self._player_rank_initial[1:]
 
-        player_stats_row_important = player_stats_row.find_all('dl')
-
-        self._player_winrate_over_time = float(player_stats_row_important[2].find('dd').text[:-1])
+        self._player_winrate_over_time = float(player_main_page_fields['winrate'][:-1])
 
-        match_record_element = player_stats_row_important[1].find('dd')
-
-        self._player_matches_won = match_record_element.find('span', class_='wins').text
-        self._player_matches_lost = match_record_element.find('span', class_='losses').text
-        self._player_matches_abandoned = match_record_element.find('span', class_='abandons').text
+        self._player_matches_won = player_main_page_fields['wins']
+        self._player_matches_lost = player_main_page_fields['losses']
+        self._player_matches_abandoned = player_main_page_fields['abandons']
 
     def __parse_player_game_stats(self):
-        player_table_row = self._main_match_page.find('tr', class_=lambda c: c and (
-                'faction-radiant' in c or 'faction-dire' in c) and self._player_id in c)
+        player_table_row = self._main_match_player_row
 
-        if 'faction-radiant' in player_table_row.get('class'):
+        if player_table_row['is_radiant']:
             self._player_side = PlayerSide.RADIANT.name
-        elif 'faction-dire' in player_table_row.get('class'):
+        elif player_table_row['is_dire']:
             self._player_side = PlayerSide.DIRE.name
 
-        # print(f'PlayerSide: {self._player_side}')
-
-        hero_tag = player_table_row.find('a', href=lambda href: href and href.startswith('/heroes/'))
+        self._hero_link = player_table_row['hero_link']
+        self._hero_name = player_table_row['hero_name']
+        self._hero_lvl = int(player_table_row['hero_lvl'])
 
-        self._hero_link = hero_tag.get('href')
-
-        ###
-        self._hero_name = hero_tag.find('img').get('title')
-        # print(f'PlayerHeroName: {self._hero_name}')
         ###
-        self._hero_lvl = int(hero_tag.find('span').text)
-        # print(f'Hero lvl: {self._hero_lvl}')
-
-        player_table_column_elements = player_table_row.find_all('td')  # all columns to parse by order
+        self._player_role = player_table_row['role']
+        self._player_lane = player_table_row['lane']
+        self._player_lane_option2 = player_table_row['lane_option2']
+        self._player_lane_result = player_table_row['lane_result']
 
         ###
-        player_role_element = player_table_column_elements[1]
-        self._player_role = player_role_element.find('i').get('title')
-        # print(f'playerRole: {self._player_role}')
+        self._player_kills_number = player_table_row['kills']
+        self._player_deaths_number = player_table_row['deaths']
+        self._player_assists_number = player_table_row['assists']
+        self._player_net = player_table_row['net']
+        self._player_lasthits = player_table_row['lasthits']
+        self._player_denies = player_table_row['denies']
+        self._player_gpm = player_table_row['gpm']
+        self._player_xpm = player_table_row['xpm']
+        self._player_damage_dealt = player_table_row['damage_dealt']
+        self._player_heal = player_table_row['heal']
+        self._player_building_dmg_dealt = player_table_row['building_dmg_dealt']
 
         ###
-        player_lane_element = player_table_column_elements[2]
-        self._player_lane = player_lane_element.find('i').get('title')
-        # print(f'PlayerLane: {self._player_lane}')
+        self._player_observers = player_table_row['observers']
+        self._player_sentries = player_table_row['sentries']
 
-        ###
-        player_lane_result_element = player_table_column_elements[3].find('div')
-        self._player_lane_option2 = player_lane_result_element.find('span', class_='player-lane-text').find('acronym').text
-        # print(f'PlayerLane2: {self._player_lane_option2}')
-
-        self._player_lane_result = player_lane_result_element.find('acronym', class_='lane-outcome').text
-        # print(f'PLayerLaneOutcome: {self._player_lane_result}')
-
-        ###
-        player_kills_number_element = player_table_column_elements[5]
-        self._player_kills_number = parse_table_column_td_text(player_kills_number_element)
-        # print(f'PlayerKills: {self._player_kills_number}')
-
-        ###
-        player_deaths_number_element = player_table_column_elements[6]
-        self._player_deaths_number = parse_table_column_td_text(player_deaths_number_element)
-
-        # print(f'PlayerDeaths: {self._player_deaths_number}')
-
-        ###
-        player_assists_number_element = player_table_column_elements[7]
-        self._player_assists_number = parse_table_column_td_text(player_assists_number_element)
-
-        # print(f'PlayerAssists: {self._player_assists_number}')
-
-        ###
-        player_net_element = player_table_column_elements[8]
-        self._player_net = parse_table_column_td_text(player_net_element.find('acronym'))
-
-        # print(f'PlayerNETWorth: {self._player_net}')
-
-        ###
-        player_lasthits_element = player_table_column_elements[9]
-        self._player_lasthits = parse_table_column_td_text(player_lasthits_element)
-
-        # print(f'PlayerLastHits: {self._player_lasthits}')
-
-        ###
-        player_denies_element = player_table_column_elements[11]
-        self._player_denies = parse_table_column_td_text(player_denies_element)
-
-        # print(f'PlayerDenies: {self._player_denies}')
-
-        ###
-        player_gpm_element = player_table_column_elements[12]
-        self._player_gpm = parse_table_column_td_text(player_gpm_element)
-
-        # print(f'PlayerGPM: {self._player_gpm}')
-
-        ###
-        player_xpm_element = player_table_column_elements[14]
-        self._player_xpm = parse_table_column_td_text(player_xpm_element)
-
-        # print(f'PlayerXPM: {self._player_xpm}')
-
-        ###
-        player_damage_dealt_element = player_table_column_elements[15]
-        self._player_damage_dealt = parse_table_column_td_text(player_damage_dealt_element)
-
-        # print(f'PlayerDMGDealt: {self._player_damage_dealt}')
-
-        ###
-        player_heal_element = player_table_column_elements[16]
-        self._player_heal = parse_table_column_td_text(player_heal_element)
-
-        # print(f'PlayerHeal: {self._player_heal}')
-
-        ###
-        player_building_dmg_dealt_element = player_table_column_elements[17]
-        self._player_building_dmg_dealt = parse_table_column_td_text(player_building_dmg_dealt_element)
-
-        # print(f'PlayerBuildingDMGDealt: {self._player_building_dmg_dealt}')
-
-        ###
-        player_observer_wards_element = player_table_column_elements[18].find('span', class_='color-item-observer-ward')
-        self._player_observers = parse_table_column_td_text(player_observer_wards_element)
-
-        # print(f'PlayerObservers: {self._player_observers}')
+    def get_matches_to_queue(self):
+        return self._matches_to_queue
 
-        ###
-        player_sentry_wards_element = player_table_column_elements[18].find('span', class_='color-item-sentry-ward')
-        self._player_sentries = parse_table_column_td_text(player_sentry_wards_element)
-
-        # print(f'PlayerSentries: {self._player_sentries}')
-
-    def __dump_all_data(self):
+    def get_parsed_records(self):
         data_to_add = {
             'player_id': self._player_id,
             'match_id': self._main_match_id,
@@ -723,10 +705,7 @@ class Player:
             'month_activity_coef': self._month_activity_coef,
         }
 
-        if not db_watcher_global.dump_all_parsed_records(self._hero_link, self._hero_name,
-                                                  self._player_link, self._visibility_status, data_to_add):
-            print_error('Player processing failed...')
-            global_await_exit_action()
+        return self._hero_link, self._hero_name, self._player_link, self._visibility_status, data_to_add
 
 
 class Match:
@@ -739,79 +718,83 @@ class Match:
         self._radiant_score = None
         self._dire_score = None
         self._main_match_page = None
+        self._player_hrefs = None
 
-    def __add_match_to_database(self):
-        res = db_watcher_global.add_match(self._match_id, self._match_link, self._match_datetime, self._match_result,
-                                    self._match_duration, self._radiant_score, self._dire_score)
-
-        return res
+    def __get_match_fields(self):
+        return (self._match_id, self._match_link, self._match_datetime, self._match_result,
+                self._match_duration, self._radiant_score, self._dire_score)
 
     def __set_match_page_object(self):
         if not self._main_match_page:
-            main_match_page = request_manager_global.make_request_to_page_with_retries(self._match_link)
-
-            print(f'Selenium res2: {main_match_page}')
-
-            # TODO remove
-            sys.exit()
+            try:
+                main_match_page = request_manager_global.make_request_to_page_with_retries(self._match_link)
+            except RequestRetriesExhaustedError as e:
+                print_error(f'\n{e}. Manual calibration required')
+                global_await_exit_action()
 
-            self._main_match_page = BeautifulSoup(main_match_page, 'html.parser')
+            self._main_match_page = parse_page(main_match_page)
 
     def __parse_main_match_fields(self):
-        datetime_block = self._main_match_page.find('div', class_='header-content-secondary')
-        match_datetime_parsed = datetime_block.find_all('dl')[-1].find('time').get('datetime')
+        match_fields = extract_match_fields(self._main_match_page)
 
-        self._match_datetime = convert_str_to_datetime(match_datetime_parsed)
+        self._match_datetime = convert_str_to_datetime(match_fields['datetime'])
 
         ###
-        self._match_result = self._main_match_page.find('div', class_='match-result').text
+        self._match_result = match_fields['result']
 
         ###
-        match_results_block = self._main_match_page.find('div', class_='match-victory-subtitle')
-        self._radiant_score = int(match_results_block.find('span', class_='the-radiant score').text)
-        self._dire_score = int(match_results_block.find('span', class_='the-dire score').text)
-        self._match_duration = match_results_block.find('span', class_='duration').text
+        self._radiant_score = int(match_fields['radiant_score'])
+        self._dire_score = int(match_fields['dire_score'])
+        self._match_duration = match_fields['duration']
 
-    def __parse_player_links_as_objects(self):
-        return self._main_match_page.find_all('a', class_=re.compile(r'\blink-type-player\b'))
+        self._player_hrefs = match_fields['player_hrefs']
 
     def __parse_player_links(self):
-        return [f'https://www.dotabuff.com{link["href"]}' for link in self.__parse_player_links_as_objects()]
+        return [f'https://www.dotabuff.com{player_href}' for player_href in self._player_hrefs]
+
+    def __create_player(self, player_id_link_and_row):
+        player_id, player_link, player_row = player_id_link_and_row
+
+        return Player(player_link, player_id, player_row, self._match_datetime, self._match_id)
 
     def process_match(self):
         self.__set_match_page_object()
         self.__parse_main_match_fields()
 
-        if not self.__add_match_to_database():
-            return None
-
         player_links = self.__parse_player_links()
 
         if len(player_links) < 10:
             print_warning(f'Match {self._match_link} is skipped. Anonymous players found')
             return False
 
-        player_links_objs = self.__parse_player_links_as_objects()
-
-        player_ids = [f'player-{parse_player_id(pl)}' for pl in player_links_objs]
+        player_ids = [f'player-{parse_player_id(player_href)}' for player_href in self._player_hrefs]
 
-        player_links_ids = [[player_id, player_link] for player_id, player_link in zip(player_ids, player_links)]
+        # The rows are extracted upfront, so that the worker threads do not share the parsed page
+        player_links_ids = [[player_id, player_link, extract_match_player_row(self._main_match_page, player_id)]
+                            for player_id, player_link in zip(player_ids, player_links)]
 
-        match_players_list = []
+        # The players' pages are fetched concurrently, the request manager keeps the pace polite
+        executor = ThreadPoolExecutor(max_workers=int(config_global['player_workers']))
 
-        # TODO finalize
+        try:
+            match_players_list = list(executor.map(self.__create_player, player_links_ids))
+        except RequestRetriesExhaustedError as e:
+            # The players not started yet are dropped, the exit happens here on the main thread
+            executor.shutdown(wait=False, cancel_futures=True)
+            print_error(f'\n{e}. Manual calibration required')
+            global_await_exit_action()
 
-        its = 0
-        for player_id, player_link in player_links_ids:
-            its += 1
+        executor.shutdown()
 
-            if its != 1:
-                match_players_list.append(
-                    Player(player_link, player_id, self._main_match_page, self._match_datetime, self._match_id))
+        players_records = [player.get_parsed_records() for player in match_players_list]
+        queue_assignments = list(dict.fromkeys(
+            match_link for player in match_players_list for match_link in player.get_matches_to_queue()))
 
-                time.sleep(1)
+        if not db_watcher_global.dump_all_match_records(self.__get_match_fields(), players_records, queue_assignments):
+            print_error('Match processing failed...')
+            global_await_exit_action()
 
-                break
+        return True
 
 
 def print_warning(message):
@@ -1011,7 +994,7 @@ class DatabaseWatcher:
         return res
 
     def add_match(self, match_id, match_link, match_datetime, match_outcome, match_duration,
-                  match_radiant_score, match_dire_score):
+                  match_radiant_score, match_dire_score, allow_commit=True):
         res = self.__try_get_existing_match(match_id)
 
         if not res:
@@ -1025,7 +1008,8 @@ class DatabaseWatcher:
                 self.__try_execute_query,
                 query=query,
                 params=params,
-                is_readonly=False
+                is_readonly=False,
+                allow_commit=allow_commit
             )
 
         return res
@@ -1083,27 +1067,35 @@ class DatabaseWatcher:
 
         return res
 
-    def dump_all_parsed_records(self, hero_link, hero_name, player_link, player_visible, data):
-        player_id = data['player_id']
-
+    def dump_all_match_records(self, match_fields, players_records, queue_assignments):
+        # The match, all of its players and the matches they queued are written in a single transaction
         self._connection.execute('BEGIN')
         self.__refresh_connection_cursor()
 
-        _ = self.__add_player(player_id, player_link, player_visible)
-        _ = self.__add_hero(hero_name, hero_link)
+        res = self.add_match(*match_fields, allow_commit=False)
 
-        res = self.__add_match_stats_record(hero_link, player_id, data)
+        for hero_link, hero_name, player_link, player_visible, data in players_records:
+            if not res:
+                break
 
-        self._connection.commit()
-        self.__refresh_connection_cursor()
+            _ = self.__add_player(data['player_id'], player_link, player_visible)
+            _ = self.__add_hero(hero_name, hero_link)
 
-        if not res:
-            print_warning(f"Transaction for match_stats with match_id: \
-                          {data['match_id']} and player_id: {player_id} has failed")
+            res = self.__add_match_stats_record(hero_link, data['player_id'], data)
+
+        if res and queue_assignments:
+            _ = self.upload_queue_assignments(queue_assignments, allow_commit=False)
+
+        if res:
+            self._connection.commit()
+        else:
+            print_warning(f'Transaction for the match with match_id: {match_fields[0]} has failed')
             print_warning('Skipping the iteration')
 
             self._connection.rollback()
 
+        self.__refresh_connection_cursor()
+
         return res
 
     def update_queue_assignments(self, limit):
@@ -1117,7 +1109,7 @@ class DatabaseWatcher:
 
         return res
 
-    def upload_queue_assignments(self, queue_assignments):
+    def upload_queue_assignments(self, queue_assignments, allow_commit=True):
         self.__refresh_connection_cursor()
 
         query_match_queue = 'SELECT match_link FROM match_queue WHERE match_link IN ({})'.format(
@@ -1142,8 +1134,8 @@ class DatabaseWatcher:
             is_readonly=True
         )
 
-        existing_links_match_queue = set(existing_links_match_queue)
-        existing_links_matches = set(existing_links_matches)
+        existing_links_match_queue = {row[0] for row in existing_links_match_queue}
+        existing_links_matches = {row[0] for row in existing_links_matches}
 
         duplicate_links = existing_links_match_queue.union(existing_links_matches)
 
@@ -1161,7 +1153,8 @@ class DatabaseWatcher:
             query=query,
             params=params,
             is_readonly=False,
-            is_execute_many=True
+            is_execute_many=True,
+            allow_commit=allow_commit
         )
 
         return res
@@ -1257,9 +1250,261 @@ class QueueWatcher:
         return self._current_agent_queue.popleft()
 
 
+def get_process_tree_memory_mb(root_pid):
+    # Resident memory of a process and all of its descendants, read from /proc. Only the tree itself is walked,
+    # through the children lists of its processes. None where /proc is not available
+    if not os.path.isdir(f'/proc/{root_pid}/task'):
+        return None
+
+    rss_kb = 0
+    pids_to_visit = [root_pid]
+
+    while pids_to_visit:
+        pid = pids_to_visit.pop()
+
+        try:
+            with open(f'/proc/{pid}/status', 'r') as file:
+                for line in file:
+                    if line.startswith('VmRSS:'):
+                        rss_kb += int(line.split()[1])
+                        break
+
+            for thread_id in os.listdir(f'/proc/{pid}/task'):
+                with open(f'/proc/{pid}/task/{thread_id}/children', 'r') as file:
+                    pids_to_visit.extend(int(child_pid) for child_pid in file.read().split())
+        except OSError:
+            continue
+
+    return rss_kb / 1024
+
+
+class PooledDriver:
+    def __init__(self, driver):
+        self.driver = driver
+        self.page_loads = 0
+        self.last_memory_check_time = time.monotonic()
+
+
+class SeleniumDriverPool:
+    def __init__(self, driver_factory, pool_size, max_page_loads, max_memory_mb, memory_check_interval_seconds):
+        # Browsers are started lazily, kept warm between the requests and replaced once they have served
+        # max_page_loads pages or grown past max_memory_mb. The memory is sampled at most once per
+        # memory_check_interval_seconds for each browser
+        self._driver_factory = driver_factory
+        self._pool_size = pool_size
+        self._max_page_loads = max_page_loads
+        self._max_memory_mb = max_memory_mb
+        self._memory_check_interval_seconds = memory_check_interval_seconds
+
+        self._idle_drivers = deque()
+        self._drivers_number = 0
+
+        self._condition = threading.Condition()
+
+    def checkout(self):
+        with self._condition:
+            while not self._idle_drivers and self._drivers_number >= self._pool_size:
+                self._condition.wait()
+
+            if self._idle_drivers:
+                return self._idle_drivers.pop()
+
+            self._drivers_number += 1
+
+        try:
+            print_notification('Starting a new Selenium driver')
+            return PooledDriver(self._driver_factory())
+        except BaseException:
+            with self._condition:
+                self._drivers_number -= 1
+                self._condition.notify()
+            raise
+
+    def __is_recycling_required(self, pooled_driver):
+        if pooled_driver.page_loads >= self._max_page_loads:
+            return True
+
+        now = time.monotonic()
+
+        if now - pooled_driver.last_memory_check_time < self._memory_check_interval_seconds:
+            return False
+
+        pooled_driver.last_memory_check_time = now
+
+        service_process = getattr(pooled_driver.driver.service, 'process', None)
+
+        if service_process is None:
+            return False
+
+        memory_mb = get_process_tree_memory_mb(service_process.pid)
+
+        return memory_mb is not None and memory_mb > self._max_memory_mb
+
+    @staticmethod
+    def __quit_driver(pooled_driver):
+        try:
+            pooled_driver.driver.quit()
+        except WebDriverException as e:
+            print_warning(f'Failed quitting the Selenium driver: {e}')
+
+    def checkin(self, pooled_driver, is_broken=False):
+        pooled_driver.page_loads += 1
+
+        if is_broken or self.__is_recycling_required(pooled_driver):
+            print_notification(f'Recycling the Selenium driver after {pooled_driver.page_loads} page loads')
+            self.__quit_driver(pooled_driver)
+
+            with self._condition:
+                self._drivers_number -= 1
+                self._condition.notify()
+
+            return
+
+        with self._condition:
+            self._idle_drivers.append(pooled_driver)
+            self._condition.notify()
+
+    def dispose(self):
+        with self._condition:
+            idle_drivers = list(self._idle_drivers)
+
+            self._idle_drivers.clear()
+            self._drivers_number -= len(idle_drivers)
+
+        for pooled_driver in idle_drivers:
+            self.__quit_driver(pooled_driver)
+
+
+class PolitenessLimiter:
+    def __init__(self, min_interval_seconds, max_concurrent_requests):
+        # Spaces out the request starts of all the workers, so that going parallel does not hammer the site
+        self._min_interval_seconds = min_interval_seconds
+        self._next_request_time = 0.
+
+        self._lock = threading.Lock()
+        self._concurrency_semaphore = threading.BoundedSemaphore(max_concurrent_requests)
+
+    def __enter__(self):
+        self._concurrency_semaphore.acquire()
+
+        with self._lock:
+            now = time.monotonic()
+            request_time = max(now, self._next_request_time)
+            self._next_request_time = request_time + self._min_interval_seconds
+
+        time.sleep(request_time - now)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._concurrency_semaphore.release()
+
+
+class FetchMethod(Enum):
+    HTTP = 'http'
+    SELENIUM = 'selenium'
+
+
+class FetchStrategyTable:
+    # Page kinds by url path, with the markup a completely rendered page of that kind contains
+    page_kinds = [
+        ('player_main', re.compile(r'/players/\d+/?'), ['header-content-title']),
+        ('player_matches', re.compile(r'/players/\d+/matches/?'), ['content-inner', '<tbody']),
+        ('player_scenarios', re.compile(r'/players/\d+/scenarios/?'), ['content-inner', '<tbody']),
+        ('player_heroes', re.compile(r'/players/\d+/heroes/?'), ['sortable', '<tbody']),
+        ('player_activity', re.compile(r'/players/\d+/activity/?'), ['player-activity-wrapper']),
+        ('match', re.compile(r'/matches/\d+/?'), ['match-victory-subtitle', 'link-type-player'])
+    ]
+
+    other_page_kind = 'other'
+
+    def __init__(self, methods, http_failures_before_fallback, reprobe_interval):
+        # Every page kind is tried over plain http first and falls back to the browser only once plain http keeps
+        # returning incomplete pages. The browser-only kinds are probed over plain http again every reprobe_interval
+        # fetches, in case the site stops requiring js for them
+        self._methods = {page_kind: FetchMethod(method) for page_kind, method in methods.items()}
+        self._http_failures_before_fallback = http_failures_before_fallback
+        self._reprobe_interval = reprobe_interval
+
+        self._http_failures = {}
+        self._fetches_since_probe = {}
+
+        self._lock = threading.Lock()
+
+    def get_page_kind(self, link):
+        path = urlsplit(link).path
+
+        for page_kind, path_pattern, _ in self.page_kinds:
+            if path_pattern.fullmatch(path):
+                return page_kind
+
+        return self.other_page_kind
+
+    def is_selenium_required(self, link):
+        page_kind = self.get_page_kind(link)
+
+        with self._lock:
+            if self._methods.get(page_kind, FetchMethod.HTTP) == FetchMethod.HTTP:
+                return False
+
+            fetches_since_probe = self._fetches_since_probe.get(page_kind, 0) + 1
+
+            if fetches_since_probe >= self._reprobe_interval:
+                self._fetches_since_probe[page_kind] = 0
+                return False
+
+            self._fetches_since_probe[page_kind] = fetches_since_probe
+
+            return True
+
+    def report_http_page(self, link, page):
+        page_kind = self.get_page_kind(link)
+        required_markers = next((markers for kind, _, markers in self.page_kinds if kind == page_kind), [])
+
+        is_rendered = all(marker in page for marker in required_markers)
+
+        with self._lock:
+            if is_rendered:
+                if self._methods.get(page_kind) == FetchMethod.SELENIUM:
+                    print_notification(f'Pages of kind {page_kind} are fetched over plain http again')
+
+                self._methods[page_kind] = FetchMethod.HTTP
+                self._http_failures[page_kind] = 0
+            else:
+                http_failures = self._http_failures.get(page_kind, 0) + 1
+                self._http_failures[page_kind] = http_failures
+
+                if http_failures >= self._http_failures_before_fallback and \
+                        self._methods.get(page_kind) != FetchMethod.SELENIUM:
+                    print_notification(f'Pages of kind {page_kind} are incomplete over plain http. '
+                                       f'Falling back to Selenium')
+
+                    self._methods[page_kind] = FetchMethod.SELENIUM
+                    self._fetches_since_probe[page_kind] = 0
+
+        return is_rendered
+
+    def set_method(self, link, method):
+        with self._lock:
+            self._methods[self.get_page_kind(link)] = method
+
+    def get_methods(self):
+        with self._lock:
+            return {page_kind: method.value for page_kind, method in self._methods.items()}
+
+
+class RequestRetriesExhaustedError(Exception):
+    def __init__(self, link):
+        super().__init__(f'Final request retry to {link} was unsuccessful')
+
+
 class RequestManager:
     def __init__(self):
-        self._selenium_driver = self.__get_selenium_driver()
+        self._selenium_driver_pool = SeleniumDriverPool(
+            self.__get_selenium_driver,
+            int(config_global['selenium_pool_size']),
+            int(config_global['selenium_driver_max_page_loads']),
+            int(config_global['selenium_driver_max_memory_mb']),
+            int(config_global['selenium_driver_memory_check_interval_seconds']))
+        self._sleep_time_lock = threading.Lock()
         # self._user_agent = self.__get_random_user_agent()
         self._user_agent = 'NyrinelAvalire'
 
@@ -1268,7 +1513,19 @@ class RequestManager:
         self._max_retries = int(config_global['request_max_retries'])
         self._sleep_time_threshold = int(config_global['request_sleep_time_seconds_threshold'])
         self._sleep_time_final_retry_minutes = int(config_global['sleep_time_final_retry_minutes'])
-        self._use_selenium = config_global['use_selenium']
+        self._fetch_strategies = FetchStrategyTable(config_global['fetch_strategies'],
+                                                    int(config_global['fetch_strategy_http_failures_before_fallback']),
+                                                    int(config_global['fetch_strategy_reprobe_interval']))
+
+        self._http_session = get_shared_http_session(int(config_global['http_pool_size']))
+
+        # Paced like the sequential scraper unless a shorter interval is configured explicitly
+        politeness_interval = config_global['politeness_interval_seconds']
+
+        if politeness_interval is None:
+            politeness_interval = config_global['request_sleep_time_seconds']
+
+        self._politeness_limiter = PolitenessLimiter(float(politeness_interval), int(config_global['player_workers']))
 
     @staticmethod
     def __create_chrome_driver(headless=True):
@@ -1293,6 +1550,12 @@ class RequestManager:
         else:
             return self.__create_chrome_driver()
 
+    def checkout_selenium_driver(self):
+        return self._selenium_driver_pool.checkout()
+
+    def return_selenium_driver(self, pooled_driver, is_broken=False):
+        self._selenium_driver_pool.checkin(pooled_driver, is_broken)
+
     @staticmethod
     def __put_request_asleep(seconds):
         print(f'Sleeping between requests for {seconds} seconds')
@@ -1302,29 +1565,41 @@ class RequestManager:
         retry_count = 0
 
         while retry_count < self._max_retries:
-            if retry_count >= self._max_retries - 2:
-                self._use_selenium = not self._use_selenium  # try different method once JIC
+            use_selenium = self._fetch_strategies.is_selenium_required(link)
+            is_method_switched = retry_count == self._max_retries - 2
 
-            result = self.__make_request_to_page(link)
+            if is_method_switched:
+                use_selenium = not use_selenium  # try different method once JIC
 
-            print(f'Selenium res: {result}')
-            self.__put_request_asleep(self._sleep_time)
+            result = self.__make_request_to_page(link, use_selenium)
+
+            if result and not use_selenium and not self._fetch_strategies.report_http_page(link, result):
+                # The page needs js to render, which is no reason to back off
+                use_selenium = True
+                result = self.__make_request_to_page(link, use_selenium)
 
             if result:
+                if is_method_switched and use_selenium:
+                    # The browser stays in use for these pages once it proved to work
+                    self._fetch_strategies.set_method(link, FetchMethod.SELENIUM)
+
                 return result
             else:
-                if self._sleep_time > self._sleep_time_threshold:
-                    print_warning('Threshold sleep time reached. Skipping the retries.')
-                    self._sleep_time = self._sleep_time_threshold
-                    break
+                self.__put_request_asleep(self._sleep_time)
+
+                with self._sleep_time_lock:
+                    if self._sleep_time > self._sleep_time_threshold:
+                        print_warning('Threshold sleep time reached. Skipping the retries.')
+                        self._sleep_time = self._sleep_time_threshold
+                        break
+
+                    if retry_count % 3 == 0:
+                        self._sleep_time = int(self._sleep_time * self._sleep_time_q)
 
                 if retry_count == 0:
                     self.__put_request_asleep(
                         self._sleep_time_threshold * 2)  # additional sleep to avoid request avalanche effect
 
-                if retry_count % 3 == 0:
-                    self._sleep_time = int(self._sleep_time * self._sleep_time_q)
-
                 retry_count += 1
                 print_warning(f'Got error during the web-request. Retries: {retry_count}/{self._max_retries}')
 
@@ -1332,34 +1607,43 @@ class RequestManager:
 
         self.__put_request_asleep(60 * self._sleep_time_final_retry_minutes)
 
-        result = self.__make_request_to_page(link)
+        result = self.__make_request_to_page(link, self._fetch_strategies.is_selenium_required(link))
 
         if result:
             return result
-        else:
-            print_error('\nFinal request retry was unsuccessful. Manual calibration required')
-            global_await_exit_action()
 
-    def __make_request_to_page(self, link):
-        if self._use_selenium:
-            return self.__make_get_request_selenium(link)
-        else:
-            return self.__make_get_request(link)
+        # Raised instead of exiting, as the request may be made on one of the players' worker threads
+        raise RequestRetriesExhaustedError(link)
+
+    def __make_request_to_page(self, link, use_selenium):
+        with self._politeness_limiter:
+            if use_selenium:
+                return self.__make_get_request_selenium(link)
+            else:
+                return self.__make_get_request(link)
 
     # TODO implement additional human-like simulation
     def __make_get_request_selenium(self, link):
+        pooled_driver = self.checkout_selenium_driver()
+        is_broken = False
+
         try:
             print(f'Making Selenium request to link: {link}')
-            self._selenium_driver.get(link)
 
-            return self._selenium_driver.page_source
+            pooled_driver.driver.get(link)
+
+            return pooled_driver.driver.page_source
         except WebDriverException as e:
             if '429' in str(e):
                 print_warning('Encountered the 429 StatusCode')
             else:
+                # The browser may have crashed or hung, so it is not handed out again
                 print_warning(f'Selenium request failed with: {e}')
+                is_broken = True
 
             return False
+        finally:
+            self.return_selenium_driver(pooled_driver, is_broken)
 
     @staticmethod
     def __get_random_user_agent():
@@ -1375,7 +1659,7 @@ class RequestManager:
         print_notification(f'Using following user-agent: {self._user_agent}')
 
         print(f'Making get request to link: {link}')
-        response = requests.get(link, headers=headers)
+        response = self._http_session.get(link, headers=headers)
 
         if response.status_code == 429:
             print_warning(f'Encountered the 429 StatusCode.')
@@ -1386,7 +1670,7 @@ class RequestManager:
                 print_warning(f'Waiting for {requested_sleep_time} seconds to remove the 429 lock')
 
                 time.sleep(requested_sleep_time)
-                response = requests.get(link, headers=headers)
+                response = self._http_session.get(link, headers=headers)
         if response.status_code == 200:
             return response.text
 
@@ -1398,10 +1682,12 @@ class RequestManager:
         config_global['request_max_retries'] = self._max_retries
         config_global['request_sleep_time_seconds_threshold'] = self._sleep_time_threshold
         config_global['sleep_time_final_retry_minutes'] = self._sleep_time_final_retry_minutes
-        config_global['use_selenium'] = self._use_selenium
+        config_global['fetch_strategies'] = self._fetch_strategies.get_methods()
 
         update_config(config_global)
 
+        self._selenium_driver_pool.dispose()
+
 
 class PlayerStatus(Enum):
     VISIBLE = 'Visible'
@@ -1414,21 +1700,8 @@ class PlayerSide(Enum):
     RADIANT = 'Radiant'
 
 
-def parse_player_id(player_link_obj):
-    return player_link_obj.get('href').split('/players/')[1]
-
-
-def nullify_dash_if_found(text):
-    return None if text == '-' else text
-
-
-def parse_table_column_td_text(column_td_to_parse):
-    if column_td_to_parse.find('span'):
-        res = column_td_to_parse.find('span').text
-    else:
-        res = column_td_to_parse.text
-
-    return nullify_dash_if_found(res)
+def parse_player_id(player_href):
+    return player_href.split('/players/')[1]
 
 
 def convert_str_to_datetime(datetime_string):
@@ -1467,12 +1740,6 @@ def update_config(new_values_dict):
         json.dump(cfg, file, indent=4)
 
 
-def get_player_heroes_meta_page_soup():
-    with open('heroes_meta_page_soup_file.html', 'r', encoding='utf-8') as file:
-        soup_str = file.read()
-
-    return BeautifulSoup(soup_str, 'html.parser')
-
 # TODO config for exiting the script
 # Config section
 
@@ -1486,7 +1753,7 @@ with open('ranks_to_mmr.json', 'r') as rtmmr:
 
 re_pattern_players = r'/players/\d+'
 
-heroes_meta_page_soup_global = get_player_heroes_meta_page_soup()
+heroes_meta_table_global = HeroesMetaTable('heroes_meta_page_soup_file.html', 'heroes_meta_cache.db')
 
 database_path_global = '../../DotaAIDB/dota_ai.db'
 
@@ -0,0 +1,233 @@
+from lxml import etree
+from lxml import html as lxml_html
+
+
+# Field extraction for the Dotabuff pages read by the scraper. Pages are parsed with lxml and walked with
+# precompiled XPath expressions that mirror the BeautifulSoup lookups they replace: the first match in document
+# order, classes matched as whole tokens. Missing markup surfaces as AttributeError/IndexError, as it did with bs4
+
+
+def has_class(class_name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+
+
+def compile_xpath(path):
+    return etree.XPath(path, smart_strings=False)
+
+
+def parse_page(page_html):
+    return lxml_html.document_fromstring(page_html)
+
+
+def find_first(xpath, element, **variables):
+    results = xpath(element, **variables)
+
+    return results[0] if results else None
+
+
+def get_text(element):
+    return element.text_content()
+
+
+def get_column_text(column_element):
+    # A value wrapped in a span wins over the rest of the column, '-' stands for a missing value
+    span_element = find_first(_first_span, column_element)
+    text = get_text(span_element if span_element is not None else column_element)
+
+    return None if text == '-' else text
+
+
+_first_span = compile_xpath('(.//span)[1]')
+_first_dd = compile_xpath('(.//dd)[1]')
+_first_time_datetime = compile_xpath('(.//time)[1]/@datetime')
+_all_td = compile_xpath('.//td')
+_all_tbody = compile_xpath('.//tbody')
+_all_tr = compile_xpath('.//tr')
+
+# Match page
+_header_content_secondary = compile_xpath(f"(//div[{has_class('header-content-secondary')}])[1]")
+_last_dl = compile_xpath('(.//dl)[last()]')
+_match_result = compile_xpath(f"(//div[{has_class('match-result')}])[1]")
+_match_victory_subtitle = compile_xpath(f"(//div[{has_class('match-victory-subtitle')}])[1]")
+_radiant_score = compile_xpath(f"(.//span[{has_class('the-radiant')} and {has_class('score')}])[1]")
+_dire_score = compile_xpath(f"(.//span[{has_class('the-dire')} and {has_class('score')}])[1]")
+_duration = compile_xpath(f"(.//span[{has_class('duration')}])[1]")
+_player_link_hrefs = compile_xpath(f"//a[{has_class('link-type-player')}]/@href")
+
+# A player's row of the match page, the player id is matched against the whole class attribute
+_match_player_row = compile_xpath(
+    "(//tr[(contains(@class, 'faction-radiant') or contains(@class, 'faction-dire')) "
+    "and contains(@class, $player_id)])[1]")
+_hero_link_tag = compile_xpath("(.//a[starts-with(@href, '/heroes/')])[1]")
+_first_img_title = compile_xpath('(.//img)[1]/@title')
+_first_i_title = compile_xpath('(.//i)[1]/@title')
+_first_div = compile_xpath('(.//div)[1]')
+_first_acronym = compile_xpath('(.//acronym)[1]')
+_lane_text_acronym = compile_xpath(f"((.//span[{has_class('player-lane-text')}])[1]//acronym)[1]")
+_lane_outcome = compile_xpath(f"(.//acronym[{has_class('lane-outcome')}])[1]")
+_observer_wards = compile_xpath(f"(.//span[{has_class('color-item-observer-ward')}])[1]")
+_sentry_wards = compile_xpath(f"(.//span[{has_class('color-item-sentry-ward')}])[1]")
+
+# Player main page
+_page_show = compile_xpath(f"(//div[{has_class('page-show')}])[1]")
+_player_nickname = compile_xpath(
+    f"(((//div[{has_class('header-content-primary')}])[1]//div[{has_class('header-content-title')}])[1]//h1)[1]")
+_player_rank_title = compile_xpath(f"(.//div[{has_class('rank-tier-wrapper')}])[1]/@title")
+_all_dl = compile_xpath('.//dl')
+_wins = compile_xpath(f"(.//span[{has_class('wins')}])[1]")
+_losses = compile_xpath(f"(.//span[{has_class('losses')}])[1]")
+_abandons = compile_xpath(f"(.//span[{has_class('abandons')}])[1]")
+
+# Player matches and scenarios pages
+_content_inner_table = compile_xpath(f"((//div[{has_class('content-inner')}])[1]//table)[1]")
+_first_tbody = compile_xpath('(.//tbody)[1]')
+_unclassed_tr = compile_xpath('.//tr[not(@class)]')
+_match_href = compile_xpath("(.//a[starts-with(@href, '/matches/')])[1]/@href")
+_subtext = compile_xpath(f"(.//div[{has_class('subtext')}])[1]")
+
+# Player heroes page
+_sortable_table = compile_xpath(f"(//table[{has_class('sortable')}])[1]")
+_hero_name_row = compile_xpath('(.//a[string() = $hero_name])[1]/ancestor::tr[1]')
+
+# Player activity page
+_year_chart_tooltips = compile_xpath(
+    f"((//div[{has_class('player-activity-wrapper')}])[1]//div[{has_class('year-chart')}])[last()]"
+    f"//div[{has_class('year-chart-tooltip')}]")
+_first_h3 = compile_xpath('(.//h3)[1]')
+_all_span = compile_xpath('.//span')
+
+# Heroes meta page
+_meta_hero_tags = compile_xpath(
+    f"((//div[{has_class('content-inner')}])[1]//tbody)[1]//a[{has_class('link-type-hero')}]")
+_parent_tr = compile_xpath('ancestor::tr[1]')
+
+
+def extract_match_fields(match_page):
+    datetime_block = find_first(_last_dl, find_first(_header_content_secondary, match_page))
+    match_results_block = find_first(_match_victory_subtitle, match_page)
+
+    return {
+        'datetime': find_first(_first_time_datetime, datetime_block),
+        'result': get_text(find_first(_match_result, match_page)),
+        'radiant_score': get_text(find_first(_radiant_score, match_results_block)),
+        'dire_score': get_text(find_first(_dire_score, match_results_block)),
+        'duration': get_text(find_first(_duration, match_results_block)),
+        'player_hrefs': _player_link_hrefs(match_page)
+    }
+
+
+def extract_match_player_row(match_page, player_id):
+    player_row = find_first(_match_player_row, match_page, player_id=player_id)
+    row_classes = player_row.get('class', '').split()
+
+    hero_tag = find_first(_hero_link_tag, player_row)
+    columns = _all_td(player_row)
+    lane_result_element = find_first(_first_div, columns[3])
+
+    return {
+        'is_radiant': 'faction-radiant' in row_classes,
+        'is_dire': 'faction-dire' in row_classes,
+        'hero_link': hero_tag.get('href'),
+        'hero_name': find_first(_first_img_title, hero_tag),
+        'hero_lvl': get_text(find_first(_first_span, hero_tag)),
+        'role': find_first(_first_i_title, columns[1]),
+        'lane': find_first(_first_i_title, columns[2]),
+        'lane_option2': get_text(find_first(_lane_text_acronym, lane_result_element)),
+        'lane_result': get_text(find_first(_lane_outcome, lane_result_element)),
+        'kills': get_column_text(columns[5]),
+        'deaths': get_column_text(columns[6]),
+        'assists': get_column_text(columns[7]),
+        'net': get_column_text(find_first(_first_acronym, columns[8])),
+        'lasthits': get_column_text(columns[9]),
+        'denies': get_column_text(columns[11]),
+        'gpm': get_column_text(columns[12]),
+        'xpm': get_column_text(columns[14]),
+        'damage_dealt': get_column_text(columns[15]),
+        'heal': get_column_text(columns[16]),
+        'building_dmg_dealt': get_column_text(columns[17]),
+        'observers': get_column_text(find_first(_observer_wards, columns[18])),
+        'sentries': get_column_text(find_first(_sentry_wards, columns[18]))
+    }
+
+
+def extract_player_main_page_fields(player_main_page):
+    player_stats_row = find_first(_header_content_secondary, player_main_page)
+    player_stats_row_important = _all_dl(player_stats_row)
+    match_record_element = find_first(_first_dd, player_stats_row_important[1])
+
+    return {
+        'is_hidden': find_first(_page_show, player_main_page) is not None,
+        'nickname': get_text(find_first(_player_nickname, player_main_page)),
+        'rank_title': find_first(_player_rank_title, player_stats_row),
+        'winrate': get_text(find_first(_first_dd, player_stats_row_important[2])),
+        'wins': get_text(find_first(_wins, match_record_element)),
+        'losses': get_text(find_first(_losses, match_record_element)),
+        'abandons': get_text(find_first(_abandons, match_record_element))
+    }
+
+
+def extract_player_match_rows(player_matches_page):
+    matches_list_table = find_first(_first_tbody, find_first(_content_inner_table, player_matches_page))
+    match_rows = []
+
+    for row in _unclassed_tr(matches_list_table):
+        columns = _all_td(row)
+        predicted_rank_element = find_first(_subtext, columns[1]) if len(columns) > 1 else None
+
+        match_rows.append({
+            'match_href': find_first(_match_href, row),
+            'datetime': find_first(_first_time_datetime, row),
+            'summary_datetime': find_first(_first_time_datetime, columns[3]) if len(columns) > 3 else None,
+            'predicted_rank': get_text(predicted_rank_element) if predicted_rank_element is not None else None
+        })
+
+    return match_rows
+
+
+def extract_player_scenarios_fields(player_stats_page):
+    all_table_parts = _all_tbody(find_first(_content_inner_table, player_stats_page))
+    radiant_dire_rows = _all_tr(all_table_parts[3])
+
+    return {
+        'all_matches': [get_text(column) for column in _all_td(_all_tr(all_table_parts[0])[0])],
+        'radiant': [get_text(column) for column in _all_td(radiant_dire_rows[0])],
+        'dire': [get_text(column) for column in _all_td(radiant_dire_rows[1])]
+    }
+
+
+def extract_player_hero_columns(player_heroes_page, hero_name):
+    all_heroes_table = find_first(_first_tbody, find_first(_sortable_table, player_heroes_page))
+    hero_stats_table_row = find_first(_hero_name_row, all_heroes_table, hero_name=hero_name)
+
+    return [get_text(column) for column in _all_td(hero_stats_table_row)]
+
+
+def extract_player_activity_days(player_activity_page):
+    # (date, matches won, matches lost) texts of every day of the latest year chart
+    activity_days = []
+
+    for day_element in _year_chart_tooltips(player_activity_page):
+        activity_matches_results_list = _all_span(day_element)
+
+        activity_days.append((get_text(find_first(_first_h3, day_element)),
+                              get_text(activity_matches_results_list[0]),
+                              get_text(activity_matches_results_list[-1])))
+
+    return activity_days
+
+
+def extract_heroes_meta_rows(heroes_meta_page):
+    # Hero link -> (class attribute, data-value, text) of every column of the hero's row
+    hero_rows = {}
+
+    for hero_tag in _meta_hero_tags(heroes_meta_page):
+        hero_link = hero_tag.get('href')
+        hero_row = find_first(_parent_tr, hero_tag)
+
+        if hero_link in hero_rows or hero_row is None:
+            continue
+
+        hero_rows[hero_link] = [(column.get('class', ''), column.get('data-value'), get_text(column))
+                                for column in _all_td(hero_row)]
+
+    return hero_rows
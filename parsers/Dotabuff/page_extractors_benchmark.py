@@ -0,0 +1,244 @@
+import argparse
+import glob
+import os
+import re
+import statistics
+import time
+
+from bs4 import BeautifulSoup
+
+from page_extractors import (parse_page, extract_match_fields, extract_match_player_row,
+                             extract_player_main_page_fields, extract_player_match_rows,
+                             extract_player_scenarios_fields, extract_player_hero_columns,
+                             extract_player_activity_days)
+
+
+# Compares the lxml extractors with the html.parser lookups they replaced on saved Dotabuff pages, e.g.
+#   python page_extractors_benchmark.py --pages_dir saved_pages
+# Page files are named after the page kind: match_*.html, player_main_*.html, player_matches_*.html,
+# player_scenarios_*.html, player_heroes_*.html and player_activity_*.html
+
+
+def get_column_text_bs4(column_element):
+    text = column_element.find('span').text if column_element.find('span') else column_element.text
+
+    return None if text == '-' else text
+
+
+def extract_match_bs4(page_html):
+    page = BeautifulSoup(page_html, 'html.parser')
+
+    datetime_block = page.find('div', class_='header-content-secondary')
+    match_results_block = page.find('div', class_='match-victory-subtitle')
+    player_hrefs = [a['href'] for a in page.find_all('a', class_=re.compile(r'\blink-type-player\b'))]
+
+    match_fields = {
+        'datetime': datetime_block.find_all('dl')[-1].find('time').get('datetime'),
+        'result': page.find('div', class_='match-result').text,
+        'radiant_score': match_results_block.find('span', class_='the-radiant score').text,
+        'dire_score': match_results_block.find('span', class_='the-dire score').text,
+        'duration': match_results_block.find('span', class_='duration').text,
+        'player_hrefs': player_hrefs
+    }
+
+    player_rows = []
+
+    for player_href in player_hrefs:
+        player_id = f"player-{player_href.split('/players/')[1]}"
+
+        player_row = page.find('tr', class_=lambda c: c and (
+                'faction-radiant' in c or 'faction-dire' in c) and player_id in c)
+        hero_tag = player_row.find('a', href=lambda href: href and href.startswith('/heroes/'))
+        columns = player_row.find_all('td')
+        lane_result_element = columns[3].find('div')
+
+        player_rows.append({
+            'is_radiant': 'faction-radiant' in player_row.get('class'),
+            'is_dire': 'faction-dire' in player_row.get('class'),
+            'hero_link': hero_tag.get('href'),
+            'hero_name': hero_tag.find('img').get('title'),
+            'hero_lvl': hero_tag.find('span').text,
+            'role': columns[1].find('i').get('title'),
+            'lane': columns[2].find('i').get('title'),
+            'lane_option2': lane_result_element.find('span', class_='player-lane-text').find('acronym').text,
+            'lane_result': lane_result_element.find('acronym', class_='lane-outcome').text,
+            'kills': get_column_text_bs4(columns[5]),
+            'deaths': get_column_text_bs4(columns[6]),
+            'assists': get_column_text_bs4(columns[7]),
+            'net': get_column_text_bs4(columns[8].find('acronym')),
+            'lasthits': get_column_text_bs4(columns[9]),
+            'denies': get_column_text_bs4(columns[11]),
+            'gpm': get_column_text_bs4(columns[12]),
+            'xpm': get_column_text_bs4(columns[14]),
+            'damage_dealt': get_column_text_bs4(columns[15]),
+            'heal': get_column_text_bs4(columns[16]),
+            'building_dmg_dealt': get_column_text_bs4(columns[17]),
+            'observers': get_column_text_bs4(columns[18].find('span', class_='color-item-observer-ward')),
+            'sentries': get_column_text_bs4(columns[18].find('span', class_='color-item-sentry-ward'))
+        })
+
+    return match_fields, player_rows
+
+
+def extract_match_lxml(page_html):
+    page = parse_page(page_html)
+    match_fields = extract_match_fields(page)
+
+    player_rows = [extract_match_player_row(page, f"player-{player_href.split('/players/')[1]}")
+                   for player_href in match_fields['player_hrefs']]
+
+    return match_fields, player_rows
+
+
+def extract_player_main_bs4(page_html):
+    page = BeautifulSoup(page_html, 'html.parser')
+
+    player_stats_row = page.find('div', class_='header-content-secondary')
+    player_stats_row_important = player_stats_row.find_all('dl')
+    match_record_element = player_stats_row_important[1].find('dd')
+
+    return {
+        'is_hidden': page.find('div', class_='page-show') is not None,
+        'nickname': page.find('div', class_='header-content-primary').find('div', class_='header-content-title')
+                        .find('h1').text,
+        'rank_title': player_stats_row.find('div', class_='rank-tier-wrapper').get('title'),
+        'winrate': player_stats_row_important[2].find('dd').text,
+        'wins': match_record_element.find('span', class_='wins').text,
+        'losses': match_record_element.find('span', class_='losses').text,
+        'abandons': match_record_element.find('span', class_='abandons').text
+    }
+
+
+def extract_player_matches_bs4(page_html):
+    page = BeautifulSoup(page_html, 'html.parser')
+
+    matches_list_table = page.find('div', class_='content-inner').find('table').find('tbody')
+    match_rows = []
+
+    for row in matches_list_table.find_all('tr', class_=False):
+        columns = row.find_all('td')
+        match_link = row.find('a', href=lambda href: href and href.startswith('/matches/'))
+        row_time = row.find('time')
+        summary_time = columns[3].find('time') if len(columns) > 3 else None
+        predicted_rank_element = columns[1].find('div', class_='subtext') if len(columns) > 1 else None
+
+        match_rows.append({
+            'match_href': match_link.get('href') if match_link else None,
+            'datetime': row_time.get('datetime') if row_time else None,
+            'summary_datetime': summary_time.get('datetime') if summary_time else None,
+            'predicted_rank': predicted_rank_element.text if predicted_rank_element else None
+        })
+
+    return match_rows
+
+
+def extract_player_scenarios_bs4(page_html):
+    page = BeautifulSoup(page_html, 'html.parser')
+
+    all_table_parts = page.find('div', class_='content-inner').find('table').find_all('tbody')
+    radiant_dire_rows = all_table_parts[3].find_all('tr')
+
+    return {
+        'all_matches': [column.text for column in all_table_parts[0].find_all('tr')[0].find_all('td')],
+        'radiant': [column.text for column in radiant_dire_rows[0].find_all('td')],
+        'dire': [column.text for column in radiant_dire_rows[1].find_all('td')]
+    }
+
+
+def get_first_hero_name(page_html):
+    return parse_page(page_html).xpath("string((//table[contains(@class, 'sortable')]//tbody//a)[1])")
+
+
+def extract_player_heroes_bs4(page_html, hero_name):
+    page = BeautifulSoup(page_html, 'html.parser')
+
+    all_heroes_table = page.find('table', class_='sortable').find('tbody')
+    hero_stats_table_row = all_heroes_table.find('a', string=hero_name).find_parent('tr')
+
+    return [column.text for column in hero_stats_table_row.find_all('td')]
+
+
+def extract_player_activity_bs4(page_html):
+    page = BeautifulSoup(page_html, 'html.parser')
+
+    year_activity_table = page.find('div', class_='player-activity-wrapper').find_all('div', class_='year-chart')[-1]
+    activity_days = []
+
+    for day_element in year_activity_table.find_all('div', class_='year-chart-tooltip'):
+        day_results = day_element.find_all('span')
+        activity_days.append((day_element.find('h3').text, day_results[0].text, day_results[-1].text))
+
+    return activity_days
+
+
+page_kind_extractors = {
+    'match': (extract_match_bs4, extract_match_lxml),
+    'player_main': (extract_player_main_bs4, lambda page_html: extract_player_main_page_fields(parse_page(page_html))),
+    'player_matches': (extract_player_matches_bs4, lambda page_html: extract_player_match_rows(parse_page(page_html))),
+    'player_scenarios': (extract_player_scenarios_bs4,
+                         lambda page_html: extract_player_scenarios_fields(parse_page(page_html))),
+    'player_heroes': (extract_player_heroes_bs4,
+                      lambda page_html, hero_name: extract_player_hero_columns(parse_page(page_html), hero_name)),
+    'player_activity': (extract_player_activity_bs4,
+                        lambda page_html: extract_player_activity_days(parse_page(page_html)))
+}
+
+
+def get_page_kind(page_path):
+    file_name = os.path.basename(page_path)
+
+    return next((page_kind for page_kind in page_kind_extractors if file_name.startswith(page_kind + '_')), None)
+
+
+def measure_milliseconds(extractor, arguments, repeats):
+    timings = []
+
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        extractor(*arguments)
+        timings.append((time.perf_counter() - start_time) * 1000)
+
+    return statistics.median(timings)
+
+
+def run_benchmark(pages_dir, repeats):
+    totals = {'bs4': 0., 'lxml': 0.}
+
+    print(f"{'page':<40} {'bs4, ms':>10} {'lxml, ms':>10} {'speedup':>8}")
+
+    for page_path in sorted(glob.glob(os.path.join(pages_dir, '*.html'))):
+        page_kind = get_page_kind(page_path)
+
+        if not page_kind:
+            print(f'Skipping {page_path}: unknown page kind')
+            continue
+
+        with open(page_path, 'r', encoding='utf-8') as file:
+            page_html = file.read()
+
+        arguments = (page_html, get_first_hero_name(page_html)) if page_kind == 'player_heroes' else (page_html,)
+        bs4_extractor, lxml_extractor = page_kind_extractors[page_kind]
+
+        if bs4_extractor(*arguments) != lxml_extractor(*arguments):
+            print(f'{page_path}: the extractors disagree')
+
+        bs4_milliseconds = measure_milliseconds(bs4_extractor, arguments, repeats)
+        lxml_milliseconds = measure_milliseconds(lxml_extractor, arguments, repeats)
+
+        totals['bs4'] += bs4_milliseconds
+        totals['lxml'] += lxml_milliseconds
+
+        print(f'{os.path.basename(page_path):<40} {bs4_milliseconds:>10.2f} {lxml_milliseconds:>10.2f} '
+              f'{bs4_milliseconds / lxml_milliseconds:>7.1f}x')
+
+    if totals['lxml']:
+        print(f"{'total':<40} {totals['bs4']:>10.2f} {totals['lxml']:>10.2f} "
+              f"{totals['bs4'] / totals['lxml']:>7.1f}x")
+
+
+arg_parser = argparse.ArgumentParser(description='Benchmarks the lxml page extractors against html.parser')
+arg_parser.add_argument('--pages_dir', type=str, default='saved_pages', help='directory of saved Dotabuff pages')
+arg_parser.add_argument('--repeats', type=int, default=20, help='extractions per page, the median is reported')
+args = arg_parser.parse_args()
+
+run_benchmark(args.pages_dir, args.repeats)
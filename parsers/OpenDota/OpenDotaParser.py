@@ -7,28 +7,49 @@ print_helper_global = PrintHelper(True)
 
 try:
 
-	import requests
 	import time
 	import re
 	from enum import Enum
 	from datetime import datetime
 	from dateutil.relativedelta import relativedelta
 	import json
+	import csv
 	from dataclasses import dataclass
 	from colorama import Fore, Style
 	import sqlite3
 	import socket
+	import asyncio
+	import signal
+	import threading
 	from collections import deque
+	from concurrent.futures import ThreadPoolExecutor
 	import psycopg2
+	from utils.player_cache import PlayerProfileCache
+	from utils.rate_limiter import RateLimiter
+	from utils.proxy_pool import ProxyPool
+	from utils.http_session import get_shared_http_session
+	from utils.response_archive import ResponseArchive
+	from utils.pick_confidence import apply_pick_confidence_scores
+
+
+	class MatchQueueStatus(Enum):
+		PENDING = 'pending'
+		CLAIMED = 'claimed'
+		PROCESSED = 'processed'
 
 
 	class MatchQueue:
-		def __init__(self, q_id, match_id, is_assigned, agent, is_processed):
+		def __init__(self, q_id, match_id, status, agent):
 			self.id = q_id
 			self.match_id = match_id
-			self.is_assigned = is_assigned
+			self.status = MatchQueueStatus(status)
 			self.agent = agent
-			self.is_processed = is_processed
+
+
+	class ParserTerminationError(Exception):
+		# Raised on the crawler's worker threads instead of exiting there, the main thread stops the crawler,
+		# flushes what it has and exits
+		pass
 
 
 	def save_failed_response_to_json(response, filename='failed_request.json'):
@@ -45,21 +66,100 @@ try:
 			print(f'Error saving failed response: {e}')
 
 
+	def build_match_records(data):
+		match_row = (str(data['match_id']), data['match_datetime'], data['radiant_win'], data['match_duration'],
+					 data['match_radiant_score'], data['match_dire_score'])
+
+		match_stats_columns = []
+
+		for player in data['players']:
+			player.pop('player_heroes', None)
+			player['average_match_mmr'] = data['average_match_mmr']
+
+			match_stats_columns.extend([column for column in player if column not in match_stats_columns])
+
+		players_rows = [(player_id,) for player_id in dict.fromkeys(player['player_id'] for player in data['players'])]
+		match_stats_rows = [tuple(player.get(column) for column in match_stats_columns) for player in data['players']]
+
+		return match_row, players_rows, match_stats_columns, match_stats_rows
+
+
+	opendota_api_base_url = 'https://api.opendota.com/api'
+
+
 	class RequestManager:
-		def __init__(self, proxy_server=None):
+		def __init__(self, proxy_server=None, player_cache=None, rate_limiter=None, http_session=None,
+					 response_archive=None, proxy_pool=None):
 			self._request_count = 0
+			self._last_response_time = None
 			self._max_retries = 7
 			self._retry_timout = 15
 			self._pre_request_timeout = 0
+			self._request_timeout = 30
 
 			self._termination_requested = False
 
+			self._request_count_lock = threading.Lock()
+
+			# With a proxy pool, every proxy of the pool brings its own rate limiter
+			self._rate_limiter = rate_limiter if rate_limiter or proxy_pool else RateLimiter()
+			self._http_session = http_session if http_session else get_shared_http_session()
+
 			self._proxies = None
 
 			if proxy_server:
 				self._proxies = proxy_server
 
+			self._player_cache = player_cache
+			self._response_archive = response_archive
+
+			# Routes every request through the best scored proxy of the pool instead of the fixed proxy_server
+			self._proxy_pool = proxy_pool
+
+		def __increment_request_count(self):
+			with self._request_count_lock:
+				self._request_count += 1
+
+				return self._request_count
+
+		def get_request_count(self):
+			with self._request_count_lock:
+				return self._request_count
+
+		def get_last_response_time(self):
+			return self._last_response_time
+
+		def get_proxy_pool_stats(self):
+			return self._proxy_pool.get_stats() if self._proxy_pool else None
+
+		def __report_proxy_outcome(self, proxy_entry, status_code, latency_seconds):
+			if not proxy_entry:
+				return
+
+			# 404s come from the API itself, the proxy did its job
+			if status_code == 429:
+				self._proxy_pool.report_failure(proxy_entry, latency_seconds, is_rate_limited=True)
+			elif status_code >= 500:
+				self._proxy_pool.report_failure(proxy_entry, latency_seconds)
+			else:
+				self._proxy_pool.report_success(proxy_entry, latency_seconds)
+
 		def make_api_call(self, api_link):
+			cache_key = PlayerProfileCache.parse_player_endpoint(api_link) if self._player_cache else None
+
+			if cache_key:
+				cached_response = self._player_cache.get(*cache_key)
+
+				if cached_response is not None:
+					print_helper_global.print_message(MessageType.NOTIFICATION,
+													  f'Response to {api_link} is taken from the cache')
+
+					# Archived as well, otherwise the match could not be reparsed from the archive alone
+					if self._response_archive:
+						self._response_archive.put(api_link, cached_response)
+
+					return cached_response
+
 			retries = 0
 			while retries <= self._max_retries:
 				if self._termination_requested:
@@ -67,27 +167,29 @@ try:
 
 				retries += 1
 
+				proxy_entry = self._proxy_pool.acquire() if self._proxy_pool else None
+				rate_limiter = proxy_entry.rate_limiter if proxy_entry else self._rate_limiter
+				proxies = proxy_entry.proxies if proxy_entry else self._proxies
+				response = None
+
 				try:
 					print(f'Awaiting {self._pre_request_timeout} seconds as a pre-request timeout')
 					time.sleep(self._pre_request_timeout)
-					if self._proxies:
-						response = requests.get(api_link, proxies=self._proxies)
-					else:
-						response = requests.get(api_link)
 
-					self._request_count += 1
+					rate_limit_wait_time = rate_limiter.acquire()
+
+					if rate_limit_wait_time >= 1:
+						print_helper_global.print_message(MessageType.NOTIFICATION,
+														  f'Waited {rate_limit_wait_time:.1f} seconds for the rate limit window')
+
+					request_start_time = time.perf_counter()
+
+					response = self._http_session.get(api_link, proxies=proxies, timeout=self._request_timeout)
 
-					if 'X-Rate-Limit-Remaining-Minute' in response.headers:
-						remaining_req_4_min = int(response.headers['X-Rate-Limit-Remaining-Minute'])
+					self.__report_proxy_outcome(proxy_entry, response.status_code, time.perf_counter() - request_start_time)
+					self.__increment_request_count()
 
-						if remaining_req_4_min <= 3:
-							print_helper_global.print_message(MessageType.NOTIFICATION, 
-													f'Exceeded requests/minute threshold. Going to sleep for 60 seconds')
-							time.sleep(60)
-					elif self._request_count % 55 == 0:
-						print_helper_global.print_message(MessageType.NOTIFICATION, 
-														  f'Requests made: {self._request_count}. Going to sleep for a minute')
-						time.sleep(60)
+					rate_limiter.update_from_headers(response.headers)
 
 					if 'X-Rate-Limit-Remaining-Day' in response.headers:
 						print(f"Requests remaining for today: {response.headers['X-Rate-Limit-Remaining-Day']}/2000")
@@ -95,10 +197,25 @@ try:
 					if response.status_code == 200:
 						print_helper_global.print_message(MessageType.SUCCESS, 
 														  f'Request to {api_link} is complete with status_code: 200')
-						return response.json()
+						response_data = response.json()
+						self._last_response_time = time.time()
+
+						if cache_key:
+							self._player_cache.put(*cache_key, response_data)
+
+						if self._response_archive:
+							self._response_archive.put(api_link, response_data)
+
+						return response_data
 					elif response.status_code == 429:
-						print_helper_global.print_message(MessageType.WARNING, 'Seems like all the requests have been used')
-						self._termination_requested = True
+						rate_limiter.drain()
+
+						if proxy_entry:
+							print_helper_global.print_message(MessageType.WARNING,
+															  f'Proxy {proxy_entry.proxy_server} is rate limited. Cooling it down')
+						else:
+							print_helper_global.print_message(MessageType.WARNING, 'Seems like all the requests have been used')
+							self._termination_requested = True
 					elif response.status_code == 500 or response.status_code == 404 or response.status_code != 200:
 						print_helper_global.print_message(MessageType.WARNING, f'Request to {api_link} failed with status_code: {response.status_code}.')
 						if response.status_code == 500 and retries == self._max_retries - 1:
@@ -123,14 +240,24 @@ try:
 
 								save_failed_response_to_json(response)
 
-								global_await_exit_action()
+								self._termination_requested = True
+								break
 
 				except Exception as e:
 					print_helper_global.print_message(MessageType.WARNING, f'Caught unexpected exception: {e}.')
 
+					if proxy_entry and response is None:
+						self._proxy_pool.report_failure(proxy_entry)
+
+				retry_timeout = self._retry_timout * retries
+
+				# Another proxy takes over right away instead of stalling on the failing one's backoff
+				if proxy_entry and self._proxy_pool.has_available_proxy(proxy_entry):
+					retry_timeout = 0
+
 				print_helper_global.print_message(MessageType.WARNING,
-												  f'Failed to get the response. Retry in: {self._retry_timout * retries} seconds')
-				time.sleep(self._retry_timout * retries)
+												  f'Failed to get the response. Retry in: {retry_timeout} seconds')
+				time.sleep(retry_timeout)
 
 			print_helper_global.print_message(MessageType.WARNING,
 											  f'Failed to get the response after {retries} retries. Skipping iteration')
@@ -138,36 +265,321 @@ try:
 			if self._termination_requested:
 				print_helper_global.print_message(MessageType.WARNING,
 												  'Termination of the script has been requested. Finishing up the execution...')
-				global_await_exit_action()
+				raise ParserTerminationError(f'Termination requested while calling {api_link}')
 
 			return False
 
 
+	# Offline transports stand in for the RequestManager and serve recorded responses, which lets the whole parse
+	# and DB pipeline run at full CPU speed without the network
+
+	class ArchiveTransport:
+		def __init__(self, response_archive):
+			self._response_archive = response_archive
+
+		def get_match_ids(self):
+			return [re.search(r'/matches/(\d+)$', url).group(1)
+					for url in self._response_archive.get_urls(f'{opendota_api_base_url}/matches/%')]
+
+		def make_api_call(self, api_link):
+			response_data = self._response_archive.get(api_link)
+
+			if response_data is None:
+				print_helper_global.print_message(MessageType.WARNING, f'Response to {api_link} is missing from the archive')
+				return False
+
+			return response_data
+
+
+	class FixtureDirectoryTransport:
+		def __init__(self, fixture_dir):
+			# Endpoints map onto json files: matches/<match_id>.json, players/<player_id>/totals.json and so on
+			self._fixture_dir = fixture_dir
+
+		def __get_file_path(self, api_link):
+			endpoint_path = api_link[len(opendota_api_base_url):].strip('/')
+
+			return os.path.join(self._fixture_dir, *endpoint_path.split('/')) + '.json'
+
+		def get_match_ids(self):
+			matches_dir = os.path.join(self._fixture_dir, 'matches')
+
+			return sorted(file_name[:-len('.json')] for file_name in os.listdir(matches_dir)
+						  if file_name.endswith('.json'))
+
+		def make_api_call(self, api_link):
+			file_path = self.__get_file_path(api_link)
+
+			if not os.path.exists(file_path):
+				print_helper_global.print_message(MessageType.WARNING, f'Response to {api_link} has no fixture: {file_path}')
+				return False
+
+			with open(file_path, 'r', encoding='utf-8') as file:
+				return json.load(file)
+
+
+	class MatchStagingSpool:
+		def __init__(self, staging_dir, flush_threshold_rows):
+			self._staging_dir = staging_dir
+			self._flush_threshold_rows = flush_threshold_rows
+
+			self._tables = {
+				'matches': (['id', 'datetime', 'radiant_win', 'duration', 'radiant_score', 'dire_score'], ['id']),
+				'players': (['id'], ['id']),
+				'match_stats': (None, ['match_id', 'player_id', 'hero_id'])
+			}
+
+			os.makedirs(staging_dir, exist_ok=True)
+
+			self._staged_rows_number = self.__count_staged_rows()
+
+		def __get_file_path(self, table_name, file_idx):
+			# A table is spooled to <table>.csv and, once rows bring new columns, to <table>.1.csv, <table>.2.csv...
+			file_name = f'{table_name}.csv' if file_idx == 0 else f'{table_name}.{file_idx}.csv'
+
+			return os.path.join(self._staging_dir, file_name)
+
+		def __get_file_paths(self, table_name):
+			file_paths = []
+
+			while os.path.exists(self.__get_file_path(table_name, len(file_paths))):
+				file_paths.append(self.__get_file_path(table_name, len(file_paths)))
+
+			return file_paths
+
+		@staticmethod
+		def __read_header(file_path):
+			if os.path.getsize(file_path) == 0:
+				return None
+
+			with open(file_path, 'r', encoding='utf-8', newline='') as file:
+				return next(csv.reader(file))
+
+		def __count_staged_rows(self):
+			staged_rows_number = 0
+
+			for file_path in self.__get_file_paths('match_stats'):
+				if not self.__read_header(file_path):
+					continue
+
+				with open(file_path, 'r', encoding='utf-8', newline='') as file:
+					staged_rows_number += sum(1 for _ in csv.reader(file)) - 1
+
+			return staged_rows_number
+
+		@staticmethod
+		def __to_csv_line(values):
+			def to_csv_value(value):
+				# COPY reads an unquoted empty field as NULL and a quoted one as an empty string
+				if value is None:
+					return ''
+				elif isinstance(value, (bool, int, float)):
+					return str(value)
+
+				return '"' + str(value).replace('"', '""') + '"'
+
+			return ','.join([to_csv_value(value) for value in values]) + '\n'
+
+		def __append_rows(self, table_name, columns, rows):
+			file_paths = self.__get_file_paths(table_name)
+			file_path = file_paths[-1] if file_paths else self.__get_file_path(table_name, 0)
+			header = self.__read_header(file_path) if file_paths else None
+
+			if header:
+				unknown_columns = [column for column in columns if column not in header]
+
+				# The header of a spool file is fixed by its first rows, so wider rows go to a new file
+				if unknown_columns:
+					file_path = self.__get_file_path(table_name, len(file_paths))
+					header = header + unknown_columns
+					print_helper_global.print_message(MessageType.NOTIFICATION,
+													  f'Staging {table_name} rows with new columns {unknown_columns} '
+													  f'to {file_path}')
+
+					with open(file_path, 'w', encoding='utf-8', newline='') as file:
+						file.write(self.__to_csv_line(header))
+
+			with open(file_path, 'a', encoding='utf-8', newline='') as file:
+				if not header:
+					header = columns
+					file.write(self.__to_csv_line(header))
+
+				column_indices = {column: i for i, column in enumerate(columns)}
+				file.writelines([self.__to_csv_line([row[column_indices[column]] if column in column_indices else None
+													 for column in header]) for row in rows])
+
+				file.flush()
+				os.fsync(file.fileno())
+
+		def append(self, data):
+			match_row, players_rows, match_stats_columns, match_stats_rows = build_match_records(data)
+
+			self.__append_rows('matches', self._tables['matches'][0], [match_row])
+			self.__append_rows('players', self._tables['players'][0], players_rows)
+			self.__append_rows('match_stats', match_stats_columns, match_stats_rows)
+
+			self._staged_rows_number += len(match_stats_rows)
+
+		def is_flush_required(self):
+			return self._staged_rows_number >= self._flush_threshold_rows
+
+		def has_staged_rows(self):
+			return self._staged_rows_number > 0
+
+		def get_staged_tables(self):
+			# Table name -> (all the staged columns, key columns, [(columns, file path) of every spool file])
+			staged_tables = {}
+
+			for table_name, (_, key_columns) in self._tables.items():
+				staged_files = []
+
+				for file_path in self.__get_file_paths(table_name):
+					header = self.__read_header(file_path)
+
+					if header:
+						staged_files.append((header, file_path))
+
+				if staged_files:
+					columns = list(dict.fromkeys(column for header, _ in staged_files for column in header))
+					staged_tables[table_name] = (columns, key_columns, staged_files)
+
+			return staged_tables
+
+		def clear(self):
+			for table_name in self._tables:
+				for file_path in self.__get_file_paths(table_name):
+					os.remove(file_path)
+
+			self._staged_rows_number = 0
+
+
+	class MatchCheckpoint:
+		def __init__(self, file_path, responses):
+			self._file_path = file_path
+			self._responses = responses
+
+		def get_response(self, api_link):
+			return self._responses.get(api_link)
+
+		def add_response(self, api_link, response_data):
+			with open(self._file_path, 'a') as file:
+				file.write(json.dumps({'url': api_link, 'response': response_data}) + '\n')
+				file.flush()
+				os.fsync(file.fileno())
+
+			self._responses[api_link] = response_data
+
+
+	class MatchCheckpointJournal:
+		def __init__(self, checkpoint_dir, max_age_hours):
+			# Raw API responses of the matches being collected, one json-lines file per match, so that a restarted
+			# agent resumes a partially fetched match without spending the quota on it again
+			self._checkpoint_dir = checkpoint_dir
+
+			os.makedirs(checkpoint_dir, exist_ok=True)
+
+			self.__prune_stale_checkpoints(max_age_hours)
+
+		def __get_file_path(self, match_id):
+			return os.path.join(self._checkpoint_dir, f'match_{match_id}.jsonl')
+
+		def __prune_stale_checkpoints(self, max_age_hours):
+			# Matches taken over by other agents are never resumed here, and old players' stats are not worth it anyway
+			min_modification_time = time.time() - max_age_hours * 3600
+
+			for file_name in os.listdir(self._checkpoint_dir):
+				file_path = os.path.join(self._checkpoint_dir, file_name)
+
+				if file_name.endswith('.jsonl') and os.path.getmtime(file_path) < min_modification_time:
+					os.remove(file_path)
+
+		@staticmethod
+		def __read_responses(file_path):
+			responses = {}
+			valid_length = 0
+
+			with open(file_path, 'rb') as file:
+				for line in file:
+					try:
+						entry = json.loads(line)
+					except ValueError:
+						# The tail of an append interrupted by a crash
+						break
+
+					responses[entry['url']] = entry['response']
+					valid_length += len(line)
+
+			if valid_length != os.path.getsize(file_path):
+				with open(file_path, 'r+b') as file:
+					file.truncate(valid_length)
+
+			return responses
+
+		def open_checkpoint(self, match_id):
+			file_path = self.__get_file_path(match_id)
+			responses = {}
+
+			if os.path.exists(file_path):
+				responses = self.__read_responses(file_path)
+
+			if responses:
+				print_helper_global.print_message(MessageType.NOTIFICATION,
+												  f'Resuming MatchId: {match_id} with {len(responses)} checkpointed responses')
+
+			return MatchCheckpoint(file_path, responses)
+
+		def discard(self, match_id):
+			file_path = self.__get_file_path(match_id)
+
+			if os.path.exists(file_path):
+				os.remove(file_path)
+
+
 	class ParseManager:
-		def __init__(self, request_manager):
+		def __init__(self, request_manager, staging_spool=None, checkpoint_journal=None, database_dsn=None,
+					 upsert_records=False, use_database=True):
 			self._request_manager = request_manager
-			self._db_watcher = DatabaseWatcher()
+			self._staging_spool = staging_spool
+			self._checkpoint_journal = checkpoint_journal
+
+			# Without the DB, parsed matches are only staged (when a staging spool is given) or dropped
+			self._db_watcher = None
+
+			if use_database:
+				self._db_watcher = DatabaseWatcher(database_dsn=database_dsn, upsert_records=upsert_records)
 
-			self._base_url = 'https://api.opendota.com/api'
+			self._base_url = opendota_api_base_url
 
 			self.radiant_team_const_str = 'Radiant'
 			self.dire_team_const_str = 'Dire'
 
-		def __get_match_data(self, match_id):
-			# return match_data_global_temp
-			return self._request_manager.make_api_call(f'{self._base_url}/matches/{match_id}')
+		def __make_api_call(self, checkpoint, api_link):
+			if checkpoint:
+				response_data = checkpoint.get_response(api_link)
+
+				if response_data is not None:
+					print_helper_global.print_message(MessageType.NOTIFICATION,
+													  f'Response to {api_link} is taken from the match checkpoint')
+					return response_data
+
+			response_data = self._request_manager.make_api_call(api_link)
+
+			if checkpoint and response_data:
+				checkpoint.add_response(api_link, response_data)
+
+			return response_data
+
+		def __get_match_data(self, checkpoint, match_id):
+			return self.__make_api_call(checkpoint, f'{self._base_url}/matches/{match_id}')
 
-		def __get_player_totals_data(self, p_id):
-			# return player_totals_data_global_temp
-			return self._request_manager.make_api_call(f'{self._base_url}/players/{p_id}/totals')
+		def __get_player_totals_data(self, checkpoint, p_id):
+			return self.__make_api_call(checkpoint, f'{self._base_url}/players/{p_id}/totals')
 
-		def __get_player_counts_data(self, p_id):
-			# return player_counts_data_global_temp
-			return self._request_manager.make_api_call(f'{self._base_url}/players/{p_id}/counts')
+		def __get_player_counts_data(self, checkpoint, p_id):
+			return self.__make_api_call(checkpoint, f'{self._base_url}/players/{p_id}/counts')
 
-		def __get_player_heroes_data(self, p_id):
-			# return player_heroes_data_global_temp
-			return self._request_manager.make_api_call(f'{self._base_url}/players/{p_id}/heroes')
+		def __get_player_heroes_data(self, checkpoint, p_id):
+			return self.__make_api_call(checkpoint, f'{self._base_url}/players/{p_id}/heroes')
 
 		@staticmethod
 		def __parse_main_match_data(match_data, dest_data_dict):
@@ -178,8 +590,8 @@ try:
 			dest_data_dict['radiant_win'] = match_data['radiant_win']
 			dest_data_dict['match_duration'] = match_data['duration']
 
-		def __parse_player_totals(self, player_id, dest_data_dict):
-			player_totals_data_dict = self.__get_player_totals_data(player_id)
+		def __parse_player_totals(self, checkpoint, player_id, dest_data_dict):
+			player_totals_data_dict = self.__get_player_totals_data(checkpoint, player_id)
 
 			if not player_totals_data_dict:
 				return False
@@ -200,8 +612,8 @@ try:
 
 			return True
 
-		def __parse_player_counts(self, player_id, dest_data_dict):
-			player_counts_data_dict = self.__get_player_counts_data(player_id)
+		def __parse_player_counts(self, checkpoint, player_id, dest_data_dict):
+			player_counts_data_dict = self.__get_player_counts_data(checkpoint, player_id)
 
 			if not player_counts_data_dict:
 				return False
@@ -241,8 +653,8 @@ try:
 												  f'Skipping the iteration')
 				return False
 
-		def __parse_player_heroes(self, player_id, hero_id, dest_data_dict):
-			player_heroes = self.__get_player_heroes_data(player_id)
+		def __parse_player_heroes(self, checkpoint, player_id, hero_id, dest_data_dict):
+			player_heroes = self.__get_player_heroes_data(checkpoint, player_id)
 
 			if not player_heroes:
 				return False
@@ -253,7 +665,7 @@ try:
 
 			if not selected_dict:
 				print_helper_global.print_message(MessageType.ERROR, 'Failed parsing player match_hero info')
-				global_await_exit_action()
+				raise ParserTerminationError(f'Hero {hero_id} is missing from the heroes of player {player_id}')
 
 			dest_data_dict['player_hero_total_matches_played'] = int(selected_dict['games'])
 			player_hero_total_matches_played = dest_data_dict['player_hero_total_matches_played']
@@ -264,7 +676,7 @@ try:
 
 			return True
 
-		def __parse_match_data_stage_one(self, match_data_dict_in, match_data_dict_out):
+		def __parse_match_data_stage_one(self, checkpoint, match_data_dict_in, match_data_dict_out):
 			if not all('account_id' in d for d in match_data_dict_in['players']):
 				print_helper_global.print_message(MessageType.WARNING,
 												  'Not all of the players are accessible. Skipping iteration')
@@ -291,13 +703,14 @@ try:
 				player_match_data_dict['player_side'] = self.radiant_team_const_str \
 					if player['isRadiant'] else self.dire_team_const_str
 
-				if not self.__parse_player_totals(player['account_id'], player_match_data_dict):
+				if not self.__parse_player_totals(checkpoint, player['account_id'], player_match_data_dict):
 					return False
 
-				if not self.__parse_player_counts(player['account_id'], player_match_data_dict):
+				if not self.__parse_player_counts(checkpoint, player['account_id'], player_match_data_dict):
 					return False
 
-				if not self.__parse_player_heroes(player['account_id'], player['hero_id'], player_match_data_dict):
+				if not self.__parse_player_heroes(checkpoint, player['account_id'], player['hero_id'],
+												  player_match_data_dict):
 					return False
 
 				match_data_dict_out['players'].append(player_match_data_dict)
@@ -311,85 +724,100 @@ try:
 
 		@staticmethod
 		def __parse_match_data_stage_two(match_data_dict):
-			def handle_pick_conf_coef(winrate, total_played):
-				if winrate != -1. and total_played > 10:
-					temp = winrate * 100
-
-					if temp < 20:
-						return -2
-					elif 20 <= temp <= 45:
-						return -1
-					elif 80 >= temp >= 55:
-						return 1
-					elif temp > 80:
-						return 2
-					else:
-						return 0
-				else:
-					return 0
-
 			for player in match_data_dict['players']:
 				player['player_q_mmr_diff'] = (sum(ranks_to_mmr[player['player_match_rank_initial']])
 											   / 2 - match_data_dict['average_match_mmr'])
 
-				player_id, hero_id, player_side = player['player_id'], player['hero_id'], player['player_side']
-				player_heroes = player['player_heroes']
+			apply_pick_confidence_scores(match_data_dict['players'])
 
-				player_heroes_pick_confidence_score_allies = 0
-				player_heroes_pick_confidence_score_enemies = 0
+		def collect_match(self, match_id):
+			checkpoint = self._checkpoint_journal.open_checkpoint(match_id) if self._checkpoint_journal else None
 
-				for p in match_data_dict['players']:
-					if p['player_id'] != player_id:
-						ph_dict = next((d for d in player_heroes if d['hero_id'] == p['hero_id']), None)
+			match_data = self.__get_match_data(checkpoint, match_id)
 
-						if p['player_side'] == player_side:
-							games_with_total = ph_dict['with_games']
-							games_with_won = ph_dict['with_win']
-
-							hero_with_winrate = float(safe_divide(games_with_won, games_with_total))
+			if not match_data:
+				return False
 
-							player_heroes_pick_confidence_score_allies += handle_pick_conf_coef(hero_with_winrate, games_with_total)
-						else:
-							games_against_total = ph_dict['against_games']
-							games_against_won = ph_dict['against_win']
+			res_dict = {'players': []}
 
-							hero_against_winrate = float(safe_divide(games_against_won, games_against_total))
+			self.__parse_main_match_data(match_data, res_dict)
+			if not self.__parse_match_data_stage_one(checkpoint, match_data, res_dict):
+				return False
 
-							player_heroes_pick_confidence_score_enemies += handle_pick_conf_coef(hero_against_winrate, games_against_total)
+			self.__parse_match_data_stage_two(res_dict)
 
-						p['player_heroes_pick_confidence_score_allies'] = player_heroes_pick_confidence_score_allies
-						p['player_heroes_pick_confidence_score_enemies'] = player_heroes_pick_confidence_score_enemies
+			return res_dict
 
-		def process_match(self, match_id):
-			match_data = self.__get_match_data(match_id)
+		def flush_staged_matches(self):
+			if not self._staging_spool or not self._staging_spool.has_staged_rows() or not self._db_watcher:
+				return True
 
-			if not match_data:
+			if not self._db_watcher.copy_staged_records(self._staging_spool):
 				return False
 
-			res_dict = {'players': []}
+			print_helper_global.print_message(MessageType.NOTIFICATION, 'Staged matches have been copied to the DB')
+			self._staging_spool.clear()
 
-			self.__parse_main_match_data(match_data, res_dict)
-			if not self.__parse_match_data_stage_one(match_data, res_dict):
-				return False
+			return True
 
-			self.__parse_match_data_stage_two(res_dict)
+		def dump_match(self, match_data_dict):
+			match_id = match_data_dict['match_id']
+
+			if self._staging_spool:
+				self._staging_spool.append(match_data_dict)
+				print_helper_global.print_message(MessageType.NOTIFICATION, f'MatchId: {match_id} has been staged')
+
+				if self._staging_spool.is_flush_required():
+					return self.flush_staged_matches()
+
+				return True
 
-			if self._db_watcher.dump_all_parsed_records(res_dict):
+			if not self._db_watcher:
+				print_helper_global.print_message(MessageType.NOTIFICATION, f'MatchId: {match_id} has been parsed')
+				return True
+
+			if self._db_watcher.dump_all_parsed_records(match_data_dict):
 				print_helper_global.print_message(MessageType.NOTIFICATION, f'MatchId: {match_id} has been processed')
-			else:
-				print_helper_global.print_message(MessageType.WARNING, f'Failed processing the match with id: {match_id}')
+				return True
+
+			print_helper_global.print_message(MessageType.WARNING, f'Failed processing the match with id: {match_id}')
+			return False
+
+		def discard_checkpoint(self, match_id):
+			if self._checkpoint_journal:
+				self._checkpoint_journal.discard(match_id)
+
+		def process_match(self, match_id):
+			match_data_dict = self.collect_match(match_id)
+
+			if not match_data_dict:
+				return False
+
+			return self.dump_match(match_data_dict)
 
 		def dispose(self):
-			self._db_watcher.dispose()
+			if self._db_watcher:
+				self._db_watcher.dispose()
 
 
 	class DatabaseWatcher:
-		def __init__(self, agent_name=None):
+		def __init__(self, agent_name=None, database_dsn=None, upsert_records=False):
 			self._operation_lock_time = 3
 
 			self._connection = None
 			self._cursor = None
 
+			# Without a dsn the shared production DB is used
+			self._database_dsn = database_dsn
+
+			# Reparsed matches overwrite the stored rows instead of being skipped as duplicates
+			self._upsert_records = upsert_records
+			self._key_columns = {
+				'matches': ['id'],
+				'players': ['id'],
+				'match_stats': ['match_id', 'player_id', 'hero_id']
+			}
+
 			if agent_name:
 				self.agent_name = agent_name
 			else:
@@ -402,13 +830,16 @@ try:
 				self._connection.close()
 
 		def __open_database_connection(self):
-			self._connection = psycopg2.connect(
-							dbname='dota_ai_od',
-							user='limited_user',
-							password='*removed*',
-							host='*azure*',
-							port='5432'
-						)
+			if self._database_dsn:
+				self._connection = psycopg2.connect(self._database_dsn)
+			else:
+				self._connection = psycopg2.connect(
+								dbname='dota_ai_od',
+								user='limited_user',
+								password='*removed*',
+								host='*azure*',
+								port='5432'
+							)
 
 			self._connection.autocommit = False
 
@@ -417,6 +848,16 @@ try:
 		def __refresh_connection_cursor(self):
 			self._cursor = self._connection.cursor()
 
+		def __get_conflict_clause(self, table_name, columns):
+			key_columns = self._key_columns[table_name]
+			update_columns = [column for column in columns if column not in key_columns]
+
+			if not self._upsert_records or not update_columns:
+				return 'ON CONFLICT DO NOTHING'
+
+			return (f"ON CONFLICT ({', '.join(key_columns)}) DO UPDATE SET "
+					f"{', '.join([f'{column} = EXCLUDED.{column}' for column in update_columns])}")
+
 		def __try_execute_query(self, query, params, is_readonly, is_execute_many=False, allow_commit=True):
 			try:
 				res = [True, None]
@@ -467,192 +908,208 @@ try:
 
 			return False, err
 
-		def __try_update_queue_assignments(self, q_limit):
+		def __try_claim_queue_items(self, q_limit, lease_seconds):
 			try:
 				with self._connection.cursor() as cursor:
+					# SKIP LOCKED lets concurrent agents claim disjoint batches instead of queueing up on the same rows.
+					# Besides pending rows, the agent takes back its own rows left over from a previous run and reclaims
+					# rows whose lease has run out. Each of the three lookups is served by its own partial index
 					cursor.execute("""
-						SELECT id FROM match_queue
-						WHERE is_assigned = FALSE AND is_processed = FALSE
-						ORDER BY id ASC
-						LIMIT %s FOR UPDATE""", (q_limit,))
+						WITH own_items AS (
+							SELECT id FROM match_queue
+							WHERE status = 'claimed' AND agent = %(agent)s
+							ORDER BY id ASC
+							LIMIT %(limit)s FOR UPDATE SKIP LOCKED
+						), expired_items AS (
+							SELECT id FROM match_queue
+							WHERE status = 'claimed' AND lease_expires_at < NOW()
+							ORDER BY id ASC
+							LIMIT %(limit)s FOR UPDATE SKIP LOCKED
+						), pending_items AS (
+							SELECT id FROM match_queue
+							WHERE status = 'pending'
+							ORDER BY id ASC
+							LIMIT %(limit)s FOR UPDATE SKIP LOCKED
+						)
+						UPDATE match_queue
+						SET status = 'claimed', agent = %(agent)s, claimed_at = NOW(),
+							lease_expires_at = NOW() + %(lease_seconds)s * INTERVAL '1 second'
+						WHERE id IN (
+							SELECT id FROM own_items
+							UNION SELECT id FROM expired_items
+							UNION SELECT id FROM pending_items
+							ORDER BY id ASC
+							LIMIT %(limit)s)
+						RETURNING id, match_id, status, agent
+					""", {'agent': self.agent_name, 'lease_seconds': lease_seconds, 'limit': q_limit})
+
+					rows = sorted(cursor.fetchall())
+
+				self._connection.commit()
+
+				return rows, None
+			except psycopg2.Error as e:
+				self._connection.rollback()
 
-					rows = cursor.fetchall()
+				return False, e
 
-					ids = [row[0] for row in rows]
+		def __try_dump_match_records(self, match_row, players_rows, match_stats_columns, match_stats_rows):
+			def get_values_placeholders(rows):
+				return ', '.join([f"({', '.join(['%s'] * len(row))})" for row in rows])
 
-					cursor.execute("""
-						UPDATE match_queue
-						SET is_assigned = TRUE, agent = %s
-						WHERE id = ANY(%s)
-					""", (self.agent_name, ids))
+			match_columns = ['id', 'datetime', 'radiant_win', 'duration', 'radiant_score', 'dire_score']
 
-					self._connection.commit()
+			# All three inserts travel in a single statement batch, hence a single round-trip to the server
+			query = f"""
+				INSERT INTO matches ({', '.join(match_columns)})
+				VALUES {get_values_placeholders([match_row])}
+				{self.__get_conflict_clause('matches', match_columns)};
+
+				INSERT INTO players (id)
+				VALUES {get_values_placeholders(players_rows)}
+				{self.__get_conflict_clause('players', ['id'])};
+
+				INSERT INTO match_stats ({', '.join(match_stats_columns)})
+				VALUES {get_values_placeholders(match_stats_rows)}
+				{self.__get_conflict_clause('match_stats', match_stats_columns)};
+			"""
+			params = [value for rows in ([match_row], players_rows, match_stats_rows) for row in rows for value in row]
+
+			try:
+				with self._connection.cursor() as cursor:
+					cursor.execute(query, params)
+
+				self._connection.commit()
 
 				return True, None
 			except psycopg2.Error as e:
-				error = e
+				self._connection.rollback()
 
-			return False, error
+				return False, e
 
-		def __try_get_existing_player(self, player_id):
-			query = 'SELECT * FROM players WHERE id = %s'
-			params = (str(player_id),)
+		def dump_all_parsed_records(self, data):
+			self.__refresh_connection_cursor()
+
+			match_id = data['match_id']
+
+			match_row, players_rows, match_stats_columns, match_stats_rows = build_match_records(data)
 
 			res, _ = self.__try_perform_operation_with_retries(
-				'Check for existing player in DB',
-				self.__try_execute_query,
-				query=query,
-				params=params,
-				is_readonly=True
+				f'Dump the records of Match_Id: {match_id}',
+				self.__try_dump_match_records,
+				match_row=match_row,
+				players_rows=players_rows,
+				match_stats_columns=match_stats_columns,
+				match_stats_rows=match_stats_rows
 			)
 
-			return res
+			if not res:
+				print_helper_global.print_message(MessageType.WARNING,
+												  f'Transaction for the records of match_id: {match_id} has failed')
+				print_helper_global.print_message(MessageType.WARNING, 'Skipping the iteration')
 
-		def __add_player(self, player_id, allow_commit):
-			res = self.__try_get_existing_player(player_id)
+				return False
 
-			if not res:
-				query = 'INSERT INTO players (id) VALUES (%s)'
-				params = (player_id,)
-
-				res, _ = self.__try_perform_operation_with_retries(
-					'Add new player to the database',
-					self.__try_execute_query,
-					query=query,
-					params=params,
-					is_readonly=False,
-					allow_commit=allow_commit
-				)
+			return True
 
-			return res
+		def __try_copy_staged_records(self, staged_tables):
+			try:
+				with self._connection.cursor() as cursor:
+					for table_name, (columns, key_columns, staged_files) in staged_tables.items():
+						staging_table_name = f'staging_{table_name}'
+						columns_str = ', '.join(columns)
 
-		def __try_get_existing_match(self, match_id):
-			query = 'SELECT * FROM matches WHERE id = %s'
-			params = (str(match_id),)
+						cursor.execute(f'CREATE TEMP TABLE {staging_table_name} (LIKE {table_name}) ON COMMIT DROP')
 
-			res, _ = self.__try_perform_operation_with_retries(
-				'Check for existing match in DB',
-				self.__try_execute_query,
-				query=query,
-				params=params,
-				is_readonly=True
-			)
+						# Integer columns are widened, so that fractional values get rounded on insertion just like
+						# with the plain INSERTs instead of failing the whole COPY
+						cursor.execute("""
+							SELECT column_name FROM information_schema.columns
+							WHERE table_schema = current_schema() AND table_name = %s
+								AND data_type IN ('smallint', 'integer', 'bigint')""", (table_name,))
 
-			return res
+						for (column_name,) in cursor.fetchall():
+							cursor.execute(f'ALTER TABLE {staging_table_name} ALTER COLUMN {column_name} TYPE NUMERIC')
 
-		def __add_match(self, match_id, match_datetime, radiant_win, match_duration,
-					  match_radiant_score, match_dire_score, allow_commit):
-			res = self.__try_get_existing_match(match_id)
+						for file_columns, file_path in staged_files:
+							with open(file_path, 'r', encoding='utf-8', newline='') as file:
+								cursor.copy_expert(f"COPY {staging_table_name} ({', '.join(file_columns)}) "
+												   f'FROM STDIN WITH (FORMAT csv, HEADER true)', file)
 
-			if not res:
-				query = """
-					INSERT INTO matches (id, datetime, radiant_win, duration, radiant_score, dire_score)
-					VALUES (%s, %s, %s, %s, %s, %s)
-				"""
-				params = (str(match_id), match_datetime, radiant_win, match_duration, match_radiant_score, match_dire_score)
-
-				res, _ = self.__try_perform_operation_with_retries(
-					'Add new match to the database',
-					self.__try_execute_query,
-					query=query,
-					params=params,
-					is_readonly=False,
-					allow_commit=allow_commit
-				)
+						cursor.execute(f"""
+							INSERT INTO {table_name} ({columns_str})
+							SELECT DISTINCT ON ({', '.join(key_columns)}) {columns_str} FROM {staging_table_name}
+							{self.__get_conflict_clause(table_name, columns)}""")
 
-			return res
+				self._connection.commit()
 
-		def dump_all_parsed_records(self, data):
+				return True, None
+			except psycopg2.Error as e:
+				self._connection.rollback()
+
+				return False, e
+
+		def copy_staged_records(self, staging_spool):
 			self.__refresh_connection_cursor()
 
-			match_id = data['match_id']
-			match_datetime = data['match_datetime']
-			match_outcome = data['radiant_win']
-			match_duration = data['match_duration']
-			match_radiant_score = data['match_radiant_score']
-			match_dire_score = data['match_dire_score']
-			average_match_mmr = data['average_match_mmr']
-
-			_ = self.__add_match(match_id, match_datetime, match_outcome, match_duration,
-								 match_radiant_score, match_dire_score, False)
-
-			for player in data['players']:
-				_ = self.__add_player(player['player_id'], False)
-
-				player.pop('player_heroes', None)
-				player['average_match_mmr'] = average_match_mmr
-
-				columns = ', '.join(player.keys())
-				placeholders = ', '.join(['%s' for _ in player])
-
-				query = f'INSERT INTO match_stats ({columns}) VALUES ({placeholders})'
-				params = tuple(player.values())
-
-				res, _ = self.__try_perform_operation_with_retries(
-					f'Add match_stats record for Match_Id: {match_id}, Player_Id: {player["player_id"]}, Hero_Id: {player["hero_id"]}',
-					self.__try_execute_query,
-					query=query,
-					params=params,
-					is_readonly=False,
-					allow_commit=False
-				)
-
-				if not res:
-					print_helper_global.print_message(MessageType.WARNING, f'Transaction for match_stats with match_id:' +
-										  f'{data["match_id"]} and player_id: {player["player_id"]} has failed')
-					print_helper_global.print_message(MessageType.WARNING, 'Skipping the iteration')
-
-					self._connection.rollback()
-					return False
+			res, _ = self.__try_perform_operation_with_retries(
+				'Copy the staged records',
+				self.__try_copy_staged_records,
+				staged_tables=staging_spool.get_staged_tables()
+			)
 
-			self._connection.commit()
+			if not res:
+				print_helper_global.print_message(MessageType.ERROR, 'Failed copying the staged records to the DB')
+				return False
 
 			return True
 
-		def update_queue_assignments(self, limit):
+		def claim_queue_items(self, limit, lease_seconds):
 			self.__refresh_connection_cursor()
 
-			res, _ = self.__try_perform_operation_with_retries(
-				'Update agent queue in DB',
-				self.__try_update_queue_assignments,
+			rows, _ = self.__try_perform_operation_with_retries(
+				'Claim queue items',
+				self.__try_claim_queue_items,
 				q_limit=limit,
+				lease_seconds=lease_seconds
 			)
 
-			return res
+			if isinstance(rows, list):
+				return [MatchQueue(*row) for row in rows]
+
+			print_helper_global.print_message(MessageType.ERROR, 'Failed claiming the queue items')
+			raise ParserTerminationError('Failed claiming the queue items')
 
-		def try_acquire_agent_queue(self, limit):
+		def renew_queue_leases(self, queue_item_ids, lease_seconds):
 			self.__refresh_connection_cursor()
 
-			query = 'SELECT * FROM match_queue WHERE is_assigned = %s AND is_processed = %s AND agent = %s LIMIT %s'
-			params = (True, False, self.agent_name, limit)
+			query = """
+				UPDATE match_queue SET lease_expires_at = NOW() + %s * INTERVAL '1 second'
+				WHERE id = ANY(%s) AND agent = %s AND status = 'claimed'
+			"""
+			params = (lease_seconds, list(queue_item_ids), self.agent_name)
 
-			rows, _ = self.__try_perform_operation_with_retries(
-				'Acquire agent queue',
+			res, _ = self.__try_perform_operation_with_retries(
+				'Renew queue leases',
 				self.__try_execute_query,
 				query=query,
 				params=params,
-				is_readonly=True
+				is_readonly=False
 			)
 
-			if rows:
-				return [MatchQueue(*row) for row in rows]
-
-			if isinstance(rows, list):
-				print_helper_global.print_message(MessageType.WARNING, 'Failed fetching the queue: Queue is empty')
-				return []
-			else:
-				print_helper_global.print_message(MessageType.ERROR, 'Failed fetching the queue')
+			if not res:
+				print_helper_global.print_message(MessageType.WARNING, 'Failed renewing the queue leases')
 
-			global_await_exit_action()
+			return res
 
-		def mark_queue_item_as_processed(self, queue_item):
+		def mark_queue_items_as_processed(self, queue_item_ids):
 			self.__refresh_connection_cursor()
 
-			query = 'UPDATE match_queue SET is_processed = %s WHERE id = %s'
-			params = (True, queue_item.id)
+			query = 'UPDATE match_queue SET status = %s, lease_expires_at = NULL WHERE id = ANY(%s)'
+			params = (MatchQueueStatus.PROCESSED.value, list(queue_item_ids))
 
 			res, _ = self.__try_perform_operation_with_retries(
-				'Release queue item',
+				'Release queue items',
 				self.__try_execute_query,
 				query=query,
 				params=params,
@@ -660,110 +1117,486 @@ try:
 			)
 
 			if not res:
-				print_helper_global.print_message(MessageType.ERROR, 'Failed releasing the queue item')
-				global_await_exit_action()
+				print_helper_global.print_message(MessageType.ERROR, 'Failed releasing the queue items')
+				raise ParserTerminationError('Failed releasing the queue items')
 
 
 	class QueueWatcher:
-		def __init__(self, proxy_server=None):
+		def __init__(self, proxy_server=None, lease_seconds=600, ack_batch_size=20, ack_flush_seconds=30,
+					 ack_journal_path=None, database_dsn=None):
 			self._current_agent_queue = None
-			self._in_memory_threshold = 5
 			self._in_memory_load_limit = 30
-			self._in_db_threshold = 70
-			self._agent_lock_time_seconds = 15
+			self._lease_seconds = lease_seconds
+
+			self._ack_batch_size = ack_batch_size
+			self._ack_flush_seconds = ack_flush_seconds
 
 			if proxy_server:
-				self._db_watcher = DatabaseWatcher(f'{socket.gethostname()}:{proxy_server}')
+				self._db_watcher = DatabaseWatcher(f'{socket.gethostname()}:{proxy_server}', database_dsn)
+			else:
+				self._db_watcher = DatabaseWatcher(database_dsn=database_dsn)
+
+			if ack_journal_path:
+				self._ack_journal_path = ack_journal_path
 			else:
-				self._db_watcher = DatabaseWatcher()
+				agent_file_name = re.sub(r'[^\w.-]', '_', self._db_watcher.agent_name)
+				self._ack_journal_path = f'queue_acks_{agent_file_name}.journal'
 
 			self._current_queue_item = None
+			self._in_flight_ids = set()
 
-		def __lock_agent_operations(self):
-			print_helper_global.print_message(MessageType.NOTIFICATION,
-											  f'QueueWatcher is getting locked for {self._agent_lock_time_seconds} seconds')
-			print_helper_global.print_message(MessageType.NOTIFICATION,
-											  'Please use that time to exit the application safely if necessary')
+			self._pending_ack_ids = []
+			self._first_pending_ack_time = None
+			self._last_lease_renewal_time = time.monotonic()
 
-			time.sleep(self._agent_lock_time_seconds)
+			self.__replay_ack_journal()
 
-			print_helper_global.print_message(MessageType.WARNING,
-											  'QueueWatcher is now unlocked')
-			print_helper_global.print_message(MessageType.WARNING,
-											  'Exiting the application now may cause damage to the queues.')
+		def __replay_ack_journal(self):
+			# Acks journaled by a run that did not get to flush them
+			if not os.path.exists(self._ack_journal_path):
+				return
 
-			time.sleep(3)
+			with open(self._ack_journal_path, 'r') as file:
+				self._pending_ack_ids = [int(line) for line in file if line.strip()]
 
-		def __load_in_memory_queue(self):
-			self.__lock_agent_operations()
+			if self._pending_ack_ids:
+				print_helper_global.print_message(MessageType.NOTIFICATION,
+												  f'Replaying {len(self._pending_ack_ids)} journaled queue acks')
+				self.flush_acks()
 
-			temp_queue = self._db_watcher.try_acquire_agent_queue(self._in_memory_load_limit)
-			in_memory_threshold = self._in_memory_threshold
+		def __journal_ack(self, queue_item_id):
+			with open(self._ack_journal_path, 'a') as file:
+				file.write(f'{queue_item_id}\n')
+				file.flush()
+				os.fsync(file.fileno())
 
-			if len(temp_queue) < in_memory_threshold:
-				if self._db_watcher.update_queue_assignments(self._in_db_threshold):
-					temp_queue = self._db_watcher.try_acquire_agent_queue(self._in_memory_load_limit)
+		def flush_acks(self):
+			if not self._pending_ack_ids:
+				return
 
-					if len(temp_queue) < in_memory_threshold:
-						print_helper_global.print_message(MessageType.ERROR, 'Failed updating the queue')
-						global_await_exit_action()
-				else:
-					print_helper_global.print_message(MessageType.ERROR, 'Failed updating the queue. DB error')
-					global_await_exit_action()
+			self._db_watcher.mark_queue_items_as_processed(self._pending_ack_ids)
+
+			self._pending_ack_ids = []
+			self._first_pending_ack_time = None
+
+			open(self._ack_journal_path, 'w').close()
+
+		def __load_in_memory_queue(self):
+			# Items still being processed or awaiting their ack are claimed by this agent already,
+			# so they must not be handed out twice
+			claimed_ids = self._in_flight_ids.union(self._pending_ack_ids)
+
+			temp_queue = self._db_watcher.claim_queue_items(self._in_memory_load_limit + len(claimed_ids),
+															self._lease_seconds)
+			temp_queue = [queue_item for queue_item in temp_queue if queue_item.id not in claimed_ids]
+
+			if not temp_queue:
+				print_helper_global.print_message(MessageType.NOTIFICATION, 'The queue is empty')
 
 			self._current_agent_queue = deque(temp_queue)
 
-		def __mark_prev_queue_item_as_processed(self):
-			if self._current_queue_item:
-				self._db_watcher.mark_queue_item_as_processed(self._current_queue_item)
+		def get_maintenance_interval(self):
+			return min(self._lease_seconds / 3, self._ack_flush_seconds)
 
-		def fetch_agent_queue_item(self):
-			self.__mark_prev_queue_item_as_processed()
+		def renew_leases(self):
+			# Acked items stay unprocessed in the DB until the flush, so their leases are kept alive as well
+			queue_item_ids = self._in_flight_ids.union(self._pending_ack_ids).union(
+				queue_item.id for queue_item in (self._current_agent_queue or []))
+
+			if queue_item_ids:
+				self._db_watcher.renew_queue_leases(queue_item_ids, self._lease_seconds)
+
+			self._last_lease_renewal_time = time.monotonic()
+
+		def perform_maintenance(self):
+			now = time.monotonic()
 
+			if self._first_pending_ack_time is not None and now - self._first_pending_ack_time >= self._ack_flush_seconds:
+				self.flush_acks()
+
+			if now - self._last_lease_renewal_time >= self._lease_seconds / 3:
+				self.renew_leases()
+
+		def acquire_queue_item(self):
 			if not self._current_agent_queue:
 				self.__load_in_memory_queue()
 
-			self._current_queue_item = self._current_agent_queue.popleft()
+			# The matches in flight are drained by the caller, once there is nothing left to claim
+			if not self._current_agent_queue:
+				return None
+
+			queue_item = self._current_agent_queue.popleft()
+			self._in_flight_ids.add(queue_item.id)
+
+			return queue_item
+
+		def mark_queue_item_as_processed(self, queue_item):
+			self.__journal_ack(queue_item.id)
+
+			self._pending_ack_ids.append(queue_item.id)
+			self._in_flight_ids.discard(queue_item.id)
+
+			if self._first_pending_ack_time is None:
+				self._first_pending_ack_time = time.monotonic()
+
+			if len(self._pending_ack_ids) >= self._ack_batch_size:
+				self.flush_acks()
+
+		def fetch_agent_queue_item(self):
+			if self._current_queue_item:
+				self.mark_queue_item_as_processed(self._current_queue_item)
+
+			self._current_queue_item = self.acquire_queue_item()
 
 			return self._current_queue_item
 
 		def dispose(self):
+			self.flush_acks()
 			self._db_watcher.dispose()
 
 
-	with open('../../process_to_terminate.txt', 'w') as file:
-		file.write(str(os.getpid()))
+	class WorkerStatsReporter:
+		def __init__(self, stats_path, proxy_server, request_manager):
+			# Read by the proxy supervisor, both as a heartbeat and for the per-proxy throughput
+			self._stats_path = stats_path
+			self._proxy_server = proxy_server
+			self._request_manager = request_manager
+
+			self._started_at = time.time()
+			self._last_match_time = None
+			self._matches_processed = 0
+			self._matches_failed = 0
+
+		def record_match(self, is_processed):
+			if is_processed:
+				self._matches_processed += 1
+			else:
+				self._matches_failed += 1
+
+			self._last_match_time = time.time()
+
+			self.write()
+
+		def __get_progress_time(self):
+			# updated_at only tells that the event loop is alive, progress_at moves with completed requests and matches
+			return max(filter(None, [self._started_at, self._last_match_time,
+									 self._request_manager.get_last_response_time()]))
+
+		def write(self):
+			stats = {
+				'pid': os.getpid(),
+				'proxy_server': self._proxy_server,
+				'started_at': self._started_at,
+				'updated_at': time.time(),
+				'progress_at': self.__get_progress_time(),
+				'matches_processed': self._matches_processed,
+				'matches_failed': self._matches_failed,
+				'requests_made': self._request_manager.get_request_count(),
+				'proxy_pool': self._request_manager.get_proxy_pool_stats()
+			}
+
+			temp_path = f'{self._stats_path}.tmp'
+
+			with open(temp_path, 'w') as file:
+				json.dump(stats, file)
+
+			os.replace(temp_path, self._stats_path)
+
+
+	class MatchCrawler:
+		def __init__(self, parse_manager, queue_watcher, max_matches_in_flight, stats_reporter=None):
+			self._parse_manager = parse_manager
+			self._queue_watcher = queue_watcher
+			self._max_matches_in_flight = max_matches_in_flight
+			self._stats_reporter = stats_reporter
+
+			self._stop_requested = False
+
+			# The API round-trips of several matches overlap, while all the DB work (queue and dumps) goes through
+			# a single thread, as both watchers hold one psycopg2 connection each
+			self._fetch_executor = ThreadPoolExecutor(max_workers=max_matches_in_flight)
+			self._db_executor = ThreadPoolExecutor(max_workers=1)
+
+		async def __crawl_match(self, queue_item):
+			loop = asyncio.get_running_loop()
+
+			print_helper_global.print_message(MessageType.NOTIFICATION,
+											  f'Starting the processing of the match with ID: {queue_item.match_id}')
+
+			match_data_dict = await loop.run_in_executor(self._fetch_executor, self._parse_manager.collect_match,
+														 queue_item.match_id)
+
+			is_processed = False
+
+			if match_data_dict:
+				is_processed = await loop.run_in_executor(self._db_executor, self._parse_manager.dump_match,
+														  match_data_dict)
+
+			await loop.run_in_executor(self._db_executor, self._queue_watcher.mark_queue_item_as_processed, queue_item)
+
+			# Only once the ack is journaled, as a crash before that gets the match resumed from its checkpoint
+			self._parse_manager.discard_checkpoint(queue_item.match_id)
+
+			if self._stats_reporter:
+				self._stats_reporter.record_match(is_processed)
+
+		async def __maintain_queue_periodically(self):
+			loop = asyncio.get_running_loop()
+
+			while True:
+				await asyncio.sleep(self._queue_watcher.get_maintenance_interval())
+				await loop.run_in_executor(self._db_executor, self._queue_watcher.perform_maintenance)
+
+				if self._stats_reporter:
+					self._stats_reporter.write()
+
+		async def run(self):
+			loop = asyncio.get_running_loop()
+			matches_in_flight = set()
+
+			queue_maintenance = asyncio.create_task(self.__maintain_queue_periodically())
+
+			if self._stats_reporter:
+				self._stats_reporter.write()
+
+			try:
+				await self.__crawl_queue(loop, matches_in_flight)
+			except ParserTerminationError:
+				# The other matches in flight are finished (or fail fast on the requested termination), so that
+				# their acks get flushed by the caller instead of waiting for the leases to run out
+				self.request_stop()
+
+				await asyncio.gather(*matches_in_flight, return_exceptions=True)
+
+				raise
+			finally:
+				queue_maintenance.cancel()
+
+		async def __crawl_queue(self, loop, matches_in_flight):
+			while True:
+				while not self._stop_requested and len(matches_in_flight) < self._max_matches_in_flight:
+					queue_item = await loop.run_in_executor(self._db_executor, self._queue_watcher.acquire_queue_item)
+
+					if not queue_item:
+						self._stop_requested = True
+						break
+
+					matches_in_flight.add(asyncio.create_task(self.__crawl_match(queue_item)))
+
+				if not matches_in_flight:
+					return
+
+				done, _ = await asyncio.wait(matches_in_flight, return_when=asyncio.FIRST_COMPLETED)
+				matches_in_flight.difference_update(done)
+
+				for task in done:
+					task.result()
+
+		def request_stop(self):
+			# The matches in flight are finished, no new ones are taken
+			if not self._stop_requested:
+				print_helper_global.print_message(MessageType.NOTIFICATION,
+												  'Stop requested. Finishing the matches in flight...')
+
+			self._stop_requested = True
+
+		def dispose(self):
+			self._fetch_executor.shutdown(wait=False, cancel_futures=True)
+			self._db_executor.shutdown(wait=False, cancel_futures=True)
+
+
+	def replay_matches(parse_manager, transport):
+		match_ids = transport.get_match_ids()
+		processed_number = 0
+
+		print_helper_global.print_message(MessageType.NOTIFICATION, f'Replaying {len(match_ids)} recorded matches')
+
+		start_time = time.perf_counter()
+
+		for match_id in match_ids:
+			if parse_manager.process_match(match_id):
+				processed_number += 1
+
+		if not parse_manager.flush_staged_matches():
+			return False
+
+		elapsed_time = time.perf_counter() - start_time
+
+		print_helper_global.print_message(MessageType.NOTIFICATION,
+										  f'Replayed {processed_number}/{len(match_ids)} matches in {elapsed_time:.2f} seconds '
+										  f'({safe_divide(len(match_ids), elapsed_time):.1f} matches/s)')
+
+		return True
+
 
 	parser = argparse.ArgumentParser(description='Takes https proxy_server string')
 	parser.add_argument('--proxy_server', type=str, help='proxy server address')
+	parser.add_argument('--proxy_servers', type=str,
+						help='comma separated proxy server addresses, each request goes through the best scored one')
+	parser.add_argument('--player_cache_path', type=str, default='../../DotaAIDB/player_cache.db',
+						help='sqlite file of the player profile cache shared with the predictor')
+	parser.add_argument('--disable_player_cache', action='store_true', help='always fetch player profiles from the API')
+	parser.add_argument('--rate_limiter_state_path', type=str, default='../../DotaAIDB/rate_limiter.db',
+						help='sqlite file of the rate limit buckets shared by the agents running on this machine')
+	parser.add_argument('--database_dsn', type=str,
+						help='libpq connection string of the DB to work against, the shared production DB by default')
+	parser.add_argument('--http_pool_size', type=int, default=10, help='number of kept-alive connections to the API')
+	parser.add_argument('--staging_dir', type=str,
+						help='stage parsed matches as csv files in this dir and COPY them to the DB in bulk')
+	parser.add_argument('--staging_flush_rows', type=int, default=5000,
+						help='number of staged match_stats rows that triggers a COPY to the DB')
+	parser.add_argument('--max_matches_in_flight', type=int, default=3, help='number of matches processed concurrently')
+	parser.add_argument('--queue_lease_seconds', type=int, default=600,
+						help='time after which unprocessed queue items of a silent agent can be claimed by other agents')
+	parser.add_argument('--ack_batch_size', type=int, default=20,
+						help='number of processed queue items acknowledged to the DB at once')
+	parser.add_argument('--ack_flush_seconds', type=int, default=30,
+						help='maximum time a processed queue item waits for its acknowledgement')
+	parser.add_argument('--ack_journal_path', type=str, help='local journal of the not yet acknowledged queue items')
+	parser.add_argument('--checkpoint_dir', type=str, default='match_checkpoints',
+						help='dir of the per-match journals of raw API responses used to resume interrupted matches')
+	parser.add_argument('--checkpoint_max_age_hours', type=int, default=24,
+						help='checkpoints older than this are dropped at startup instead of being resumed')
+	parser.add_argument('--disable_checkpoints', action='store_true', help='do not journal the API responses')
+	parser.add_argument('--unattended', action='store_true', help='exit without waiting for the Enter key')
+	parser.add_argument('--archive_dir', type=str, help='keep the raw API responses in a compressed archive in this dir')
+	parser.add_argument('--replay_source', type=str, choices=['archive', 'fixtures'],
+						help='parse all the recorded matches of --archive_dir or --fixture_dir without calling the API '
+							 'into the --database_dsn DB, or without any DB with --replay_without_db, then exit')
+	parser.add_argument('--replay_without_db', action='store_true',
+						help='replay without connecting to a DB, parsed matches are only kept in --staging_dir if given')
+	parser.add_argument('--fixture_dir', type=str, help='dir of json responses laid out like the API endpoints')
+	parser.add_argument('--stats_path', type=str, help='json file the worker stats and heartbeat are written to')
 
 	args = parser.parse_args()
 
+	if args.replay_source == 'archive' and not args.archive_dir:
+		parser.error('--replay_source archive requires --archive_dir')
+
+	if args.replay_source == 'fixtures' and not args.fixture_dir:
+		parser.error('--replay_source fixtures requires --fixture_dir')
+
+	# Replayed rows overwrite the stored ones, so the shared production DB is never a replay target by default
+	if args.replay_source and not args.database_dsn and not args.replay_without_db:
+		parser.error('--replay_source requires --database_dsn or --replay_without_db')
+
+	set_unattended_mode(args.unattended)
+
+	staging_spool_global = None
+
+	if args.staging_dir:
+		staging_spool_global = MatchStagingSpool(args.staging_dir, args.staging_flush_rows)
+
+	response_archive_global = None
+
+	if args.archive_dir:
+		response_archive_global = ResponseArchive(args.archive_dir)
+
+	if args.replay_source:
+		if args.replay_source == 'archive':
+			transport_global = ArchiveTransport(response_archive_global)
+		else:
+			transport_global = FixtureDirectoryTransport(args.fixture_dir)
+
+		# A replayed match is a reparse of a stored one, its rows are overwritten with the freshly extracted ones
+		parse_manager_global = ParseManager(transport_global, staging_spool_global, database_dsn=args.database_dsn,
+											upsert_records=True, use_database=not args.replay_without_db)
+
+		if not replay_matches(parse_manager_global, transport_global):
+			global_await_exit_action(1)
+
+		global_await_exit_action()
+
 	proxy_server = args.proxy_server
 
-	if proxy_server:
+	proxy_pool_global = None
+
+	if args.proxy_servers:
+		proxy_server = args.proxy_servers
+		proxy_pool_global = ProxyPool([p.strip() for p in args.proxy_servers.split(',') if p.strip()],
+									  lambda pool_proxy: RateLimiter(args.rate_limiter_state_path, bucket_key=pool_proxy))
+
+	player_cache_global = None
+
+	if not args.disable_player_cache:
+		player_cache_global = PlayerProfileCache(args.player_cache_path)
+
+	http_session_global = get_shared_http_session(args.http_pool_size)
+
+	if proxy_pool_global:
+		print_helper_global.print_message(MessageType.NOTIFICATION, f'Using proxy pool: {proxy_server}')
+
+		request_manager_global = RequestManager(player_cache=player_cache_global, http_session=http_session_global,
+												response_archive=response_archive_global, proxy_pool=proxy_pool_global)
+		queue_watcher_global = QueueWatcher(proxy_server, args.queue_lease_seconds, args.ack_batch_size,
+											args.ack_flush_seconds, args.ack_journal_path, args.database_dsn)
+	elif proxy_server:
 		print_helper_global.print_message(MessageType.NOTIFICATION, f'Using proxy server: {proxy_server}')
 		proxies = {'https': proxy_server}
 
-		request_manager_global = RequestManager(proxies)
-		queue_watcher_global = QueueWatcher(proxy_server)
+		# Every proxy has its own quota on the API side, hence a bucket per proxy
+		rate_limiter_global = RateLimiter(args.rate_limiter_state_path, bucket_key=proxy_server)
+
+		request_manager_global = RequestManager(proxies, player_cache_global, rate_limiter_global, http_session_global,
+												response_archive_global)
+		queue_watcher_global = QueueWatcher(proxy_server, args.queue_lease_seconds, args.ack_batch_size,
+											args.ack_flush_seconds, args.ack_journal_path, args.database_dsn)
 	else:
-		request_manager_global = RequestManager()
-		queue_watcher_global = QueueWatcher()
+		rate_limiter_global = RateLimiter(args.rate_limiter_state_path)
+
+		request_manager_global = RequestManager(player_cache=player_cache_global, rate_limiter=rate_limiter_global,
+												http_session=http_session_global, response_archive=response_archive_global)
+		queue_watcher_global = QueueWatcher(lease_seconds=args.queue_lease_seconds, ack_batch_size=args.ack_batch_size,
+											ack_flush_seconds=args.ack_flush_seconds, ack_journal_path=args.ack_journal_path,
+											database_dsn=args.database_dsn)
 
 	time.sleep(3)
 
-	while True:
-		current_match = queue_watcher_global.fetch_agent_queue_item()
+	checkpoint_journal_global = None
 
-		print_helper_global.print_message(MessageType.NOTIFICATION,
-										  f'Starting the processing of the match with ID: {current_match.match_id}')
+	if not args.disable_checkpoints:
+		checkpoint_journal_global = MatchCheckpointJournal(args.checkpoint_dir, args.checkpoint_max_age_hours)
+
+	parse_manager_global = ParseManager(request_manager_global, staging_spool_global, checkpoint_journal_global,
+										args.database_dsn)
+
+	# Leftovers of a previous run go first, their queue items have already been marked as processed
+	if not parse_manager_global.flush_staged_matches():
+		global_await_exit_action(1)
+
+	stats_reporter_global = None
+
+	if args.stats_path:
+		stats_reporter_global = WorkerStatsReporter(args.stats_path, proxy_server, request_manager_global)
+
+	match_crawler_global = MatchCrawler(parse_manager_global, queue_watcher_global, max(1, args.max_matches_in_flight),
+										stats_reporter_global)
+
+	signal.signal(signal.SIGTERM, lambda signum, frame: match_crawler_global.request_stop())
+
+	termination_error = None
+
+	try:
+		asyncio.run(match_crawler_global.run())
+	except ParserTerminationError as e:
+		termination_error = e
+
+	match_crawler_global.dispose()
+	queue_watcher_global.dispose()
+
+	if not parse_manager_global.flush_staged_matches():
+		global_await_exit_action(1)
+
+	parse_manager_global.dispose()
+
+	if termination_error:
+		print_helper_global.print_message(MessageType.ERROR, f'Parser terminated: {termination_error}')
+		global_await_exit_action(1)
 
-		parse_manager = ParseManager(request_manager_global)
-		_ = parse_manager.process_match(current_match.match_id)
-		parse_manager.dispose()
+	print_helper_global.print_message(MessageType.NOTIFICATION, 'Stopped gracefully')
 
 except Exception as e:
 	print_helper_global.print_message(MessageType.ERROR, f'Caught unhandled exception: {e}')
+	global_await_exit_action(1)
 
 global_await_exit_action()
@@ -1,9 +1,16 @@
 import json
+import os
 
+import numpy as np
 import pandas as pd
-import requests
 import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from utils.common import PrintHelper, safe_divide, ranks_to_mmr, MessageType
+from utils.player_cache import PlayerProfileCache
+from utils.rate_limiter import RateLimiter
+from utils.http_session import get_shared_http_session
+from utils.pick_confidence import apply_pick_confidence_scores
 from typing import List
 from joblib import load
 import argparse
@@ -23,7 +30,25 @@ class RequestManager:
 		self._retry_timeout = 15
 		self._pre_request_timeout = 0
 
+		self._http_session = get_shared_http_session(http_pool_size)
+		self._rate_limiter = RateLimiter(rate_limiter_state_path, requests_per_minute=rate_limit_requests_per_minute)
+
+		self._player_cache = None
+
+		if player_cache_path:
+			self._player_cache = PlayerProfileCache(player_cache_path, player_cache_ttl_seconds,
+													player_cache_max_entries)
+
 	def make_api_call(self, api_link):
+		cache_key = PlayerProfileCache.parse_player_endpoint(api_link) if self._player_cache else None
+
+		if cache_key:
+			cached_response = self._player_cache.get(*cache_key)
+
+			if cached_response is not None:
+				print_helper_global.print_message(MessageType.INFO, f'Response to {api_link} is taken from the cache')
+				return cached_response
+
 		retries = 0
 
 		while retries <= self._max_retries:
@@ -35,15 +60,18 @@ class RequestManager:
 												  f'Awaiting {self._pre_request_timeout} seconds as a pre-request timeout')
 				time.sleep(self._pre_request_timeout)
 
-				response = requests.get(api_link)
+				rate_limit_wait_time = self._rate_limiter.acquire()
+
+				if rate_limit_wait_time >= 1:
+					print_helper_global.print_message(MessageType.NOTIFICATION,
+													  f'Waited {rate_limit_wait_time:.1f} seconds for the rate limit window')
 
-				if 'X-Rate-Limit-Remaining-Minute' in response.headers:
-					remaining_req_4_min = int(response.headers['X-Rate-Limit-Remaining-Minute'])
+				response = self._http_session.get(api_link)
 
-					if remaining_req_4_min <= 3:
-						print_helper_global.print_message(MessageType.NOTIFICATION,
-														  f'Exceeded requests/minute threshold. Going to sleep for 60 seconds')
-						time.sleep(60)
+				self._rate_limiter.update_from_headers(response.headers)
+
+				if response.status_code == 429:
+					self._rate_limiter.drain()
 
 				if 'X-Rate-Limit-Remaining-Day' in response.headers:
 					print_helper_global.print_message(MessageType.INFO,
@@ -52,7 +80,12 @@ class RequestManager:
 				if response.status_code == 200:
 					print_helper_global.print_message(MessageType.SUCCESS,
 													  f'Request to {api_link} is complete with status_code: 200')
-					return response.json()
+					response_data = response.json()
+
+					if cache_key:
+						self._player_cache.put(*cache_key, response_data)
+
+					return response_data
 				elif response.status_code != 200:
 					print_helper_global.print_message(MessageType.WARNING,
 													  f'Request to {api_link} failed with status_code: {response.status_code}.')
@@ -82,6 +115,7 @@ class RequestManager:
 class ParseManager:
 	def __init__(self):
 		self._request_manager = RequestManager()
+		self._max_concurrent_requests = max_concurrent_requests
 
 		self._base_url = 'https://api.opendota.com/api'
 
@@ -97,9 +131,21 @@ class ParseManager:
 	def __get_player_heroes_data(self, p_id):
 		return self._request_manager.make_api_call(f'{self._base_url}/players/{p_id}/heroes')
 
-	def __parse_player_totals(self, player_id, dest_data_dict):
-		player_totals_data_dict = self.__get_player_totals_data(player_id)
+	def __fetch_players_data(self, players_data: List[PlayerData]):
+		endpoint_getters = {
+			'totals': self.__get_player_totals_data,
+			'counts': self.__get_player_counts_data,
+			'heroes': self.__get_player_heroes_data
+		}
+
+		with ThreadPoolExecutor(max_workers=self._max_concurrent_requests) as executor:
+			futures = {(player.player_id, endpoint): executor.submit(getter, player.player_id)
+					   for player in players_data for endpoint, getter in endpoint_getters.items()}
+
+		return {key: future.result() for key, future in futures.items()}
 
+	@staticmethod
+	def __parse_player_totals(player_totals_data_dict, dest_data_dict):
 		if not player_totals_data_dict:
 			return False
 
@@ -120,9 +166,8 @@ class ParseManager:
 
 		return True
 
-	def __parse_player_counts(self, player_id, dest_data_dict):
-		player_counts_data_dict = self.__get_player_counts_data(player_id)
-
+	@staticmethod
+	def __parse_player_counts(player_id, player_counts_data_dict, dest_data_dict):
 		if not player_counts_data_dict:
 			return False
 
@@ -162,9 +207,8 @@ class ParseManager:
 											  f'Prediction impossible')
 			return False
 
-	def __parse_player_heroes(self, player_id, hero_id, dest_data_dict):
-		player_heroes = self.__get_player_heroes_data(player_id)
-
+	@staticmethod
+	def __parse_player_heroes(player_heroes, hero_id, dest_data_dict):
 		if not player_heroes:
 			return False
 
@@ -182,6 +226,7 @@ class ParseManager:
 		return True
 
 	def __parse_match_data_stage_one(self, players_data: List[PlayerData], match_data_dict_out):
+		players_api_data = self.__fetch_players_data(players_data)
 
 		for player in players_data:
 			player_match_data_dict = {}
@@ -193,13 +238,15 @@ class ParseManager:
 			player_match_data_dict['player_match_rank_initial'] = player.player_match_rank_initial
 			player_match_data_dict['player_side'] = player.player_side
 
-			if not self.__parse_player_totals(player.player_id, player_match_data_dict):
+			if not self.__parse_player_totals(players_api_data[(player.player_id, 'totals')], player_match_data_dict):
 				return False
 
-			if not self.__parse_player_counts(player.player_id, player_match_data_dict):
+			if not self.__parse_player_counts(player.player_id, players_api_data[(player.player_id, 'counts')],
+											  player_match_data_dict):
 				return False
 
-			if not self.__parse_player_heroes(player.player_id, player.hero_id, player_match_data_dict):
+			if not self.__parse_player_heroes(players_api_data[(player.player_id, 'heroes')], player.hero_id,
+											  player_match_data_dict):
 				return False
 
 			match_data_dict_out['players'].append(player_match_data_dict)
@@ -213,74 +260,106 @@ class ParseManager:
 
 	@staticmethod
 	def __parse_match_data_stage_two(match_data_dict):
-		def handle_pick_conf_coef(winrate, total_played):
-			if winrate != -1. and total_played > 10:
-				temp = winrate * 100
-
-				if temp < 20:
-					return -2
-				elif 20 <= temp <= 45:
-					return -1
-				elif 80 >= temp >= 55:
-					return 1
-				elif temp > 80:
-					return 2
-				else:
-					return 0
-			else:
-				return 0
-
 		for player in match_data_dict['players']:
 			player['player_q_mmr_diff'] = (sum(ranks_to_mmr[player['player_match_rank_initial']])
 										   / 2 - match_data_dict['average_match_mmr'])
 
-			player_id, hero_id, player_side = player['player_id'], player['hero_id'], player['player_side']
-			player_heroes = player['player_heroes']
+		apply_pick_confidence_scores(match_data_dict['players'])
+
+	def process_match(self, players_data):
+		print_helper_mandatory.print_message(MessageType.NOTIFICATION, 'Gathering statistical data.')
+
+		res_dict = {'players': []}
+
+		if not self.__parse_match_data_stage_one(players_data, res_dict):
+			return False
 
-			player_heroes_pick_confidence_score_allies = 0
-			player_heroes_pick_confidence_score_enemies = 0
+		self.__parse_match_data_stage_two(res_dict)
 
-			for p in match_data_dict['players']:
-				if p['player_id'] != player_id:
-					ph_dict = next((d for d in player_heroes if d['hero_id'] == p['hero_id']), None)
+		return res_dict
 
-					if p['player_side'] == player_side:
-						games_with_total = ph_dict['with_games']
-						games_with_won = ph_dict['with_win']
 
-						hero_with_winrate = float(safe_divide(games_with_won, games_with_total))
+class HeroTable:
+	def __init__(self, csv_path='heroes_table.csv', cache_path='heroes_table.npz'):
+		self._csv_path = csv_path
+		self._cache_path = cache_path
+
+		self.rank_groups = ['average', 'up_to_crusader', 'archon', 'legend', 'ancient', 'divine_immortal']
+		self._rank_group_index = {rank_group: idx for idx, rank_group in enumerate(self.rank_groups)}
+		self.average_rank_group_index = self._rank_group_index['average']
+		self._rank_aliases = {
+			'herald': 'up_to_crusader',
+			'guardian': 'up_to_crusader',
+			'crusader': 'up_to_crusader',
+			'divine': 'divine_immortal',
+			'immortal': 'divine_immortal'
+		}
 
-						player_heroes_pick_confidence_score_allies += handle_pick_conf_coef(hero_with_winrate,
-																							games_with_total)
-					else:
-						games_against_total = ph_dict['against_games']
-						games_against_won = ph_dict['against_win']
+		# rates[hero_id, rank_group] -> [pickrate, winrate]; rows of unknown hero ids are NaN
+		self.rates = None
+		self._known_heroes = None
 
-						hero_against_winrate = float(safe_divide(games_against_won, games_against_total))
+		self.__load()
 
-						player_heroes_pick_confidence_score_enemies += handle_pick_conf_coef(hero_against_winrate,
-																							 games_against_total)
+	def __get_csv_signature(self):
+		csv_stat = os.stat(self._csv_path)
 
-					p['player_heroes_pick_confidence_score_allies'] = player_heroes_pick_confidence_score_allies
-					p['player_heroes_pick_confidence_score_enemies'] = player_heroes_pick_confidence_score_enemies
+		return np.array([csv_stat.st_mtime_ns, csv_stat.st_size], dtype='int64')
 
-	def process_match(self, players_data):
-		print_helper_mandatory.print_message(MessageType.NOTIFICATION, 'Gathering statistical data.')
+	def __load(self):
+		csv_signature = self.__get_csv_signature()
 
-		res_dict = {'players': []}
+		if os.path.exists(self._cache_path):
+			try:
+				with np.load(self._cache_path) as cache:
+					if np.array_equal(cache['csv_signature'], csv_signature):
+						self.rates = cache['rates']
+						self._known_heroes = cache['known_heroes']
+						return
+			except (OSError, ValueError, KeyError) as e:
+				print_helper_global.print_message(MessageType.WARNING, f'Heroes table cache is unreadable ({e}). Rebuilding')
 
-		if not self.__parse_match_data_stage_one(players_data, res_dict):
-			return False
+		self.__build_from_csv()
+		self.__dump_cache(csv_signature)
 
-		self.__parse_match_data_stage_two(res_dict)
+	def __build_from_csv(self):
+		df_heroes = pd.read_csv(self._csv_path)
+		hero_ids = df_heroes['hero_id'].to_numpy(dtype='int64')
 
-		return res_dict
+		self.rates = np.full((hero_ids.max() + 1, len(self.rank_groups), 2), np.nan)
+		self._known_heroes = np.zeros(hero_ids.max() + 1, dtype=bool)
+
+		for rank_group_idx, rank_group in enumerate(self.rank_groups):
+			self.rates[hero_ids, rank_group_idx, 0] = df_heroes[f'hero_pickrate_{rank_group}'].to_numpy(dtype='float64')
+			self.rates[hero_ids, rank_group_idx, 1] = df_heroes[f'hero_winrate_{rank_group}'].to_numpy(dtype='float64')
+
+		self._known_heroes[hero_ids] = True
+
+	def __dump_cache(self, csv_signature):
+		temp_cache_path = f'{self._cache_path}.{os.getpid()}.tmp'
+
+		try:
+			with open(temp_cache_path, 'wb') as f:
+				np.savez(f, rates=self.rates, known_heroes=self._known_heroes, csv_signature=csv_signature)
+
+			os.replace(temp_cache_path, self._cache_path)
+		except OSError as e:
+			print_helper_global.print_message(MessageType.WARNING, f'Failed saving the heroes table cache: {e}')
+
+	def contains(self, hero_id):
+		return 0 <= hero_id < len(self._known_heroes) and bool(self._known_heroes[hero_id])
+
+	def get_rank_group_index(self, player_rank):
+		rank_name = player_rank.split(' ')[0].lower()
+
+		return self._rank_group_index[self._rank_aliases.get(rank_name, rank_name)]
 
 
 class DataProcessor:
 	def __init__(self):
 		self._parse_manager = ParseManager()
 		self._player_ranks_to_mmr_dict = ranks_to_mmr.copy()
+		self._hero_table = HeroTable()
 
 		self._aggregation_rules = {
 			'player_q_mmr_diff': 'sum',
@@ -304,11 +383,7 @@ class DataProcessor:
 			'hero_pickrate_average': 'mean',
 			'hero_winrate_average': 'mean',
 			'hero_pickrate_for_rank': 'mean',
-			'hero_winrate_for_rank': 'mean',
-			'player_match_rank_initial': lambda x: list(x),
-			'player_id': lambda x: list(x),
-			'hero_id': lambda x: list(x),
-			'player_side': 'first'
+			'hero_winrate_for_rank': 'mean'
 		}
 
 		self._column_mapping = {
@@ -333,11 +408,7 @@ class DataProcessor:
 			'hero_pickrate_average': 'team_heroes_pickrate_average_mean',
 			'hero_winrate_average': 'team_heroes_winrate_average_mean',
 			'hero_pickrate_for_rank': 'team_heroes_pickrate_for_rank_mean',
-			'hero_winrate_for_rank': 'team_heroes_winrate_for_rank_mean',
-			'player_match_rank_initial': 'team_players_match_ranks_initial',
-			'player_id': 'team_players_id_list',
-			'hero_id': 'team_heroes_id_list',
-			'player_side': 'team_side'
+			'hero_winrate_for_rank': 'team_heroes_winrate_for_rank_mean'
 		}
 
 		self._columns_to_subtract = ['team_q_mmr_diff_sum', 'team_heroes_winrate_overall_mean',
@@ -356,6 +427,13 @@ class DataProcessor:
 							   'team_heroes_winrate_average_mean', 'team_heroes_pickrate_for_rank_mean',
 							   'team_heroes_winrate_for_rank_mean']
 
+		# Fixed layout of the per-player feature matrix: one column per feature, ordered as the model expects them
+		team_columns_to_player_columns = {team_col: player_col for player_col, team_col in self._column_mapping.items()}
+		self._player_feature_columns = [team_columns_to_player_columns[col] for col in self._columns_to_subtract]
+		self._feature_index = {column: idx for idx, column in enumerate(self._player_feature_columns)}
+		self._mean_features_mask = np.array(
+			[self._aggregation_rules[col] == 'mean' for col in self._player_feature_columns])
+
 	def __transform_to_mmr(self, player_rank):
 		return sum(self._player_ranks_to_mmr_dict[player_rank]) / 2
 
@@ -367,90 +445,282 @@ class DataProcessor:
 		if not match_data_raw:
 			raise Exception("Failed gathering players' data")
 
-		df = pd.DataFrame(match_data_raw['players'])
-		df = df.drop(columns=['player_heroes'])
+		result_dire, result_radiant = self.transform_match_data(match_data_raw)
 
-		df_heroes = pd.read_csv('heroes_table.csv')
+		return self.__to_features_frame([result_dire], [1]), self.__to_features_frame([result_radiant], [1])
 
-		df = pd.merge(df, df_heroes, on='hero_id', how='inner')
+	def process_data_batch(self, matches_players_data_raw):
+		# A match that fails is skipped with its error recorded, the rest of the batch is still processed
+		results_dire, results_radiant, match_ids = [], [], []
+		errors = [None] * len(matches_players_data_raw)
 
-		df['player_side'] = df['player_side'].astype('category')
-		df['player_match_rank_initial'] = df['player_match_rank_initial'].astype('category')
+		for match_idx, players_data_raw in enumerate(matches_players_data_raw):
+			try:
+				match_data_raw = self._parse_manager.process_match(players_data_raw)
 
-		df['player_match_rank_initial_mmr'] = df['player_match_rank_initial'].apply(self.__transform_to_mmr)
-		df['player_match_rank_initial_mmr'] = df['player_match_rank_initial_mmr'].astype('float64')
+				if not match_data_raw:
+					raise Exception("Failed gathering players' data")
 
-		winrate_columns = [col for col in df.columns if 'winrate' in col.lower() and 'hero' not in col.lower()]
-		pickrate_columns = [col for col in df.columns if 'pickrate' in col.lower() and 'hero' not in col.lower()]
+				result_dire, result_radiant = self.transform_match_data(match_data_raw)
 
-		df[winrate_columns] *= 100
-		df[pickrate_columns] *= 100
+				if not (np.isfinite(result_dire).all() and np.isfinite(result_radiant).all()):
+					raise Exception('Match features could not be computed')
+			except Exception as e:
+				print_helper_mandatory.print_message(MessageType.WARNING,
+													 f'Failed processing match #{match_idx}: {e}. Skipping')
+				errors[match_idx] = str(e)
+				continue
+
+			results_dire.append(result_dire)
+			results_radiant.append(result_radiant)
+			match_ids.append(match_idx)
+
+		print_helper_mandatory.print_message(MessageType.NOTIFICATION,
+											 f'Processed {len(results_dire)}/{len(matches_players_data_raw)} matches')
+
+		if not results_dire:
+			return None, None, errors
+
+		return (self.__to_features_frame(results_dire, match_ids),
+				self.__to_features_frame(results_radiant, match_ids), errors)
+
+	def __to_features_frame(self, features_rows, match_ids):
+		return pd.DataFrame(np.vstack(features_rows), columns=self._columns_to_subtract,
+							index=pd.Index(match_ids, name='match_id'))
+
+	def __build_players_features(self, players):
+		players_features = np.empty((len(players), len(self._player_feature_columns)), dtype='float64')
+
+		for row_idx, player in enumerate(players):
+			players_features[row_idx] = (
+				player['player_q_mmr_diff'],
+				player['player_hero_winrate_overall'] * 100,
+				player['player_hero_total_matches_played'],
+				player['dire_winrate_all_time'] * 100,
+				player['dire_games_played_all_time'],
+				player['radiant_winrate_all_time'] * 100,
+				player['radiant_games_played_all_time'],
+				player['player_heroes_pick_confidence_score_allies'],
+				player['player_heroes_pick_confidence_score_enemies'],
+				player['player_heroes_pick_confidence_score_allies'] + player['player_heroes_pick_confidence_score_enemies'],
+				player['player_time_played_all_matches'],
+				player['player_winrate_over_time'] * 100,
+				player['player_all_matches_played_number'],
+				player['player_matches_abandoned'],
+				player['player_matches_lost'],
+				player['player_matches_won'],
+				self.__transform_to_mmr(player['player_match_rank_initial']),
+				player['player_kda_average_all_matches'],
+				0., 0., 0., 0.
+			)
+
+		abandonment_rate_idx = self._feature_index['player_matches_abandonment_rate']
+		all_matches_played_idx = self._feature_index['player_all_matches_played_number']
+
+		players_features[:, abandonment_rate_idx] = (players_features[:, abandonment_rate_idx] /
+													 players_features[:, all_matches_played_idx]) * 100
+
+		return players_features
+
+	def __fill_hero_rates(self, players, players_features):
+		heroes_rates = self._hero_table.rates[[player['hero_id'] for player in players]]
+		average_group_idx = self._hero_table.average_rank_group_index
+
+		q_mmr_diffs = players_features[:, self._feature_index['player_q_mmr_diff']]
+		closest_player_rank = players[int(np.argmin(np.abs(q_mmr_diffs)))]['player_match_rank_initial']
+		rank_group_idx = self._hero_table.get_rank_group_index(closest_player_rank)
+
+		players_features[:, self._feature_index['hero_pickrate_average']] = heroes_rates[:, average_group_idx, 0]
+		players_features[:, self._feature_index['hero_winrate_average']] = heroes_rates[:, average_group_idx, 1]
+		players_features[:, self._feature_index['hero_pickrate_for_rank']] = heroes_rates[:, rank_group_idx, 0]
+		players_features[:, self._feature_index['hero_winrate_for_rank']] = heroes_rates[:, rank_group_idx, 1]
+
+	def __aggregate_teams_features(self, teams_features):
+		# Compensated (Kahan) summation in players' order with NaNs skipped, mirroring pandas' groupby sum/mean kernels.
+		# teams_features is NaN-padded to (teams, players, features) so both teams are reduced at once
+		teams_number, _, features_number = teams_features.shape
+
+		sums = np.zeros((teams_number, features_number))
+		compensation = np.zeros((teams_number, features_number))
+		observations = np.zeros((teams_number, features_number))
+
+		for player_idx in range(teams_features.shape[1]):
+			players_features = teams_features[:, player_idx]
+			is_observed = ~np.isnan(players_features)
+
+			y = players_features - compensation
+			t = sums + y
+			new_compensation = t - sums - y
+			new_compensation[np.isnan(new_compensation)] = 0
+
+			compensation = np.where(is_observed, new_compensation, compensation)
+			sums = np.where(is_observed, t, sums)
+			observations += is_observed
+
+		return np.where(self._mean_features_mask, sums / observations, sums)
+
+	def transform_match_data(self, match_data_raw):
+		players = [p for p in match_data_raw['players'] if self._hero_table.contains(p['hero_id'])]
+
+		with np.errstate(divide='ignore', invalid='ignore'):
+			players_features = self.__build_players_features(players)
+			self.__fill_hero_rates(players, players_features)
+
+			is_dire = np.array([p['player_side'] == 'Dire' for p in players])
+			dire_players_number, radiant_players_number = int(is_dire.sum()), int((~is_dire).sum())
 
-		df['player_hero_winrate_overall'] *= 100
+			teams_features = np.full((2, max(dire_players_number, radiant_players_number), players_features.shape[1]),
+									 np.nan)
+			teams_features[0, :dire_players_number] = players_features[is_dire]
+			teams_features[1, :radiant_players_number] = players_features[~is_dire]
 
-		closest_player_idx = df['player_q_mmr_diff'].abs().idxmin()
-		closest_player_rank = df.loc[closest_player_idx, 'player_match_rank_initial'].split(' ')[0]
+			team_dire, team_radiant = self.__aggregate_teams_features(teams_features)
+
+		return team_dire - team_radiant, team_radiant - team_dire
 
-		if closest_player_rank.lower() in ['herald', 'guardian', 'crusader']:
-			closest_player_rank = 'up_to_crusader'
 
-		pickrate_column = f'hero_pickrate_{closest_player_rank.lower()}'
-		winrate_column = f'hero_winrate_{closest_player_rank.lower()}'
+class MatchResultPredictor:
+	def __init__(self):
+		self._rf_model = load('random_forest_model.joblib')
+		self._lr_model = load('logistic_regression_model.joblib')
 
-		df['hero_pickrate_for_rank'] = df[pickrate_column]
-		df['hero_winrate_for_rank'] = df[winrate_column]
+		self._data_processor = DataProcessor()
 
-		df['player_heroes_pick_confidence_score_total'] = (df['player_heroes_pick_confidence_score_allies'] +
-														  df['player_heroes_pick_confidence_score_enemies'])
-		df['player_matches_abandonment_rate'] = (df['player_matches_abandoned'] / df[
-			'player_all_matches_played_number']) * 100
+	def predict(self, raw_data):
+		data_dire, data_radiant = self._data_processor.process_data(raw_data)
 
-		df.reset_index(drop=True, inplace=True)
+		print_helper_mandatory.print_message(MessageType.NOTIFICATION, 'Evaluating probabilities...')
 
-		df = df.groupby(['player_side'], as_index=False, observed=False).agg(self._aggregation_rules)
+		return self.__evaluate_probabilities(data_dire, data_radiant)[0]
 
-		df.rename(columns=self._column_mapping, inplace=True)
+	def predict_batch(self, raw_data_list):
+		# Returns the results and the errors of the matches, a failed match has a None result and its error recorded
+		data_dire, data_radiant, errors = self._data_processor.process_data_batch(raw_data_list)
 
-		exclude_columns = ['team_players_match_ranks_initial', 'team_players_id_list', 'team_heroes_id_list']
+		results = [None] * len(raw_data_list)
 
-		df.reset_index()
-		df = df.drop(columns=exclude_columns)
+		if data_dire is None:
+			return results, errors
 
-		df['match_id'] = 1
-		df_dire = df[df['team_side'] == 'Dire']
-		df_radiant = df[df['team_side'] == 'Radiant']
+		print_helper_mandatory.print_message(MessageType.NOTIFICATION,
+											 f'Evaluating probabilities for {len(data_dire)} matches...')
 
-		result_dire = (df_dire.set_index('match_id')[self._columns_to_subtract] -
-					   df_radiant.set_index('match_id')[self._columns_to_subtract])
-		result_radiant = (df_radiant.set_index('match_id')[self._columns_to_subtract] -
-						  df_dire.set_index('match_id')[self._columns_to_subtract])
+		for match_idx, result in zip(data_dire.index, self.__evaluate_probabilities(data_dire, data_radiant)):
+			results[match_idx] = result
 
-		return result_dire, result_radiant
+		return results, errors
 
+	def __evaluate_probabilities(self, data_dire, data_radiant):
+		# Dire and Radiant rows are stacked so that each model is invoked exactly once per call
+		data_stacked = pd.concat([data_dire, data_radiant])
+		matches_number = len(data_dire)
 
-class MatchResultPredictor:
-	def __init__(self):
-		self._rf_model = load('random_forest_model.joblib')
-		self._lr_model = load('logistic_regression_model.joblib')
+		res_rf = self._rf_model.predict_proba(data_stacked)
+		res_lr = self._lr_model.predict_proba(data_stacked)
 
-		self._data_processor = DataProcessor()
+		res_rf_dire, res_rf_radiant = res_rf[:matches_number], res_rf[matches_number:]
+		res_lr_dire, res_lr_radiant = res_lr[:matches_number], res_lr[matches_number:]
 
-	def predict(self, raw_data):
-		data_dire, data_radiant = self._data_processor.process_data(raw_data)
+		radiant_win_prediction_percs = 100 * ((res_rf_dire[:, 0] + res_lr_dire[:, 0] +
+											   res_rf_radiant[:, 1] + res_lr_radiant[:, 1]) / 4)
 
-		print_helper_mandatory.print_message(MessageType.NOTIFICATION, 'Evaluating probabilities...')
+		results = []
+
+		for radiant_win_prediction_perc in radiant_win_prediction_percs:
+			output_class = bool(radiant_win_prediction_perc > 50.0)
+			output_confidence_score = radiant_win_prediction_perc if output_class else 100 - radiant_win_prediction_perc
+
+			results.append([output_class, round(float(output_confidence_score), 4)])
 
-		res_rf_dire = self._rf_model.predict_proba(data_dire)[0]
-		res_lr_dire = self._lr_model.predict_proba(data_dire)[0]
+		return results
 
-		res_rf_radiant = self._rf_model.predict_proba(data_radiant)[0]
-		res_lr_radiant = self._lr_model.predict_proba(data_radiant)[0]
 
-		radiant_win_prediction_perc = 100 * (sum([res_rf_dire[0], res_lr_dire[0], res_rf_radiant[1], res_lr_radiant[1]]) / 4)
-		output_class = radiant_win_prediction_perc > 50.0
-		output_confidence_score = radiant_win_prediction_perc if output_class else 100 - radiant_win_prediction_perc
+class PredictionRequestHandler(BaseHTTPRequestHandler):
+	def do_GET(self):
+		if self.path == '/health':
+			self.__send_json_response(200, {'status': 'ok'})
+		else:
+			self.__send_json_response(404, {'error': f'Unknown endpoint: {self.path}'})
+
+	def do_POST(self):
+		if self.path not in ('/predict', '/predict_batch'):
+			self.__send_json_response(404, {'error': f'Unknown endpoint: {self.path}'})
+			return
+
+		try:
+			content_length = int(self.headers.get('Content-Length', 0))
+			request_data = json.loads(self.rfile.read(content_length))
 
-		return [output_class, round(output_confidence_score, 4)]
+			if self.path == '/predict':
+				players_data = [PlayerData(*row.values()) for row in request_data]
+			else:
+				matches_data = [[PlayerData(*row.values()) for row in match] for match in request_data]
+		except (ValueError, TypeError, AttributeError) as e:
+			self.__send_json_response(400, {'error': f'Invalid request body: {e}'})
+			return
+
+		match_predictor = self.server.match_predictor
+
+		try:
+			if self.path == '/predict':
+				is_radiant_win, radiant_win_perc = match_predictor.predict(players_data)
+
+				response_data = {'radiant_win': is_radiant_win, 'confidence': radiant_win_perc}
+			else:
+				batch_results, batch_errors = match_predictor.predict_batch(matches_data)
+
+				response_data = [{'error': error} if res is None else {'radiant_win': res[0], 'confidence': res[1]}
+								 for res, error in zip(batch_results, batch_errors)]
+		except Exception as e:
+			print_helper_mandatory.print_message(MessageType.ERROR, f'Processing failed with error: {e}')
+			self.__send_json_response(500, {'error': str(e)})
+			return
+
+		self.__send_json_response(200, response_data)
+
+	def __send_json_response(self, status_code, data):
+		response_body = json.dumps(data).encode('utf-8')
+
+		self.send_response(status_code)
+		self.send_header('Content-Type', 'application/json')
+		self.send_header('Content-Length', str(len(response_body)))
+		self.end_headers()
+
+		self.wfile.write(response_body)
+
+	def log_message(self, format, *args):
+		print_helper_global.print_message(MessageType.INFO, f'{self.address_string()} - {format % args}')
+
+
+class PredictionServer:
+	def __init__(self, match_predictor, host, port):
+		self._http_server = ThreadingHTTPServer((host, port), PredictionRequestHandler)
+		self._http_server.match_predictor = match_predictor
+
+	def serve(self):
+		host, port = self._http_server.server_address[:2]
+
+		print_helper_mandatory.print_message(MessageType.NOTIFICATION, f'Prediction server is listening on {host}:{port}')
+
+		try:
+			self._http_server.serve_forever()
+		except KeyboardInterrupt:
+			print_helper_mandatory.print_message(MessageType.NOTIFICATION, 'Prediction server is shutting down')
+		finally:
+			self._http_server.server_close()
+
+
+def read_matches_players_data(batch_filepath):
+	matches_players_data = []
+
+	with open(batch_filepath, 'r', encoding='utf-8') as f:
+		for line in f:
+			if not line.strip():
+				continue
+
+			matches_players_data.append([PlayerData(*row.values()) for row in json.loads(line)])
+
+	return matches_players_data
 
 
 with open('predictor_config.json', 'r', encoding='utf-8') as f:
@@ -458,20 +728,55 @@ with open('predictor_config.json', 'r', encoding='utf-8') as f:
 
 filepath = config['filepath']
 debug_enabled = config['enable_debug']
+max_concurrent_requests = config['max_concurrent_requests']
+player_cache_path = config['player_cache_path']
+player_cache_ttl_seconds = config['player_cache_ttl_seconds']
+player_cache_max_entries = config['player_cache_max_entries']
+rate_limiter_state_path = config['rate_limiter_state_path']
+rate_limit_requests_per_minute = config['rate_limit_requests_per_minute']
+http_pool_size = config['http_pool_size']
+server_host = config['server_host']
+server_port = config['server_port']
 
 print_helper_global = PrintHelper(False, debug_enabled)
 print_helper_mandatory = PrintHelper(False, True)
 
-try:
-	with open(filepath, 'r', encoding='utf-8') as f:
-		players_data_raw = json.load(f)
+arg_parser = argparse.ArgumentParser(description='Predicts the outcome of Dota 2 matches')
+arg_parser.add_argument('--batch_filepath', type=str,
+						help='JSON-lines file with one match (list of 10 players) per line')
+arg_parser.add_argument('--serve', action='store_true',
+						help='keep the models loaded and answer predictions over HTTP')
 
-	players_data = [PlayerData(*row.values()) for row in players_data_raw]
+args = arg_parser.parse_args()
 
+try:
 	match_predictor = MatchResultPredictor()
 
-	is_radiant_win, radiant_win_perc = match_predictor.predict(players_data)
+	if args.serve:
+		PredictionServer(match_predictor, server_host, server_port).serve()
+	elif args.batch_filepath:
+		matches_data = read_matches_players_data(args.batch_filepath)
+
+		batch_results, batch_errors = match_predictor.predict_batch(matches_data)
+
+		for idx, (batch_result, batch_error) in enumerate(zip(batch_results, batch_errors)):
+			if batch_result is None:
+				print_helper_mandatory.print_message(MessageType.WARNING,
+													 f'Match #{idx}: prediction impossible: {batch_error}')
+				continue
+
+			is_radiant_win, radiant_win_perc = batch_result
+
+			print_helper_mandatory.print_message(MessageType.SUCCESS,
+												 f'Match #{idx}: RadiantWin: {is_radiant_win}. Confidence: {radiant_win_perc}%')
+	else:
+		with open(filepath, 'r', encoding='utf-8') as f:
+			players_data_raw = json.load(f)
+
+		players_data = [PlayerData(*row.values()) for row in players_data_raw]
+
+		is_radiant_win, radiant_win_perc = match_predictor.predict(players_data)
 
-	print_helper_mandatory.print_message(MessageType.SUCCESS, f'RadiantWin: {is_radiant_win}. Confidence: {radiant_win_perc}%')
+		print_helper_mandatory.print_message(MessageType.SUCCESS, f'RadiantWin: {is_radiant_win}. Confidence: {radiant_win_perc}%')
 except Exception as e:
 	print_helper_mandatory.print_message(MessageType.ERROR, f'Processing failed with error: {e}')
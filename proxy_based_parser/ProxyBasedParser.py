@@ -1,28 +1,276 @@
+import argparse
+import json
+import os
+import random
+import signal
 import subprocess
+import sys
 import time
-import psutil
 
+from utils.common import PrintHelper, MessageType
 
-def run_parse_with_proxy():
-	proxies = ['35.185.196.38:3128', '195.154.184.80:8080']
 
-	main_parser_path = 'D:/DotaPredictionsAI/dist/OpenDotaParser.exe'
+print_helper_global = PrintHelper(False)
 
-	command = f'cmd.exe /K {main_parser_path} --proxy_server {proxies[0]}'
+repo_root_path = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
 
-	subprocess.Popen(command, creationflags=subprocess.CREATE_NEW_CONSOLE)
 
-	time.sleep(60 * 60 * 2)  # 2 hours
+class ParserWorker:
+	def __init__(self, worker_id, proxy_server, config):
+		self.worker_id = worker_id
+		self.proxy_server = proxy_server
 
-	with open('process_to_terminate.txt', 'r') as file:
-		pid = int(file.readline())
+		self._config = config
+		self._process = None
+		self._log_file = None
 
-	proc = psutil.Process(pid)
-	proc.terminate()
+		stats_dir = os.path.abspath(config['stats_dir'])
+		self._stats_path = os.path.join(stats_dir, f'worker_{worker_id}.json')
+		self._log_path = os.path.join(stats_dir, f'worker_{worker_id}.log')
 
-	time.sleep(10)
+		# A worker flushes and clears its staged rows and prunes its checkpoints, so none of them can be shared
+		self._checkpoint_dir = os.path.join(os.path.abspath(config['checkpoint_dir']), f'worker_{worker_id}')
+		self._staging_dir = None
 
-	run_parse_with_proxy()
+		if config.get('staging_dir'):
+			self._staging_dir = os.path.join(os.path.abspath(config['staging_dir']), f'worker_{worker_id}')
 
-time.sleep(60 * 20)
-run_parse_with_proxy()
\ No newline at end of file
+		self.started_at = None
+		self.rotate_at = None
+		self.stop_requested_at = None
+		self.stop_reason = None
+
+		self.restarts_number = 0
+		self.consecutive_failures_number = 0
+		self.next_start_at = 0
+
+		# Totals of the previous processes of this worker, the stats file only covers the current one
+		self.previous_totals = {'matches_processed': 0, 'matches_failed': 0, 'requests_made': 0}
+		self.previous_uptime_seconds = 0
+
+	def start(self):
+		if os.path.exists(self._stats_path):
+			os.remove(self._stats_path)
+
+		command = [sys.executable, 'OpenDotaParser.py', '--proxy_server', self.proxy_server, '--unattended',
+				   '--stats_path', self._stats_path, '--checkpoint_dir', self._checkpoint_dir]
+
+		if self._staging_dir:
+			command += ['--staging_dir', self._staging_dir]
+
+		command += self._config['parser_args']
+
+		environment = dict(os.environ)
+		environment['PYTHONPATH'] = os.pathsep.join(filter(None, [repo_root_path, environment.get('PYTHONPATH')]))
+
+		# A session of its own keeps Ctrl+C in the supervisor's terminal from reaching the worker directly
+		self._log_file = open(self._log_path, 'a')
+		self._process = subprocess.Popen(command, cwd=os.path.abspath(self._config['parser_dir']), env=environment,
+										 stdin=subprocess.DEVNULL, stdout=self._log_file, stderr=subprocess.STDOUT,
+										 start_new_session=True)
+
+		# Rotations are spread out so that the workers do not restart all at once
+		rotation_interval = self._config['rotation_interval_seconds']
+
+		self.started_at = time.time()
+		self.rotate_at = self.started_at + rotation_interval * random.uniform(1., 1.1)
+		self.stop_requested_at = None
+		self.stop_reason = None
+
+		print_helper_global.print_message(MessageType.NOTIFICATION,
+										  f'Worker {self.worker_id} started with proxy {self.proxy_server} '
+										  f'(pid: {self._process.pid})')
+
+	def is_running(self):
+		return self._process is not None and self._process.poll() is None
+
+	def get_pid(self):
+		return self._process.pid if self._process else None
+
+	def read_stats(self):
+		try:
+			with open(self._stats_path, 'r') as file:
+				return json.load(file)
+		except (OSError, ValueError):
+			return None
+
+	def get_heartbeat_age(self, now):
+		stats = self.read_stats()
+		last_heartbeat = stats['updated_at'] if stats else self.started_at
+
+		return now - max(last_heartbeat, self.started_at)
+
+	def get_progress_age(self, now):
+		# The heartbeat is written on a timer, a worker stuck on a dead proxy keeps it fresh without doing any work
+		stats = self.read_stats()
+		last_progress = stats.get('progress_at', stats['updated_at']) if stats else self.started_at
+
+		return now - max(last_progress, self.started_at)
+
+	def request_stop(self, reason):
+		if self.stop_requested_at is not None or not self.is_running():
+			return
+
+		print_helper_global.print_message(MessageType.NOTIFICATION,
+										  f'Stopping worker {self.worker_id} ({self.proxy_server}): {reason}')
+
+		self.stop_requested_at = time.time()
+		self.stop_reason = reason
+		self._process.send_signal(signal.SIGTERM)
+
+	def kill(self):
+		print_helper_global.print_message(MessageType.WARNING,
+										  f'Worker {self.worker_id} ({self.proxy_server}) did not stop in time. Killing it')
+		self._process.kill()
+
+	def collect_exited_process(self):
+		exit_code = self._process.returncode
+		stats = self.read_stats()
+
+		if stats:
+			for key in self.previous_totals:
+				self.previous_totals[key] += stats[key]
+
+		self.previous_uptime_seconds += time.time() - self.started_at
+
+		self._process = None
+		self._log_file.close()
+
+		return exit_code
+
+
+class WorkerSupervisor:
+	def __init__(self, config):
+		for per_worker_arg in ('--stats_path', '--checkpoint_dir', '--staging_dir', '--ack_journal_path'):
+			if per_worker_arg in config['parser_args']:
+				raise ValueError(f'{per_worker_arg} is set for every worker by the supervisor and cannot be in parser_args')
+
+		self._config = config
+		self._workers = [ParserWorker(worker_id, proxy_server, config)
+						 for worker_id, proxy_server in enumerate(config['proxies'])]
+
+		self._shutdown_requested = False
+
+		os.makedirs(config['stats_dir'], exist_ok=True)
+
+	def request_shutdown(self):
+		self._shutdown_requested = True
+
+		for worker in self._workers:
+			worker.request_stop('supervisor shutdown')
+
+	def __schedule_restart(self, worker, exit_code, now):
+		was_requested = worker.stop_reason is not None
+		worker.restarts_number += 1
+
+		if was_requested or exit_code == 0:
+			worker.consecutive_failures_number = 0
+			worker.next_start_at = now + self._config['restart_delay_seconds']
+		else:
+			# Crashing workers are retried with an exponential backoff
+			worker.consecutive_failures_number += 1
+			worker.next_start_at = now + min(
+				self._config['restart_delay_seconds'] * 2 ** worker.consecutive_failures_number,
+				self._config['max_restart_delay_seconds'])
+
+		if not was_requested:
+			print_helper_global.print_message(MessageType.WARNING,
+											  f'Worker {worker.worker_id} ({worker.proxy_server}) exited with code '
+											  f'{exit_code}. Restarting in {worker.next_start_at - now:.0f} seconds')
+
+	def __check_worker(self, worker, now):
+		if worker.is_running():
+			if worker.stop_requested_at is not None:
+				if now - worker.stop_requested_at > self._config['stop_grace_seconds']:
+					worker.kill()
+			elif worker.get_progress_age(now) > self._config['heartbeat_timeout_seconds']:
+				worker.request_stop('no progress within the heartbeat timeout')
+			elif now >= worker.rotate_at:
+				worker.request_stop('rotation')
+
+			return
+
+		if worker.get_pid() is not None:
+			exit_code = worker.collect_exited_process()
+
+			if not self._shutdown_requested:
+				self.__schedule_restart(worker, exit_code, now)
+
+		if not self._shutdown_requested and now >= worker.next_start_at:
+			worker.start()
+
+	def __build_worker_stats(self, worker, now):
+		stats = worker.read_stats() if worker.is_running() else None
+		totals = {key: value + (stats[key] if stats else 0) for key, value in worker.previous_totals.items()}
+
+		uptime_seconds = worker.previous_uptime_seconds + (now - worker.started_at if worker.is_running() else 0)
+		matches_per_hour = totals['matches_processed'] / uptime_seconds * 3600 if uptime_seconds else 0
+
+		if not worker.is_running():
+			status = 'stopped' if self._shutdown_requested else 'waiting_for_restart'
+		elif worker.stop_requested_at is not None:
+			status = 'stopping'
+		else:
+			status = 'running'
+
+		return {
+			'status': status,
+			'pid': worker.get_pid(),
+			'restarts': worker.restarts_number,
+			'uptime_seconds': round(uptime_seconds),
+			'heartbeat_age_seconds': round(worker.get_heartbeat_age(now)) if worker.is_running() else None,
+			'progress_age_seconds': round(worker.get_progress_age(now)) if worker.is_running() else None,
+			'matches_per_hour': round(matches_per_hour, 1),
+			**totals
+		}
+
+	def __write_stats(self, now):
+		stats = {
+			'updated_at': now,
+			'proxies': {worker.proxy_server: self.__build_worker_stats(worker, now) for worker in self._workers}
+		}
+
+		temp_path = f"{self._config['stats_path']}.tmp"
+
+		with open(temp_path, 'w') as file:
+			json.dump(stats, file, indent=4)
+
+		os.replace(temp_path, self._config['stats_path'])
+
+	def run(self):
+		while True:
+			now = time.time()
+
+			for worker in self._workers:
+				self.__check_worker(worker, now)
+
+			self.__write_stats(now)
+
+			if self._shutdown_requested and not any(worker.is_running() for worker in self._workers):
+				break
+
+			time.sleep(1 if self._shutdown_requested else self._config['health_check_interval_seconds'])
+
+		# The last exit codes and totals of the stopped workers
+		for worker in self._workers:
+			if worker.get_pid() is not None:
+				worker.collect_exited_process()
+
+		self.__write_stats(time.time())
+
+		print_helper_global.print_message(MessageType.NOTIFICATION, 'All the workers have been stopped')
+
+
+arg_parser = argparse.ArgumentParser(description='Runs an OpenDota parser worker per proxy')
+arg_parser.add_argument('--config_path', type=str, default='supervisor_config.json', help='supervisor config file')
+args = arg_parser.parse_args()
+
+with open(args.config_path, 'r') as config_file:
+	config_global = json.load(config_file)
+
+supervisor_global = WorkerSupervisor(config_global)
+
+signal.signal(signal.SIGTERM, lambda signum, frame: supervisor_global.request_shutdown())
+signal.signal(signal.SIGINT, lambda signum, frame: supervisor_global.request_shutdown())
+
+supervisor_global.run()
@@ -0,0 +1,99 @@
+import argparse
+import asyncio
+import random
+
+
+# A local stand-in for the parser proxies: tunnels CONNECT requests and forwards plain http ones, optionally adding
+# latency and refusing a share of the connections, e.g.
+#   python stand_in_proxy.py --port 8901 --latency_ms 300 --failure_rate 0.1
+# and "127.0.0.1:8901" in the supervisor's proxies list
+
+connections_number = 0
+
+
+async def pipe(reader, writer):
+	try:
+		while True:
+			data = await reader.read(65536)
+
+			if not data:
+				break
+
+			writer.write(data)
+			await writer.drain()
+	except ConnectionError:
+		pass
+	finally:
+		writer.close()
+
+
+async def read_request_head(reader):
+	head = await reader.readuntil(b'\r\n\r\n')
+	request_line, _, headers = head.partition(b'\r\n')
+
+	return request_line.decode('latin-1').split(' '), headers
+
+
+async def handle_client(client_reader, client_writer, latency_seconds, failure_rate):
+	global connections_number
+	connections_number += 1
+
+	try:
+		(method, target, version), headers = await read_request_head(client_reader)
+	except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+		client_writer.close()
+		return
+
+	await asyncio.sleep(latency_seconds)
+
+	if random.random() < failure_rate:
+		client_writer.write(b'HTTP/1.1 502 Bad Gateway\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+		client_writer.close()
+		return
+
+	if method == 'CONNECT':
+		host, _, port = target.rpartition(':')
+		first_bytes = b''
+	else:
+		# Absolute-form request of a plain http call, forwarded in origin-form
+		address, _, path = target[len('http://'):].partition('/')
+		host, _, port = address.partition(':')
+		port = port or '80'
+		first_bytes = f'{method} /{path} {version}\r\n'.encode('latin-1') + headers
+
+	try:
+		upstream_reader, upstream_writer = await asyncio.open_connection(host, int(port))
+	except OSError:
+		client_writer.write(b'HTTP/1.1 502 Bad Gateway\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+		client_writer.close()
+		return
+
+	if method == 'CONNECT':
+		client_writer.write(b'HTTP/1.1 200 Connection established\r\n\r\n')
+	else:
+		upstream_writer.write(first_bytes)
+
+	await asyncio.gather(pipe(client_reader, upstream_writer), pipe(upstream_reader, client_writer))
+
+
+async def serve(host, port, latency_seconds, failure_rate):
+	server = await asyncio.start_server(
+		lambda reader, writer: handle_client(reader, writer, latency_seconds, failure_rate), host, port)
+
+	print(f'Stand-in proxy is listening on {host}:{port}')
+
+	async with server:
+		await server.serve_forever()
+
+
+arg_parser = argparse.ArgumentParser(description='Local stand-in proxy for testing the parser workers')
+arg_parser.add_argument('--host', type=str, default='127.0.0.1')
+arg_parser.add_argument('--port', type=int, default=8901)
+arg_parser.add_argument('--latency_ms', type=int, default=0, help='delay added to every proxied connection')
+arg_parser.add_argument('--failure_rate', type=float, default=0., help='share of the connections answered with a 502')
+args = arg_parser.parse_args()
+
+try:
+	asyncio.run(serve(args.host, args.port, args.latency_ms / 1000, args.failure_rate))
+except KeyboardInterrupt:
+	print(f'Stand-in proxy served {connections_number} connections')
@@ -0,0 +1,228 @@
+import ast
+import functools
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PREDICTOR_DIR = os.path.join(REPO_ROOT, 'predictor')
+HEROES_TABLE_PATH = os.path.join(PREDICTOR_DIR, 'heroes_table.csv')
+
+sys.path.insert(0, REPO_ROOT)
+
+from utils.common import PrintHelper, ranks_to_mmr  # noqa: E402
+
+
+# Equivalence of the numpy feature kernel of DataProcessor.transform_match_data with the pandas merge/groupby path
+# it replaced. The only intended difference is the rank group of Divine/Immortal players: the pandas path looked up
+# hero_*_divine / hero_*_immortal columns that heroes_table.csv does not have, the kernel uses divine_immortal
+
+
+class _NoParseManager:
+	pass
+
+
+def load_predictor_namespace(cache_path):
+	# The predictor is a script: only its definitions are executed, everything from reading the config on is skipped
+	with open(os.path.join(PREDICTOR_DIR, 'DotaMatchResultPredictor.py'), 'r', encoding='utf-8') as f:
+		module_tree = ast.parse(f.read())
+
+	script_start_idx = next(idx for idx, node in enumerate(module_tree.body) if isinstance(node, ast.With))
+	module_tree.body = module_tree.body[:script_start_idx]
+
+	namespace = {'__name__': 'predictor_under_test'}
+	exec(compile(module_tree, 'DotaMatchResultPredictor.py', 'exec'), namespace)
+
+	namespace['print_helper_global'] = PrintHelper(False, False)
+	namespace['print_helper_mandatory'] = PrintHelper(False, False)
+	namespace['ParseManager'] = _NoParseManager
+	namespace['HeroTable'] = functools.partial(namespace['HeroTable'], HEROES_TABLE_PATH, cache_path)
+
+	return namespace
+
+
+def transform_match_data_pandas(data_processor, df_heroes, match_data_raw, rank_aliases=None):
+	aggregation_rules = {
+		**data_processor._aggregation_rules,
+		'player_match_rank_initial': lambda x: list(x),
+		'player_id': lambda x: list(x),
+		'hero_id': lambda x: list(x),
+		'player_side': 'first'
+	}
+	column_mapping = {
+		**data_processor._column_mapping,
+		'player_match_rank_initial': 'team_players_match_ranks_initial',
+		'player_id': 'team_players_id_list',
+		'hero_id': 'team_heroes_id_list',
+		'player_side': 'team_side'
+	}
+	columns_to_subtract = data_processor._columns_to_subtract
+
+	df = pd.DataFrame(match_data_raw['players'])
+	df = df.drop(columns=['player_heroes'])
+
+	df = pd.merge(df, df_heroes, on='hero_id', how='inner')
+
+	df['player_side'] = df['player_side'].astype('category')
+	df['player_match_rank_initial'] = df['player_match_rank_initial'].astype('category')
+
+	df['player_match_rank_initial_mmr'] = df['player_match_rank_initial'].apply(lambda rank: sum(ranks_to_mmr[rank]) / 2)
+	df['player_match_rank_initial_mmr'] = df['player_match_rank_initial_mmr'].astype('float64')
+
+	winrate_columns = [col for col in df.columns if 'winrate' in col.lower() and 'hero' not in col.lower()]
+	pickrate_columns = [col for col in df.columns if 'pickrate' in col.lower() and 'hero' not in col.lower()]
+
+	df[winrate_columns] *= 100
+	df[pickrate_columns] *= 100
+
+	df['player_hero_winrate_overall'] *= 100
+
+	closest_player_idx = df['player_q_mmr_diff'].abs().idxmin()
+	closest_player_rank = df.loc[closest_player_idx, 'player_match_rank_initial'].split(' ')[0]
+
+	if closest_player_rank.lower() in ['herald', 'guardian', 'crusader']:
+		closest_player_rank = 'up_to_crusader'
+
+	closest_player_rank = (rank_aliases or {}).get(closest_player_rank.lower(), closest_player_rank)
+
+	df['hero_pickrate_for_rank'] = df[f'hero_pickrate_{closest_player_rank.lower()}']
+	df['hero_winrate_for_rank'] = df[f'hero_winrate_{closest_player_rank.lower()}']
+
+	df['player_heroes_pick_confidence_score_total'] = (df['player_heroes_pick_confidence_score_allies'] +
+													  df['player_heroes_pick_confidence_score_enemies'])
+	df['player_matches_abandonment_rate'] = (df['player_matches_abandoned'] / df[
+		'player_all_matches_played_number']) * 100
+
+	df.reset_index(drop=True, inplace=True)
+
+	df = df.groupby(['player_side'], as_index=False, observed=False).agg(aggregation_rules)
+	df.rename(columns=column_mapping, inplace=True)
+	df = df.drop(columns=['team_players_match_ranks_initial', 'team_players_id_list', 'team_heroes_id_list'])
+
+	df['match_id'] = 1
+	df_dire = df[df['team_side'] == 'Dire'].set_index('match_id')[columns_to_subtract]
+	df_radiant = df[df['team_side'] == 'Radiant'].set_index('match_id')[columns_to_subtract]
+
+	return df_dire - df_radiant, df_radiant - df_dire
+
+
+def make_player(rng, player_id, hero_id, player_side, player_rank, q_mmr_diff):
+	matches_played = int(rng.integers(100, 5000))
+	matches_won = int(rng.integers(0, matches_played))
+
+	return {
+		'player_id': player_id,
+		'hero_id': hero_id,
+		'player_side': player_side,
+		'player_match_rank_initial': player_rank,
+		'player_q_mmr_diff': q_mmr_diff,
+		'player_hero_winrate_overall': rng.random(),
+		'player_hero_total_matches_played': int(rng.integers(0, 500)),
+		'dire_winrate_all_time': rng.random(),
+		'dire_games_played_all_time': int(rng.integers(0, 2500)),
+		'radiant_winrate_all_time': rng.random(),
+		'radiant_games_played_all_time': int(rng.integers(0, 2500)),
+		'player_heroes_pick_confidence_score_allies': rng.normal(0, 3),
+		'player_heroes_pick_confidence_score_enemies': rng.normal(0, 3),
+		'player_time_played_all_matches': rng.random() * 1e7,
+		'player_winrate_over_time': rng.random(),
+		'player_all_matches_played_number': matches_played,
+		'player_matches_abandoned': int(rng.integers(0, 20)),
+		'player_matches_lost': matches_played - matches_won,
+		'player_matches_won': matches_won,
+		'player_kda_average_all_matches': rng.random() * 6,
+		'player_heroes': []
+	}
+
+
+def make_match(seed, players_ranks, closest_player_idx=0, hero_ids=None):
+	rng = np.random.default_rng(seed)
+	known_hero_ids = pd.read_csv(HEROES_TABLE_PATH)['hero_id'].to_numpy()
+
+	if hero_ids is None:
+		hero_ids = rng.choice(known_hero_ids, size=len(players_ranks), replace=False)
+
+	players = []
+
+	for player_idx, (player_rank, hero_id) in enumerate(zip(players_ranks, hero_ids)):
+		q_mmr_diff = 0.5 if player_idx == closest_player_idx else float(rng.choice([-1, 1]) * rng.uniform(50, 900))
+
+		players.append(make_player(rng, 1000 + player_idx, int(hero_id), 'Dire' if player_idx < 5 else 'Radiant',
+								   player_rank, q_mmr_diff))
+
+	return {'players': players}
+
+
+MISSING_HERO_ID = 24
+
+FIXTURE_MATCHES = {
+	'legend': make_match(1, ['Legend III', 'Legend I', 'Ancient II', 'Archon V', 'Legend IV',
+							 'Legend II', 'Ancient I', 'Legend V', 'Archon I', 'Legend III']),
+	'crusader': make_match(2, ['Herald V', 'Guardian II', 'Crusader I', 'Guardian IV', 'Crusader V',
+							   'Herald III', 'Crusader III', 'Guardian I', 'Archon I', 'Crusader II'],
+						   closest_player_idx=6),
+	'missing_hero': make_match(3, ['Ancient III'] * 10, closest_player_idx=7,
+							   hero_ids=[1, 2, MISSING_HERO_ID, 4, 5, 6, 7, 8, 9, 10]),
+	'immortal_not_closest': make_match(4, ['Immortal IW', 'Divine V', 'Divine III', 'Ancient I', 'Divine I',
+										   'Ancient V', 'Divine II', 'Divine IV', 'Immortal I', 'Divine V'],
+									   closest_player_idx=3),
+	'immortal_closest_missing_hero': make_match(5, ['Divine II', 'Divine V', 'Immortal III', 'Divine I', 'Ancient IV',
+													'Immortal I', 'Divine III', 'Divine IV', 'Ancient II', 'Divine V'],
+												closest_player_idx=5, hero_ids=[11, 12, 13, 14, 15, 16, 17, 18, 19, 130])
+}
+
+
+@pytest.fixture(scope='module')
+def data_processor(tmp_path_factory):
+	namespace = load_predictor_namespace(str(tmp_path_factory.mktemp('heroes_table') / 'heroes_table.npz'))
+
+	return namespace['DataProcessor']()
+
+
+@pytest.fixture(scope='module')
+def df_heroes():
+	return pd.read_csv(HEROES_TABLE_PATH)
+
+
+@pytest.mark.parametrize('match_name', FIXTURE_MATCHES)
+def test_kernel_matches_pandas_path(data_processor, df_heroes, match_name):
+	match_data_raw = FIXTURE_MATCHES[match_name]
+
+	expected_dire, expected_radiant = transform_match_data_pandas(
+		data_processor, df_heroes, match_data_raw, rank_aliases={'divine': 'divine_immortal', 'immortal': 'divine_immortal'})
+	result_dire, result_radiant = data_processor.transform_match_data(match_data_raw)
+
+	np.testing.assert_array_equal(result_dire, expected_dire.to_numpy()[0])
+	np.testing.assert_array_equal(result_radiant, expected_radiant.to_numpy()[0])
+
+
+def test_kernel_drops_missing_heroes_like_inner_merge(data_processor):
+	match_data_raw = FIXTURE_MATCHES['missing_hero']
+	players_without_missing_hero = {'players': [player for player in match_data_raw['players']
+												if player['hero_id'] != MISSING_HERO_ID]}
+
+	np.testing.assert_array_equal(data_processor.transform_match_data(match_data_raw),
+								  data_processor.transform_match_data(players_without_missing_hero))
+
+
+def test_pandas_path_failed_on_immortal_closest_player(data_processor, df_heroes):
+	with pytest.raises(KeyError):
+		transform_match_data_pandas(data_processor, df_heroes, FIXTURE_MATCHES['immortal_closest_missing_hero'])
+
+
+def test_kernel_uses_divine_immortal_rates_for_immortal_closest_player(data_processor, df_heroes):
+	match_data_raw = FIXTURE_MATCHES['immortal_closest_missing_hero']
+	players_heroes = pd.DataFrame(match_data_raw['players'])[['hero_id', 'player_side']]
+	teams_rates = pd.merge(players_heroes, df_heroes, on='hero_id', how='inner').groupby('player_side').mean()
+
+	result_dire, _ = data_processor.transform_match_data(match_data_raw)
+
+	for feature_column, rates_column in (('team_heroes_pickrate_for_rank_mean', 'hero_pickrate_divine_immortal'),
+										 ('team_heroes_winrate_for_rank_mean', 'hero_winrate_divine_immortal')):
+		feature_idx = data_processor._columns_to_subtract.index(feature_column)
+
+		np.testing.assert_array_equal(result_dire[feature_idx],
+									  teams_rates.loc['Dire', rates_column] - teams_rates.loc['Radiant', rates_column])
@@ -0,0 +1,190 @@
+import copy
+import os
+import sys
+
+import numpy as np
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, REPO_ROOT)
+
+from utils.common import safe_divide  # noqa: E402
+from utils.pick_confidence import apply_pick_confidence_scores  # noqa: E402
+
+
+# Equivalence of apply_pick_confidence_scores with the pairwise loop of ParseManager.__parse_match_data_stage_two
+# it replaced. The only intended difference is a hero missing from a player's /heroes response: the loop raised on
+# the None it looked up, the scorer counts it as never played
+
+
+def parse_match_data_stage_two_loop(match_data_dict):
+	# The pick confidence part of __parse_match_data_stage_two, as in predictor/DotaMatchResultPredictor.py and
+	# parsers/OpenDota/OpenDotaParser.py before ac435b3
+	def handle_pick_conf_coef(winrate, total_played):
+		if winrate != -1. and total_played > 10:
+			temp = winrate * 100
+
+			if temp < 20:
+				return -2
+			elif 20 <= temp <= 45:
+				return -1
+			elif 80 >= temp >= 55:
+				return 1
+			elif temp > 80:
+				return 2
+			else:
+				return 0
+		else:
+			return 0
+
+	for player in match_data_dict['players']:
+		player_id, hero_id, player_side = player['player_id'], player['hero_id'], player['player_side']
+		player_heroes = player['player_heroes']
+
+		player_heroes_pick_confidence_score_allies = 0
+		player_heroes_pick_confidence_score_enemies = 0
+
+		for p in match_data_dict['players']:
+			if p['player_id'] != player_id:
+				ph_dict = next((d for d in player_heroes if d['hero_id'] == p['hero_id']), None)
+
+				if p['player_side'] == player_side:
+					games_with_total = ph_dict['with_games']
+					games_with_won = ph_dict['with_win']
+
+					hero_with_winrate = float(safe_divide(games_with_won, games_with_total))
+
+					player_heroes_pick_confidence_score_allies += handle_pick_conf_coef(hero_with_winrate,
+																						games_with_total)
+				else:
+					games_against_total = ph_dict['against_games']
+					games_against_won = ph_dict['against_win']
+
+					hero_against_winrate = float(safe_divide(games_against_won, games_against_total))
+
+					player_heroes_pick_confidence_score_enemies += handle_pick_conf_coef(hero_against_winrate,
+																						 games_against_total)
+
+				p['player_heroes_pick_confidence_score_allies'] = player_heroes_pick_confidence_score_allies
+				p['player_heroes_pick_confidence_score_enemies'] = player_heroes_pick_confidence_score_enemies
+
+
+MAX_HERO_ID = 40
+
+
+def make_hero_stats(rng, hero_id):
+	# Game counts around the 10 games threshold and wins hitting the 20/45/55/80% edges
+	with_games, against_games = (int(rng.choice([0, 5, 10, 11, 20, 40, 100])) for _ in range(2))
+
+	def get_games_won(games_total):
+		if games_total == 0:
+			return 0
+
+		return int(round(games_total * rng.choice([0., 0.2, 0.3, 0.45, 0.5, 0.55, 0.7, 0.8, 1.])))
+
+	return {'hero_id': hero_id, 'with_games': with_games, 'with_win': get_games_won(with_games),
+			'against_games': against_games, 'against_win': get_games_won(against_games)}
+
+
+def make_players(seed, player_ids=None):
+	rng = np.random.default_rng(seed)
+	hero_ids = [int(hero_id) for hero_id in rng.choice(np.arange(1, MAX_HERO_ID + 1), size=10, replace=False)]
+
+	if player_ids is None:
+		player_ids = [str(1000 + player_idx) for player_idx in range(10)]
+
+	players = []
+
+	for player_idx, (player_id, hero_id) in enumerate(zip(player_ids, hero_ids)):
+		# Every hero of the match is in the response, shuffled among the other heroes
+		player_heroes = [make_hero_stats(rng, response_hero_id) for response_hero_id in range(1, MAX_HERO_ID + 1)]
+		rng.shuffle(player_heroes)
+
+		players.append({'player_id': player_id, 'hero_id': hero_id,
+						'player_side': 'Dire' if player_idx < 5 else 'Radiant', 'player_heroes': player_heroes})
+
+	return players
+
+
+def get_scores(players):
+	return [(p.get('player_heroes_pick_confidence_score_allies'), p.get('player_heroes_pick_confidence_score_enemies'))
+			for p in players]
+
+
+def assert_scores_match_loop(players, loop_players=None):
+	scorer_players = copy.deepcopy(players)
+	loop_players = copy.deepcopy(loop_players if loop_players is not None else players)
+
+	apply_pick_confidence_scores(scorer_players)
+	parse_match_data_stage_two_loop({'players': loop_players})
+
+	assert get_scores(scorer_players) == get_scores(loop_players)
+
+
+def fill_missing_heroes(players):
+	# The response the loop could score: every hero of the match the player has not played is listed with no games
+	players = copy.deepcopy(players)
+	match_hero_ids = [p['hero_id'] for p in players]
+
+	for player in players:
+		listed_hero_ids = {player_hero['hero_id'] for player_hero in player['player_heroes']}
+
+		player['player_heroes'] += [{'hero_id': hero_id, 'with_games': 0, 'with_win': 0, 'against_games': 0,
+									 'against_win': 0} for hero_id in match_hero_ids if hero_id not in listed_hero_ids]
+
+	return players
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_scorer_matches_loop(seed):
+	assert_scores_match_loop(make_players(seed))
+
+
+def test_scorer_takes_first_entry_of_duplicated_hero_id():
+	players = make_players(100)
+
+	for player_idx, player in enumerate(players):
+		duplicated_hero_id = players[(player_idx + 1) % len(players)]['hero_id']
+
+		player['player_heroes'].append({'hero_id': duplicated_hero_id, 'with_games': 50, 'with_win': 50,
+										'against_games': 50, 'against_win': 0})
+		player['player_heroes'].insert(0, {'hero_id': duplicated_hero_id, 'with_games': 50, 'with_win': 0,
+										   'against_games': 50, 'against_win': 50})
+
+	assert_scores_match_loop(players)
+
+
+def test_scorer_counts_missing_heroes_as_never_played():
+	players = make_players(101)
+
+	for player_idx, player in enumerate(players):
+		missing_hero_id = players[(player_idx + 3) % len(players)]['hero_id']
+		player['player_heroes'] = [player_hero for player_hero in player['player_heroes']
+								   if player_hero['hero_id'] != missing_hero_id]
+
+	players[4]['player_heroes'] = []
+
+	with pytest.raises(TypeError):
+		parse_match_data_stage_two_loop({'players': copy.deepcopy(players)})
+
+	assert_scores_match_loop(players, fill_missing_heroes(players))
+
+
+def test_scorer_handles_hero_ids_above_indexed_range():
+	players = make_players(102)
+
+	players[2]['hero_id'] = MAX_HERO_ID + 100
+	players[7]['hero_id'] = MAX_HERO_ID + 200
+
+	assert_scores_match_loop(players, fill_missing_heroes(players))
+
+
+@pytest.mark.parametrize('player_ids', [
+	['1', '2', '3', '1', '5', '6', '7', '8', '9', '10'],
+	['1', '2', '3', '4', '5', '1', '7', '8', '9', '10'],
+	['1', '1', '1', '1', '1', '1', '1', '1', '1', '1'],
+	['1', '2', '3', '4', '5', '6', '7', '8', '9', '9']
+])
+def test_scorer_matches_loop_on_repeated_player_id(player_ids):
+	assert_scores_match_loop(make_players(103, player_ids))
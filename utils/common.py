@@ -9,12 +9,23 @@ import sys
 colorama.init(convert=False)
 
 
-def global_await_exit_action():
-	print()
-	_ = input('Press Enter to exit')
+_unattended_mode = False
+
+
+def set_unattended_mode(enabled):
+	# Scripts run by a supervisor must not block on the exit prompt
+	global _unattended_mode
+	_unattended_mode = enabled
+
+
+def global_await_exit_action(exit_code=0):
 	print()
 
-	sys.exit()
+	if not _unattended_mode:
+		_ = input('Press Enter to exit')
+		print()
+
+	sys.exit(exit_code)
 
 
 def safe_divide(a, b):
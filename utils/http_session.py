@@ -0,0 +1,56 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+	import brotli  # noqa: F401 - urllib3 decodes 'br' responses once it is importable
+	_brotli_available = True
+except ImportError:
+	_brotli_available = False
+
+
+DEFAULT_POOL_SIZE = 10
+
+_shared_session = None
+_shared_session_lock = threading.Lock()
+
+
+def get_accepted_encodings():
+	return 'gzip, deflate, br' if _brotli_available else 'gzip, deflate'
+
+
+def create_http_session(pool_size=DEFAULT_POOL_SIZE):
+	# A single pool per host keeps the TCP/TLS connections alive between the calls
+	adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+
+	session = requests.Session()
+	session.mount('http://', adapter)
+	session.mount('https://', adapter)
+
+	session.headers.update({
+		'Accept-Encoding': get_accepted_encodings(),
+		'Connection': 'keep-alive'
+	})
+
+	return session
+
+
+def get_shared_http_session(pool_size=DEFAULT_POOL_SIZE):
+	# The pool is sized by the first caller, the clients of a process are configured alike anyway
+	global _shared_session
+
+	with _shared_session_lock:
+		if _shared_session is None:
+			_shared_session = create_http_session(pool_size)
+
+		return _shared_session
+
+
+def close_shared_http_session():
+	global _shared_session
+
+	with _shared_session_lock:
+		if _shared_session is not None:
+			_shared_session.close()
+			_shared_session = None
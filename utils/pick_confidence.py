@@ -0,0 +1,89 @@
+from itertools import chain
+from operator import itemgetter
+
+import numpy as np
+
+
+_get_hero_id = itemgetter('hero_id')
+_get_hero_stats = itemgetter('with_games', 'with_win', 'against_games', 'against_win')
+_missing_hero_stats = (0, 0, 0, 0)
+_no_position = np.iinfo('int64').max
+
+
+def index_players_heroes(players_heroes):
+	# Dense (player, hero_id) -> position map over /players/{id}/heroes responses, -1 marking heroes absent from them
+	responses_lengths = [len(player_heroes) for player_heroes in players_heroes]
+
+	hero_ids = np.fromiter(map(_get_hero_id, chain.from_iterable(players_heroes)), dtype='int64',
+						   count=sum(responses_lengths))
+	rows = np.repeat(np.arange(len(players_heroes)), responses_lengths)
+	positions = np.arange(len(hero_ids)) - np.repeat(np.cumsum(responses_lengths) - responses_lengths, responses_lengths)
+
+	heroes_index = np.full((len(players_heroes), int(hero_ids.max(initial=0)) + 1), _no_position, dtype='int64')
+	# The first entry of a duplicated hero_id wins, as with a linear scan. Plain fancy assignment does not define
+	# which of the repeated indices is written last, an unbuffered minimum does
+	np.minimum.at(heroes_index, (rows, hero_ids), positions)
+	heroes_index[heroes_index == _no_position] = -1
+
+	return heroes_index
+
+
+def get_pick_confidence_coefficients(games_won, games_total):
+	with np.errstate(divide='ignore', invalid='ignore'):
+		winrate = np.where(games_total != 0, games_won / games_total, -1.)
+
+	temp = winrate * 100
+
+	coefficients = np.select([temp < 20, temp <= 45, (temp >= 55) & (temp <= 80), temp > 80], [-2, -1, 1, 2], 0)
+
+	return np.where((winrate != -1.) & (games_total > 10), coefficients, 0)
+
+
+def apply_pick_confidence_scores(players):
+	players_number = len(players)
+
+	if players_number == 0:
+		return
+
+	match_hero_ids = [p['hero_id'] for p in players]
+	player_ids = np.array([p['player_id'] for p in players])
+	player_sides = np.array([p['player_side'] for p in players])
+
+	# stats[i, k] holds player i's history with/against the hero picked by player k; heroes missing from the
+	# player's response count as never played
+	players_heroes = [p['player_heroes'] for p in players]
+	heroes_index = index_players_heroes(players_heroes)
+
+	indexed_hero_ids = [hero_id if 0 <= hero_id < heroes_index.shape[1] else -1 for hero_id in match_hero_ids]
+	heroes_positions = np.where(np.array(indexed_hero_ids) >= 0, heroes_index[:, indexed_hero_ids], -1).tolist()
+
+	stats_rows = [_get_hero_stats(player_heroes[position]) if position >= 0 else _missing_hero_stats
+				  for player_heroes, player_positions in zip(players_heroes, heroes_positions)
+				  for position in player_positions]
+
+	stats = np.array(stats_rows, dtype='int64').reshape(players_number, players_number, 4)
+
+	is_other_player = player_ids[:, None] != player_ids[None, :]
+	is_ally = player_sides[:, None] == player_sides[None, :]
+
+	# Ally and enemy coefficients in a single pass: [..., 0] with the hero, [..., 1] against it
+	coefficients = get_pick_confidence_coefficients(stats[:, :, 1::2], stats[:, :, 0::2])
+	coefficients[:, :, 0] *= is_other_player & is_ally
+	coefficients[:, :, 1] *= is_other_player & ~is_ally
+
+	running_scores = np.cumsum(coefficients, axis=1)
+
+	# The original pairwise loop stored player i's running scores on each other player k as it went, so k kept
+	# the values left by the last such i. The collected training data relies on exactly these values
+	has_assigning_player = is_other_player.any(axis=0)
+	last_assigning_player = players_number - 1 - np.argmax(is_other_player[::-1], axis=0)
+
+	assigned_scores = running_scores[last_assigning_player, np.arange(players_number)].tolist()
+
+	for player, is_assigned, (allies_score, enemies_score) in zip(players, has_assigning_player.tolist(),
+																	assigned_scores):
+		if not is_assigned:
+			continue
+
+		player['player_heroes_pick_confidence_score_allies'] = allies_score
+		player['player_heroes_pick_confidence_score_enemies'] = enemies_score
@@ -0,0 +1,120 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+
+
+DEFAULT_ENDPOINT_TTLS_SECONDS = {
+	'totals': 60 * 60 * 12,
+	'counts': 60 * 60 * 12,
+	'heroes': 60 * 60 * 6
+}
+
+DEFAULT_MAX_ENTRIES = 50000
+
+_player_endpoint_pattern = re.compile(r'/players/(\d+)/(\w+)/?$')
+
+
+class PlayerProfileCache:
+	def __init__(self, database_path, endpoint_ttls_seconds=None, max_entries=DEFAULT_MAX_ENTRIES):
+		self._database_path = database_path
+		self._endpoint_ttls_seconds = endpoint_ttls_seconds or DEFAULT_ENDPOINT_TTLS_SECONDS.copy()
+		self._max_entries = max_entries
+
+		self._lock = threading.Lock()
+		self._connection = None
+
+		self.__open_database_connection()
+
+	def __open_database_connection(self):
+		# The same file is shared by the predictor and several parser agents, hence WAL and a generous busy timeout
+		self._connection = sqlite3.connect(self._database_path, timeout=30, check_same_thread=False)
+		self._connection.execute('PRAGMA journal_mode=WAL')
+
+		self._connection.execute("""
+			CREATE TABLE IF NOT EXISTS player_profiles (
+				player_id TEXT NOT NULL,
+				endpoint TEXT NOT NULL,
+				payload TEXT NOT NULL,
+				fetched_at REAL NOT NULL,
+				accessed_at REAL NOT NULL,
+				PRIMARY KEY (player_id, endpoint)
+			)""")
+		self._connection.execute(
+			'CREATE INDEX IF NOT EXISTS player_profiles_accessed_at_idx ON player_profiles (accessed_at)')
+
+		self._connection.commit()
+
+	@staticmethod
+	def parse_player_endpoint(api_link):
+		match = _player_endpoint_pattern.search(api_link)
+
+		if not match:
+			return None
+
+		return match.group(1), match.group(2)
+
+	def is_endpoint_cached(self, endpoint):
+		return endpoint in self._endpoint_ttls_seconds
+
+	def get(self, player_id, endpoint):
+		if not self.is_endpoint_cached(endpoint):
+			return None
+
+		now = time.time()
+
+		with self._lock:
+			row = self._connection.execute(
+				'SELECT payload, fetched_at FROM player_profiles WHERE player_id = ? AND endpoint = ?',
+				(str(player_id), endpoint)).fetchone()
+
+			if not row:
+				return None
+
+			payload, fetched_at = row
+
+			if now - fetched_at > self._endpoint_ttls_seconds[endpoint]:
+				self._connection.execute('DELETE FROM player_profiles WHERE player_id = ? AND endpoint = ?',
+										 (str(player_id), endpoint))
+				self._connection.commit()
+
+				return None
+
+			self._connection.execute('UPDATE player_profiles SET accessed_at = ? WHERE player_id = ? AND endpoint = ?',
+									 (now, str(player_id), endpoint))
+			self._connection.commit()
+
+		return json.loads(payload)
+
+	def put(self, player_id, endpoint, payload):
+		if not self.is_endpoint_cached(endpoint):
+			return
+
+		now = time.time()
+
+		with self._lock:
+			self._connection.execute("""
+				INSERT OR REPLACE INTO player_profiles (player_id, endpoint, payload, fetched_at, accessed_at)
+				VALUES (?, ?, ?, ?, ?)""", (str(player_id), endpoint, json.dumps(payload), now, now))
+
+			self.__evict_least_recently_used()
+
+			self._connection.commit()
+
+	def __evict_least_recently_used(self):
+		entries_number = self._connection.execute('SELECT COUNT(*) FROM player_profiles').fetchone()[0]
+
+		if entries_number <= self._max_entries:
+			return
+
+		self._connection.execute("""
+			DELETE FROM player_profiles WHERE rowid IN (
+				SELECT rowid FROM player_profiles ORDER BY accessed_at ASC LIMIT ?
+			)""", (entries_number - self._max_entries,))
+
+	def dispose(self):
+		with self._lock:
+			if self._connection:
+				self._connection.close()
+				self._connection = None
@@ -0,0 +1,138 @@
+import threading
+import time
+
+
+DEFAULT_COOLDOWN_SECONDS = 60
+DEFAULT_MAX_COOLDOWN_SECONDS = 60 * 30
+DEFAULT_FAILURES_BEFORE_COOLDOWN = 3
+
+# Stands in for the latency of a proxy whose requests have all failed so far
+_unmeasured_latency_seconds = 5.
+
+# Weight of the latest request in the moving averages
+_smoothing_factor = 0.2
+
+
+class ProxyEntry:
+	def __init__(self, proxy_server, rate_limiter=None):
+		self.proxy_server = proxy_server
+		self.proxies = {'https': proxy_server}
+		self.rate_limiter = rate_limiter
+
+		self.latency_seconds = None
+		self.error_rate = 0.
+		self.rate_limited_rate = 0.
+
+		self.requests_number = 0
+		self.requests_in_flight = 0
+		self.consecutive_failures_number = 0
+		self.cooldowns_number = 0
+		self.cooldown_until = 0.
+
+	def get_rate_limit_wait_time(self):
+		return self.rate_limiter.get_wait_time() if self.rate_limiter else 0.
+
+	def get_expected_request_cost(self, rate_limit_wait_time):
+		# Expected seconds per successful request. Untried proxies cost nothing, so each of them gets a chance first
+		if self.latency_seconds is not None:
+			latency_seconds = self.latency_seconds
+		else:
+			latency_seconds = _unmeasured_latency_seconds if self.requests_number else 0.
+		success_rate = max(0.1, 1 - self.error_rate - self.rate_limited_rate)
+
+		return (latency_seconds + rate_limit_wait_time) * (1 + self.requests_in_flight) / success_rate
+
+	def record_outcome(self, latency_seconds, is_error, is_rate_limited):
+		self.requests_number += 1
+		self.requests_in_flight -= 1
+
+		if latency_seconds is not None:
+			if self.latency_seconds is None:
+				self.latency_seconds = latency_seconds
+			else:
+				self.latency_seconds += _smoothing_factor * (latency_seconds - self.latency_seconds)
+
+		self.error_rate += _smoothing_factor * (float(is_error) - self.error_rate)
+		self.rate_limited_rate += _smoothing_factor * (float(is_rate_limited) - self.rate_limited_rate)
+
+
+class ProxyPool:
+	def __init__(self, proxy_servers, rate_limiter_factory=None, cooldown_seconds=DEFAULT_COOLDOWN_SECONDS,
+				 max_cooldown_seconds=DEFAULT_MAX_COOLDOWN_SECONDS,
+				 failures_before_cooldown=DEFAULT_FAILURES_BEFORE_COOLDOWN):
+		# Every proxy has its own quota on the API side, hence a rate limiter per proxy
+		self._entries = [ProxyEntry(proxy_server, rate_limiter_factory(proxy_server) if rate_limiter_factory else None)
+						 for proxy_server in proxy_servers]
+
+		self._cooldown_seconds = cooldown_seconds
+		self._max_cooldown_seconds = max_cooldown_seconds
+		self._failures_before_cooldown = failures_before_cooldown
+
+		self._lock = threading.Lock()
+
+	def has_available_proxy(self, excluded_entry=None):
+		now = time.monotonic()
+
+		with self._lock:
+			return any(entry.cooldown_until <= now for entry in self._entries if entry is not excluded_entry)
+
+	def acquire(self):
+		# The proxy is handed out right away, the caller reports the outcome of its request. The rate limiters query
+		# their shared state on disk, so their wait times are read before taking the lock
+		rate_limit_wait_times = {entry: entry.get_rate_limit_wait_time() for entry in self._entries
+								 if entry.cooldown_until <= time.monotonic()}
+
+		with self._lock:
+			now = time.monotonic()
+			available_entries = [entry for entry in self._entries if entry.cooldown_until <= now]
+
+			if available_entries:
+				entry = min(available_entries,
+							key=lambda e: e.get_expected_request_cost(rate_limit_wait_times.get(e, 0.)))
+			else:
+				entry = min(self._entries, key=lambda e: e.cooldown_until)
+
+			entry.requests_in_flight += 1
+			wait_time = entry.cooldown_until - now
+
+		if wait_time > 0:
+			time.sleep(wait_time)
+
+		return entry
+
+	def report_success(self, entry, latency_seconds):
+		with self._lock:
+			entry.record_outcome(latency_seconds, False, False)
+
+			entry.consecutive_failures_number = 0
+			entry.cooldowns_number = 0
+
+	def report_failure(self, entry, latency_seconds=None, is_rate_limited=False):
+		with self._lock:
+			entry.record_outcome(latency_seconds, not is_rate_limited, is_rate_limited)
+
+			entry.consecutive_failures_number += 1
+
+			if is_rate_limited or entry.consecutive_failures_number >= self._failures_before_cooldown:
+				# Repeated cooldowns of the same proxy grow exponentially
+				entry.cooldown_until = time.monotonic() + min(self._cooldown_seconds * 2 ** entry.cooldowns_number,
+															  self._max_cooldown_seconds)
+				entry.cooldowns_number += 1
+				entry.consecutive_failures_number = 0
+
+	def get_stats(self):
+		now = time.monotonic()
+
+		with self._lock:
+			return {entry.proxy_server: {
+				'requests': entry.requests_number,
+				'latency_seconds': round(entry.latency_seconds, 3) if entry.latency_seconds is not None else None,
+				'error_rate': round(entry.error_rate, 3),
+				'rate_limited_rate': round(entry.rate_limited_rate, 3),
+				'cooldown_seconds_left': round(max(0., entry.cooldown_until - now))
+			} for entry in self._entries}
+
+	def dispose(self):
+		for entry in self._entries:
+			if entry.rate_limiter:
+				entry.rate_limiter.dispose()
@@ -0,0 +1,168 @@
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+
+DEFAULT_REQUESTS_PER_MINUTE = 60
+DEFAULT_REQUESTS_PER_DAY = 2000
+DEFAULT_MINUTE_RESERVE = 3
+
+DEFAULT_BUCKET_KEY = 'direct'
+
+
+def get_next_minute_start_timestamp(timestamp):
+	return (int(timestamp) // 60 + 1) * 60
+
+
+def get_next_day_start_timestamp(timestamp):
+	# OpenDota resets the daily quota at midnight UTC
+	current_day = datetime.fromtimestamp(timestamp, tz=timezone.utc).date()
+	next_day = datetime.combine(current_day + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc)
+
+	return next_day.timestamp()
+
+
+class RateLimiter:
+	def __init__(self, state_path=None, bucket_key=DEFAULT_BUCKET_KEY,
+				 requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, requests_per_day=DEFAULT_REQUESTS_PER_DAY,
+				 minute_reserve=DEFAULT_MINUTE_RESERVE):
+		self._state_path = state_path or ':memory:'
+		self._bucket_key = bucket_key
+
+		self._capacity = float(requests_per_minute)
+		self._refill_rate = requests_per_minute / 60
+		self._requests_per_day = requests_per_day
+		self._minute_reserve = minute_reserve
+
+		self._lock = threading.Lock()
+		self._connection = None
+
+		self.__open_database_connection()
+
+	def __open_database_connection(self):
+		# A file-backed state lets every agent using the same IP draw from the same bucket
+		self._connection = sqlite3.connect(self._state_path, timeout=30, check_same_thread=False,
+										   isolation_level=None)
+
+		if self._state_path != ':memory:':
+			self._connection.execute('PRAGMA journal_mode=WAL')
+
+		self._connection.execute("""
+			CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+				bucket_key TEXT PRIMARY KEY,
+				tokens REAL NOT NULL,
+				updated_at REAL NOT NULL,
+				day_remaining INTEGER NOT NULL,
+				day_reset_at REAL NOT NULL
+			)""")
+
+	def __load_bucket(self, now):
+		row = self._connection.execute(
+			'SELECT tokens, updated_at, day_remaining, day_reset_at FROM rate_limit_buckets WHERE bucket_key = ?',
+			(self._bucket_key,)).fetchone()
+
+		if not row:
+			return self._capacity, now, self._requests_per_day, get_next_day_start_timestamp(now)
+
+		tokens, updated_at, day_remaining, day_reset_at = row
+
+		# updated_at is ahead of now while the bucket is held until the server's next minute window
+		tokens = min(self._capacity, tokens + max(0., now - updated_at) * self._refill_rate)
+		updated_at = max(now, updated_at)
+
+		if now >= day_reset_at:
+			day_remaining, day_reset_at = self._requests_per_day, get_next_day_start_timestamp(now)
+
+		return tokens, updated_at, day_remaining, day_reset_at
+
+	def __store_bucket(self, tokens, updated_at, day_remaining, day_reset_at):
+		self._connection.execute("""
+			INSERT OR REPLACE INTO rate_limit_buckets (bucket_key, tokens, updated_at, day_remaining, day_reset_at)
+			VALUES (?, ?, ?, ?, ?)""", (self._bucket_key, tokens, updated_at, day_remaining, day_reset_at))
+
+	def __update_bucket(self, update_pointer):
+		with self._lock:
+			self._connection.execute('BEGIN IMMEDIATE')
+
+			try:
+				now = time.time()
+				bucket = update_pointer(now, *self.__load_bucket(now))
+
+				self.__store_bucket(*bucket[:4])
+				self._connection.execute('COMMIT')
+			except BaseException:
+				self._connection.execute('ROLLBACK')
+				raise
+
+		return bucket[4:]
+
+	def __reserve_request(self, now, tokens, updated_at, day_remaining, day_reset_at):
+		# The token is taken right away even when the bucket is empty, so that concurrent callers queue up one
+		# refill interval apart instead of all waking up at the same moment
+		if day_remaining <= 0:
+			tokens, updated_at = self._capacity, day_reset_at
+			day_remaining, day_reset_at = self._requests_per_day, get_next_day_start_timestamp(day_reset_at)
+
+		tokens -= 1
+		day_remaining -= 1
+
+		request_time = updated_at + max(0., -tokens) / self._refill_rate
+
+		return tokens, updated_at, day_remaining, day_reset_at, request_time - now
+
+	def acquire(self):
+		sleep_time, = self.__update_bucket(self.__reserve_request)
+
+		if sleep_time > 0:
+			time.sleep(sleep_time)
+
+		return sleep_time
+
+	def get_wait_time(self):
+		# What acquire() would sleep right now, without reserving a token
+		with self._lock:
+			now = time.time()
+			tokens, updated_at, day_remaining, day_reset_at = self.__load_bucket(now)
+
+		if day_remaining <= 0:
+			return day_reset_at - now
+
+		return max(0., updated_at + max(0., 1 - tokens) / self._refill_rate - now)
+
+	def update_from_headers(self, headers):
+		remaining_minute = headers.get('X-Rate-Limit-Remaining-Minute')
+		remaining_day = headers.get('X-Rate-Limit-Remaining-Day')
+
+		if remaining_minute is None and remaining_day is None:
+			return
+
+		def apply_headers(now, tokens, updated_at, day_remaining, day_reset_at):
+			# The server's counters are authoritative but lag behind the requests still in flight, so a few of them
+			# are held back. Once the server's minute window is spent, refilling resumes with the next window only
+			if remaining_minute is not None:
+				remaining_tokens = int(remaining_minute) - self._minute_reserve
+
+				if remaining_tokens <= 0:
+					tokens = min(tokens, 0.)
+					updated_at = max(updated_at, get_next_minute_start_timestamp(now))
+				else:
+					tokens = min(tokens, float(remaining_tokens))
+
+			if remaining_day is not None:
+				day_remaining = min(day_remaining, int(remaining_day))
+
+			return tokens, updated_at, day_remaining, day_reset_at
+
+		self.__update_bucket(apply_headers)
+
+	def drain(self):
+		# Used on 429s: the next request is delayed until a full token is refilled
+		self.__update_bucket(lambda now, tokens, updated_at, day_remaining, day_reset_at:
+							 (min(tokens, 0.), updated_at, day_remaining, day_reset_at))
+
+	def dispose(self):
+		with self._lock:
+			if self._connection:
+				self._connection.close()
+				self._connection = None
@@ -0,0 +1,166 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+try:
+	import zstandard
+	_zstd_available = True
+except ImportError:
+	_zstd_available = False
+
+
+DEFAULT_SEGMENT_MAX_BYTES = 256 * 1024 * 1024
+
+ZSTD_CODEC = 'zstd'
+ZLIB_CODEC = 'zlib'
+
+
+def get_default_codec():
+	return ZSTD_CODEC if _zstd_available else ZLIB_CODEC
+
+
+def compress_payload(payload, codec):
+	if codec == ZSTD_CODEC:
+		return zstandard.ZstdCompressor(level=10).compress(payload)
+
+	return zlib.compress(payload, 9)
+
+
+def decompress_payload(blob, codec):
+	if codec == ZSTD_CODEC:
+		if not _zstd_available:
+			raise RuntimeError('The archive holds zstd blobs, install zstandard to read them')
+
+		return zstandard.ZstdDecompressor().decompress(blob)
+
+	return zlib.decompress(blob)
+
+
+class ResponseArchive:
+	def __init__(self, archive_dir, segment_max_bytes=DEFAULT_SEGMENT_MAX_BYTES):
+		# Raw API responses are kept compressed in append-only segment files. Payloads are addressed by their hash,
+		# so refetching an unchanged response costs an index row only
+		self._archive_dir = archive_dir
+		self._segment_max_bytes = segment_max_bytes
+		self._codec = get_default_codec()
+
+		self._lock = threading.Lock()
+		self._connection = None
+
+		os.makedirs(archive_dir, exist_ok=True)
+
+		self.__open_database_connection()
+
+	def __open_database_connection(self):
+		# The index transaction also serializes the segment appends of all the agents sharing the archive
+		self._connection = sqlite3.connect(os.path.join(self._archive_dir, 'archive_index.db'), timeout=60,
+										   check_same_thread=False, isolation_level=None)
+		self._connection.execute('PRAGMA journal_mode=WAL')
+
+		self._connection.execute("""
+			CREATE TABLE IF NOT EXISTS blobs (
+				content_hash TEXT PRIMARY KEY,
+				segment_name TEXT NOT NULL,
+				segment_offset INTEGER NOT NULL,
+				blob_length INTEGER NOT NULL,
+				codec TEXT NOT NULL
+			)""")
+		self._connection.execute("""
+			CREATE TABLE IF NOT EXISTS responses (
+				url TEXT NOT NULL,
+				fetched_at REAL NOT NULL,
+				content_hash TEXT NOT NULL REFERENCES blobs (content_hash)
+			)""")
+		self._connection.execute(
+			'CREATE INDEX IF NOT EXISTS responses_url_fetched_at_idx ON responses (url, fetched_at)')
+
+	def __get_writable_segment_name(self, blob_length):
+		row = self._connection.execute('SELECT MAX(segment_name) FROM blobs').fetchone()
+		segment_name = row[0] if row[0] else 'segment_000001.bin'
+
+		segment_path = os.path.join(self._archive_dir, segment_name)
+
+		if os.path.exists(segment_path) and os.path.getsize(segment_path) + blob_length > self._segment_max_bytes:
+			segment_number = int(segment_name[len('segment_'):-len('.bin')]) + 1
+			segment_name = f'segment_{segment_number:06d}.bin'
+
+		return segment_name
+
+	def __append_blob(self, blob):
+		segment_name = self.__get_writable_segment_name(len(blob))
+
+		with open(os.path.join(self._archive_dir, segment_name), 'ab') as file:
+			# Bytes left behind by an append whose transaction was rolled back are simply never referenced
+			segment_offset = file.seek(0, os.SEEK_END)
+
+			file.write(blob)
+			file.flush()
+			os.fsync(file.fileno())
+
+		return segment_name, segment_offset
+
+	def put(self, url, response_data):
+		payload = json.dumps(response_data, separators=(',', ':'), sort_keys=True).encode('utf-8')
+		content_hash = hashlib.sha256(payload).hexdigest()
+
+		with self._lock:
+			self._connection.execute('BEGIN IMMEDIATE')
+
+			try:
+				is_stored = self._connection.execute('SELECT 1 FROM blobs WHERE content_hash = ?',
+													 (content_hash,)).fetchone()
+
+				if not is_stored:
+					blob = compress_payload(payload, self._codec)
+					segment_name, segment_offset = self.__append_blob(blob)
+
+					self._connection.execute("""
+						INSERT INTO blobs (content_hash, segment_name, segment_offset, blob_length, codec)
+						VALUES (?, ?, ?, ?, ?)""", (content_hash, segment_name, segment_offset, len(blob), self._codec))
+
+				self._connection.execute('INSERT INTO responses (url, fetched_at, content_hash) VALUES (?, ?, ?)',
+										 (url, time.time(), content_hash))
+				self._connection.execute('COMMIT')
+			except BaseException:
+				self._connection.execute('ROLLBACK')
+				raise
+
+		return content_hash
+
+	def get(self, url):
+		with self._lock:
+			row = self._connection.execute("""
+				SELECT b.segment_name, b.segment_offset, b.blob_length, b.codec
+				FROM responses r JOIN blobs b ON b.content_hash = r.content_hash
+				WHERE r.url = ?
+				ORDER BY r.fetched_at DESC
+				LIMIT 1""", (url,)).fetchone()
+
+		if not row:
+			return None
+
+		segment_name, segment_offset, blob_length, codec = row
+
+		with open(os.path.join(self._archive_dir, segment_name), 'rb') as file:
+			file.seek(segment_offset)
+			blob = file.read(blob_length)
+
+		return json.loads(decompress_payload(blob, codec))
+
+	def get_urls(self, url_pattern):
+		# url_pattern is an sql LIKE pattern
+		with self._lock:
+			rows = self._connection.execute('SELECT DISTINCT url FROM responses WHERE url LIKE ? ORDER BY url',
+											(url_pattern,)).fetchall()
+
+		return [row[0] for row in rows]
+
+	def dispose(self):
+		with self._lock:
+			if self._connection:
+				self._connection.close()
+				self._connection = None
@@ -0,0 +1,170 @@
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+
+# Measures the latency of claiming a batch of match_queue items on a large, mostly processed queue,
+# before and after the 002_match_queue_status migration (SQLite variant). The legacy table already has the lease
+# columns of 001, so both variants run the same claim: own leftovers, expired leases and pending items
+
+legacy_schema = """
+	CREATE TABLE match_queue (
+		id INTEGER PRIMARY KEY AUTOINCREMENT,
+		match_id INTEGER NOT NULL UNIQUE,
+		is_assigned BOOLEAN NOT NULL,
+		agent TEXT,
+		is_processed BOOLEAN NOT NULL,
+		claimed_at DATETIME,
+		lease_expires_at DATETIME
+	);
+	CREATE TABLE public_matches (
+		id INTEGER PRIMARY KEY AUTOINCREMENT,
+		match_id INTEGER NOT NULL,
+		start_time INTEGER NOT NULL,
+		duration INTEGER NOT NULL,
+		lobby_type INTEGER NOT NULL,
+		game_mode INTEGER NOT NULL,
+		avg_rank_tier INTEGER NOT NULL,
+		num_rank_tier INTEGER NOT NULL,
+		UNIQUE (match_id)
+	);
+"""
+
+migration_path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+							  '../../DotaAIDB/migrations/002_match_queue_status_sqlite.sql')
+
+
+def fill_queue(conn, rows_number, agents_number):
+	# Queue items are processed in id order, so the processed ones form a long prefix of the table
+	processed_number = int(rows_number * 0.97)
+	claimed_number = int(rows_number * 0.02)
+
+	def generate_rows():
+		for i in range(rows_number):
+			if i < processed_number:
+				yield i, True, f'agent_{i % agents_number}', True
+			elif i < processed_number + claimed_number:
+				yield i, True, f'agent_{i % agents_number}', False
+			else:
+				yield i, False, None, False
+
+	conn.executemany('INSERT INTO match_queue (match_id, is_assigned, agent, is_processed) VALUES (?, ?, ?, ?)',
+					 generate_rows())
+	conn.commit()
+
+
+def assign_leases(conn, claimed_condition):
+	# Every tenth claimed item belongs to a silent agent and its lease has run out. Applied to both variants,
+	# as the migration replaces the leases of the claimed items with ones expiring right away
+	conn.execute(f"""
+		UPDATE match_queue SET lease_expires_at = CASE
+			WHEN match_id % 10 = 0 THEN datetime('now', '-60 seconds')
+			ELSE datetime('now', '+600 seconds')
+		END
+		WHERE {claimed_condition}
+	""")
+	conn.commit()
+
+
+def claim_legacy(conn, agent, limit):
+	rows = conn.execute("""
+		UPDATE match_queue
+		SET is_assigned = 1, agent = :agent, claimed_at = datetime('now'),
+			lease_expires_at = datetime('now', '+600 seconds')
+		WHERE id IN (
+			SELECT id FROM (SELECT id FROM match_queue
+				WHERE is_assigned = 1 AND is_processed = 0 AND agent = :agent ORDER BY id LIMIT :limit)
+			UNION SELECT id FROM (SELECT id FROM match_queue
+				WHERE is_assigned = 1 AND is_processed = 0 AND lease_expires_at < datetime('now')
+				ORDER BY id LIMIT :limit)
+			UNION SELECT id FROM (SELECT id FROM match_queue
+				WHERE is_assigned = 0 AND is_processed = 0 ORDER BY id LIMIT :limit)
+			ORDER BY id LIMIT :limit)
+		RETURNING id, match_id, is_assigned, agent
+	""", {'agent': agent, 'limit': limit}).fetchall()
+	conn.commit()
+
+	return rows
+
+
+def mark_processed_legacy(conn, rows):
+	conn.execute('UPDATE match_queue SET is_processed = 1, lease_expires_at = NULL WHERE id IN ({})'.format(
+		','.join('?' * len(rows))), [row[0] for row in rows])
+	conn.commit()
+
+
+def claim_with_status(conn, agent, limit):
+	rows = conn.execute("""
+		UPDATE match_queue
+		SET status = 'claimed', agent = :agent, claimed_at = datetime('now'),
+			lease_expires_at = datetime('now', '+600 seconds')
+		WHERE id IN (
+			SELECT id FROM (SELECT id FROM match_queue WHERE status = 'claimed' AND agent = :agent ORDER BY id LIMIT :limit)
+			UNION SELECT id FROM (SELECT id FROM match_queue
+				WHERE status = 'claimed' AND lease_expires_at < datetime('now')
+				ORDER BY id LIMIT :limit)
+			UNION SELECT id FROM (SELECT id FROM match_queue WHERE status = 'pending' ORDER BY id LIMIT :limit)
+			ORDER BY id LIMIT :limit)
+		RETURNING id, match_id, status, agent
+	""", {'agent': agent, 'limit': limit}).fetchall()
+	conn.commit()
+
+	return rows
+
+
+def mark_processed_with_status(conn, rows):
+	conn.execute("UPDATE match_queue SET status = 'processed', lease_expires_at = NULL WHERE id IN ({})".format(
+		','.join('?' * len(rows))), [row[0] for row in rows])
+	conn.commit()
+
+
+def measure(claim_pointer, conn, claims_number, limit, after_claim_pointer=None):
+	latencies = []
+
+	for i in range(claims_number):
+		start_time = time.perf_counter()
+		rows = claim_pointer(conn, f'bench_agent_{i}', limit)
+		latencies.append((time.perf_counter() - start_time) * 1000)
+
+		if after_claim_pointer and rows:
+			after_claim_pointer(conn, rows)
+
+	return statistics.median(latencies), max(latencies)
+
+
+arg_parser = argparse.ArgumentParser(description='match_queue claim latency benchmark')
+arg_parser.add_argument('--rows', type=int, default=1_000_000)
+arg_parser.add_argument('--claims', type=int, default=50)
+arg_parser.add_argument('--limit', type=int, default=30)
+arg_parser.add_argument('--agents', type=int, default=20)
+args = arg_parser.parse_args()
+
+with tempfile.TemporaryDirectory() as temp_dir:
+	connection = sqlite3.connect(os.path.join(temp_dir, 'match_queue_benchmark.db'))
+	connection.executescript(legacy_schema)
+
+	print(f'Filling the queue with {args.rows} rows...')
+	fill_queue(connection, args.rows, args.agents)
+	assign_leases(connection, 'is_assigned = 1 AND is_processed = 0')
+
+	# Both variants start from the same queue, the copy gets migrated
+	status_connection = sqlite3.connect(os.path.join(temp_dir, 'match_queue_benchmark_status.db'))
+	connection.backup(status_connection)
+
+	legacy_median, legacy_max = measure(claim_legacy, connection, args.claims, args.limit, mark_processed_legacy)
+	print(f'Legacy booleans, no index: median {legacy_median:.2f} ms, max {legacy_max:.2f} ms per claim')
+
+	with open(migration_path, 'r') as file:
+		status_connection.executescript(file.read())
+
+	assign_leases(status_connection, "status = 'claimed'")
+
+	status_median, status_max = measure(claim_with_status, status_connection, args.claims, args.limit,
+										mark_processed_with_status)
+	print(f'Status + partial indexes: median {status_median:.2f} ms, max {status_max:.2f} ms per claim')
+
+	status_connection.close()
+	connection.close()
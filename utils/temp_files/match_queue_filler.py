@@ -47,7 +47,7 @@ for match in all_matches_to_add:
 
 	match_id = match[0]
 
-	query = f"INSERT INTO match_queue (match_id, is_assigned, agent, is_processed) VALUES ({match_id}, FALSE, NULL, FALSE)"
+	query = f"INSERT INTO match_queue (match_id, status, agent) VALUES ({match_id}, 'pending', NULL)"
 
 	try:
 		cursor.execute(query)